@@ -0,0 +1,66 @@
+"""
+backend_api/analysis.py
+-----------------------
+Framework-independent pieces of the analyze pipeline, shared by the Flask
+app (app.py) and the asyncio app (asgi_app.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.education.policy_rules import check_policy
+from metrics import stage
+
+REQUIRED_FIELDS = ['pattern_type', 'variable_name', 'filename', 'line']
+MAX_BATCH_SIZE = int(os.environ.get('DEVSHIELD_MAX_BATCH', 100))
+# Route risk scoring through Azure OpenAI instead of the local engine
+USE_AZURE_OPENAI = os.environ.get('DEVSHIELD_USE_AZURE_OPENAI', '').lower() == 'true'
+
+
+def validate_analysis_request(data):
+    """Return an error message for an invalid analyze payload, or None."""
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object.'
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            return f'Missing required field: {field}'
+    return None
+
+
+def parse_batch(data):
+    """
+    Extract the item list of a batch request ({"items": [...]} or a bare list).
+    Returns (items, error).
+    """
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None, 'Batch must be a non-empty list of items.'
+    if len(items) > MAX_BATCH_SIZE:
+        return None, f'Batch too large (max {MAX_BATCH_SIZE} items).'
+    return items, None
+
+
+def build_analysis_response(data, ai_result):
+    """Combine AI risk scoring with the policy decision into the API response."""
+    risk_score = ai_result.get('risk_score', 0)
+    explanation = ai_result.get('explanation', '')
+    # Policy Check
+    with stage('check_policy'):
+        policy = check_policy(data.get('pattern_type', ''), {
+            'variable': data.get('variable_name', ''),
+            'filename': data.get('filename'),
+            'risk_score': risk_score,
+            'repo': data.get('repo'),
+            'team': data.get('team'),
+        })
+    action = policy.get('action', ai_result.get('action', 'allow'))
+    reason = policy.get('reason', '')
+    # Explanation (combine AI and policy)
+    with stage('explanation'):
+        full_explanation = f"{explanation} Policy: {reason}"
+    return {
+        'risk_score': risk_score,
+        'action': action,
+        'explanation': full_explanation
+    }
@@ -19,18 +19,30 @@ from datetime import datetime
 
 # Ensure project root is in sys.path for module imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from modules.ai_engine.ai_interface import assess_risk
+from modules.ai_engine.ai_interface import add_llm_observer, assess_risk
 from modules.ai_engine.explanation import generate_explanation
-from modules.education.policy_rules import check_policy
+from modules.education.policy_rules import check_policy, evaluate_many
 import csv
 from io import StringIO
 
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from audit_writer import AuditWriter
+from log_storage import ColumnarArchive, SQLiteLogStore, TieredLogStore, summarize
+import metrics
+import serialization
+from serialization import MSGPACK_AVAILABLE, MSGPACK_MIMETYPE, is_msgpack, packb, unpackb, wants_msgpack
+from scan_pool import MAX_SCAN_BYTES, ScanQueueFull, pool as scan_pool
+from analysis import (USE_AZURE_OPENAI, build_analysis_response, parse_batch,
+                      validate_analysis_request)
+
 
 sys.path.append('../modules/ai_engine')
 sys.path.append('../modules/education')
-RATE_LIMIT = 60  
+RATE_LIMIT = int(os.environ.get('DEVSHIELD_RATE_LIMIT', 60))  # requests per key/endpoint/minute
 rate_limit_cache = {}
 app = Flask(__name__)
+# jsonify() and request.get_json() use the fast serializer (orjson/msgspec when installed)
+serialization.install_json_provider(app)
 
 def rate_limiter(endpoint):
     def decorator(func):
@@ -41,6 +53,7 @@ def rate_limiter(endpoint):
             key = f"{api_key}:{endpoint}:{now}"
             count = rate_limit_cache.get(key, 0)
             if count >= RATE_LIMIT:
+                metrics.RATE_LIMITED.inc(endpoint)
                 return jsonify({'error': 'Rate limit exceeded. Try again later.'}), 429
             rate_limit_cache[key] = count + 1
             return func(*args, **kwargs)
@@ -51,22 +64,64 @@ def rate_limiter(endpoint):
 LOG_PATH = os.path.join(os.path.dirname(__file__), 'analysis_log.jsonl')
 
 
+def write_analysis_batch(entries):
+    log_store.append_many(entries)
+
+
+# Analysis log: recent rows in the analysis_log table, older rows in the columnar archive
+# (DEVSHIELD_DB_URL points at SQL Server, which needs OFFSET/FETCH instead of LIMIT)
+log_dialect = 'mssql' if os.environ.get('DEVSHIELD_DB_URL') else 'sqlite'
+log_store = TieredLogStore(SQLiteLogStore(lambda: get_db(), dialect=log_dialect), ColumnarArchive())
+# Audit entries are written in batches off the request thread; drained on shutdown
+audit_writer = AuditWriter(write_analysis_batch)
+metrics.AUDIT_QUEUE_DEPTH.callback = audit_writer.qsize
+add_llm_observer(metrics.observe_llm_call)
+
+
 def log_analysis(request_data, response_data):
     entry = {
         'timestamp': datetime.utcnow().isoformat(),
-        'request': json.dumps(request_data),
-        'response': json.dumps(response_data)
+        'request': serialization.dumps(request_data),
+        'response': serialization.dumps(response_data)
     }
     try:
-        conn = get_db()
-        conn.execute('INSERT INTO analysis_log (timestamp, request, response) VALUES (?, ?, ?)',
-                     (entry['timestamp'], entry['request'], entry['response']))
-        conn.commit()
-        conn.close()
+        with metrics.stage('log_analysis'):
+            audit_writer.submit(entry)
     except Exception as e:
         print(f"[LOG] Failed to write log: {e}")
 
 
+class TrackedConnection:
+    """DB-API connection wrapper that keeps the open-connections gauge in step with close()."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._open = True
+        metrics.DB_CONNECTIONS.inc()
+        metrics.DB_CONNECTIONS_OPEN.inc()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def _release(self):
+        if self._open:
+            self._open = False
+            metrics.DB_CONNECTIONS_OPEN.dec()
+
+    def close(self):
+        self._release()
+        self._conn.close()
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __del__(self):
+        self._release()  # dropped without close(); the driver closes it when collected
+
 # User management (SQLite)
 def get_db():
     db_url = os.environ.get('DEVSHIELD_DB_URL')
@@ -75,12 +130,12 @@ def get_db():
         import pyodbc
         conn = pyodbc.connect(db_url)
         conn.row_factory = None  # pyodbc returns tuples, not dicts
-        return conn
+        return TrackedConnection(conn)
     else:
-        DB_PATH = os.path.join(os.path.dirname(__file__), 'devshield.db')
+        DB_PATH = os.environ.get('DEVSHIELD_DB_PATH', os.path.join(os.path.dirname(__file__), 'devshield.db'))
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
-        return conn
+        return TrackedConnection(conn)
 def load_users():
     conn = get_db()
     users = [dict(row) for row in conn.execute('SELECT username, api_key, role FROM users')]
@@ -107,7 +162,9 @@ def require_api_key(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         api_key = request.headers.get('X-API-Key')
-        if api_key not in get_api_keys():
+        with metrics.stage('auth'):
+            authorized = api_key in get_api_keys()
+        if not authorized:
             return jsonify({"error": "Unauthorized. Valid API key required."}), 401
         return func(*args, **kwargs)
     return wrapper
@@ -116,20 +173,8 @@ def require_api_key(func):
 @require_api_key
 def export_audit():
     format = request.args.get('format', 'json')
-    conn = get_db()
-    rows = conn.execute('SELECT timestamp, request, response FROM analysis_log ORDER BY id DESC').fetchall()
-    conn.close()
-    events = []
-    for row in rows:
-        try:
-            event = {
-                'timestamp': row['timestamp'],
-                'request': row['request'],
-                'response': row['response']
-            }
-            events.append(event)
-        except Exception:
-            continue
+    events = list(log_store.iter_entries(since=request.args.get('since'), until=request.args.get('until'),
+                                         newest_first=True))
     if format == 'csv':
         output = StringIO()
         writer = csv.DictWriter(output, fieldnames=['timestamp', 'request', 'response'])
@@ -247,9 +292,42 @@ def remove_user(username):
     return jsonify({'message': f'User {username} removed.'})
 
 
+# Request instrumentation (per-endpoint latency histogram, in-flight gauge)
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+
+@app.teardown_request
+def stop_request_timer(exc=None):
+    if 'request_start' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+
+@app.after_request
+def record_request_duration(response):
+    if 'request_start' in g:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - g.request_start,
+                                         endpoint, request.method, response.status_code)
+    return response
+
+# Prometheus scrape endpoint (disable with DEVSHIELD_METRICS_ENABLED=false)
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if os.environ.get('DEVSHIELD_METRICS_ENABLED', 'true').lower() != 'true':
+        return jsonify({'error': 'Metrics disabled.'}), 404
+    return metrics.render_latest(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
 # Global error handler for JSON errors
 @app.errorhandler(Exception)
 def handle_exception(e):
+    # Tracebacks are only returned in debug mode, never from production workers
+    if not app.debug:
+        from werkzeug.exceptions import HTTPException
+        if isinstance(e, HTTPException):
+            return jsonify({'error': e.description}), e.code
+        app.logger.exception('Unhandled error')
+        return jsonify({'error': 'Internal server error.'}), 500
     import traceback
     return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
 POLICY_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'policy_config.json')
@@ -305,42 +383,20 @@ def reset_policy():
 @app.route('/api/dashboard/summary', methods=['GET'])
 @require_api_key
 def dashboard_summary():
-    conn = get_db()
-    rows = conn.execute('SELECT response, request FROM analysis_log').fetchall()
-    conn.close()
-    total = len(rows)
-    by_action = {}
-    by_pattern = {}
-    for row in rows:
-        try:
-            response = json.loads(row['response'])
-            request = json.loads(row['request'])
-        except Exception:
-            continue
-        action = response.get('action', 'unknown')
-        pattern = request.get('pattern_type', 'unknown')
-        by_action[action] = by_action.get(action, 0) + 1
-        by_pattern[pattern] = by_pattern.get(pattern, 0) + 1
-    return jsonify({
-        'total_events': total,
-        'by_action': by_action,
-        'by_pattern': by_pattern
-    })
+    return jsonify(summarize(log_store.iter_entries(since=request.args.get('since'),
+                                                    until=request.args.get('until'))))
 
 # Event history endpoint
 @app.route('/api/dashboard/events', methods=['GET'])
 @require_api_key
 def dashboard_events():
-    conn = get_db()
-    rows = conn.execute('SELECT timestamp, request, response FROM analysis_log ORDER BY id DESC LIMIT 100').fetchall()
-    conn.close()
     events = []
-    for row in rows:
+    for row in log_store.iter_entries(newest_first=True, limit=100):
         try:
             event = {
                 'timestamp': row['timestamp'],
-                'request': json.loads(row['request']),
-                'response': json.loads(row['response'])
+                'request': serialization.loads(row['request']),
+                'response': serialization.loads(row['response'])
             }
             events.append(event)
         except Exception:
@@ -356,27 +412,125 @@ def analyze_secret():
         return jsonify({'error': 'Request must be JSON.'}), 400
     data = request.get_json()
     # Input validation
-    required_fields = ['pattern_type', 'variable_name', 'filename', 'line']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-    # 1. AI Risk Scoring
-    ai_result = assess_risk(data)
-    risk_score = ai_result.get('risk_score', 0)
-    explanation = ai_result.get('explanation', '')
-    # 2. Policy Check
-    policy = check_policy(data.get('pattern_type', ''), {'variable': data.get('variable_name', '')})
-    action = policy.get('action', ai_result.get('action', 'allow'))
-    reason = policy.get('reason', '')
-    # 3. Explanation (combine AI and policy)
-    full_explanation = f"{explanation} Policy: {reason}"
-    response = {
-        'risk_score': risk_score,
-        'action': action,
-        'explanation': full_explanation
-    }
+    error = validate_analysis_request(data)
+    if error:
+        return jsonify({'error': error}), 400
+    # AI Risk Scoring, then policy check and combined explanation
+    with metrics.stage('assess_risk'):
+        ai_result = assess_risk(data, use_azure_openai=USE_AZURE_OPENAI)
+    response = build_analysis_response(data, ai_result)
     log_analysis(data, response)
     return jsonify(response)
 
+def batch_response(body):
+    """JSON, or MessagePack if the client's Accept header prefers it."""
+    if wants_msgpack(request.accept_mimetypes):
+        return app.response_class(packb(body), mimetype=MSGPACK_MIMETYPE)
+    return jsonify(body)
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@require_api_key
+@rate_limiter('analyze_batch')
+def analyze_batch():
+    # Body: JSON, or MessagePack (Content-Type: application/msgpack)
+    if is_msgpack(request.mimetype):
+        if not MSGPACK_AVAILABLE:
+            return jsonify({'error': 'MessagePack is not supported by this server.'}), 415
+        try:
+            payload = unpackb(request.get_data())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    elif request.is_json:
+        payload = request.get_json()
+    else:
+        return jsonify({'error': 'Request must be JSON or MessagePack.'}), 400
+    items, error = parse_batch(payload)
+    if error:
+        return jsonify({'error': error}), 400
+    results = []
+    for data in items:
+        error = validate_analysis_request(data)
+        if error:
+            results.append({'error': error})
+            continue
+        with metrics.stage('assess_risk'):
+            ai_result = assess_risk(data, use_azure_openai=USE_AZURE_OPENAI)
+        response = build_analysis_response(data, ai_result)
+        log_analysis(data, response)
+        results.append(response)
+    return batch_response({'results': results})
+
+def read_scan_request():
+    """
+    Collect [(filename, bytes), ...] from a /api/scan request, or return (None, (error, status)).
+    Bodies are read in bounded chunks so an oversized upload is rejected without buffering it.
+    """
+    if request.content_length is not None and request.content_length > MAX_SCAN_BYTES:
+        return None, ('Request body too large.', 413)
+    files = []
+    if request.files:
+        # multipart/form-data: werkzeug spools each upload to disk as it streams in
+        for upload in request.files.getlist('file') or list(request.files.values()):
+            files.append((upload.filename or 'upload', upload.stream.read(MAX_SCAN_BYTES + 1)))
+    elif request.is_json:
+        data = request.get_json(silent=True)
+        items = data.get('files') if isinstance(data, dict) and 'files' in data else [data]
+        if not isinstance(items, list) or not all(isinstance(i, dict) and isinstance(i.get('text'), str) for i in items):
+            return None, ('JSON body must be {"text": ...} or {"files": [{"filename": ..., "text": ...}]}.', 400)
+        files = [(str(i.get('filename') or 'input.txt'), i['text'].encode('utf-8')) for i in items]
+    else:
+        # Raw body (text/plain, application/octet-stream); name via ?filename=
+        files = [(request.args.get('filename', 'input.txt'), request.stream.read(MAX_SCAN_BYTES + 1))]
+    if not files:
+        return None, ('No content to scan.', 400)
+    if sum(len(data) for _, data in files) > MAX_SCAN_BYTES:
+        return None, ('Request body too large.', 413)
+    return files, None
+
+@app.route('/api/scan', methods=['POST'])
+@require_api_key
+@rate_limiter('scan')
+def scan_secrets():
+    """
+    Scan raw text or uploaded files with the guard engine (same detection as the CLI).
+    Returns every finding with its risk score and the policy decision for it.
+    """
+    files, error = read_scan_request()
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    start = time.perf_counter()
+    try:
+        with metrics.stage('scan'):
+            results = scan_pool.scan(files)
+    except ScanQueueFull:
+        return jsonify({'error': 'Scanner busy. Try again later.'}), 503, {'Retry-After': '1'}
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    findings = [f for result in results for f in result.get('findings', ())]
+    context = {'repo': request.args.get('repo'), 'team': request.args.get('team')}
+    with metrics.stage('check_policy'):
+        decisions = evaluate_many(findings, context)
+    for finding, decision in zip(findings, decisions):
+        finding['action'] = decision['action']
+        finding['reason'] = decision['reason']
+    return jsonify({
+        'findings': findings,
+        'files_scanned': sum(1 for r in results if 'skipped' not in r),
+        'skipped': [{'file': r['file'], 'reason': r['skipped']} for r in results if 'skipped' in r],
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+    })
+
+def configure_app(config=None):
+    """
+    Configure the module-level app for WSGI servers (gunicorn, waitress, uWSGI) and return it.
+    Production defaults: debug off, no tracebacks in error responses.
+    """
+    app.config.update(DEBUG=False, PROPAGATE_EXCEPTIONS=False)
+    if config:
+        app.config.update(config)
+    app.debug = app.config['DEBUG']
+    return app
+
+
 if __name__ == '__main__':
     app.run(port=8000, debug=True)
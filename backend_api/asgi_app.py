@@ -0,0 +1,300 @@
+"""
+backend_api/asgi_app.py
+-----------------------
+Asyncio-native serving path for the DevShield-AI backend (Quart/ASGI).
+Ports the hot routes (analyze, batch analyze, dashboard) to async I/O:
+aiosqlite for auth and audit writes, httpx.AsyncClient for the optional
+Azure OpenAI call. A slow model response only parks a coroutine, so one
+process can hold thousands of in-flight requests.
+
+    pip install -r requirements-async.txt
+    hypercorn backend_api.asgi_app:app --bind 0.0.0.0:8000
+    uvicorn backend_api.asgi_app:app --port 8000
+
+The remaining admin routes (users, policy, audit export) stay on the
+Flask app in app.py. This path is SQLite-only (DEVSHIELD_DB_URL is ignored).
+"""
+
+import asyncio
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from functools import wraps
+
+import aiosqlite
+import httpx
+from quart import Quart, g, jsonify, request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from modules.ai_engine.ai_interface import add_llm_observer, assess_risk_async
+from analysis import (USE_AZURE_OPENAI, build_analysis_response, parse_batch,
+                      validate_analysis_request)
+from log_storage import ColumnarArchive, SQLiteLogStore, TieredLogStore, summarize
+import metrics
+import serialization
+from serialization import MSGPACK_AVAILABLE, MSGPACK_MIMETYPE, is_msgpack, packb, unpackb, wants_msgpack
+
+DB_PATH = os.environ.get('DEVSHIELD_DB_PATH', os.path.join(os.path.dirname(__file__), 'devshield.db'))
+RATE_LIMIT = int(os.environ.get('DEVSHIELD_RATE_LIMIT', 60))  # requests per key/endpoint/minute
+LLM_MAX_CONNECTIONS = int(os.environ.get('DEVSHIELD_LLM_MAX_CONNECTIONS', 100))
+AUDIT_BATCH_SIZE = 100
+
+app = Quart(__name__)
+serialization.install_json_provider(app)
+rate_limit_cache = {}
+
+
+def _sync_db():
+    return sqlite3.connect(DB_PATH)
+
+
+# Archive tier is file-based; it is read and compacted off the event loop
+log_store = TieredLogStore(SQLiteLogStore(_sync_db), ColumnarArchive())
+
+
+class AsyncAuditWriter:
+    """Batches analysis_log inserts on one task; drained on shutdown."""
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self, db):
+        self.db = db
+        self.task = asyncio.create_task(self._run())
+
+    def submit(self, entry):
+        self.queue.put_nowait(entry)
+
+    async def _write(self, batch):
+        try:
+            await self.db.executemany(
+                'INSERT INTO analysis_log (timestamp, request, response) VALUES (?, ?, ?)',
+                [(e['timestamp'], e['request'], e['response']) for e in batch])
+            await self.db.commit()
+        except Exception as e:
+            print(f"[LOG] Failed to write {len(batch)} audit entries: {e}")
+            return
+        await asyncio.to_thread(log_store.maybe_compact)
+
+    async def _run(self):
+        while True:
+            entry = await self.queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                nxt = self.queue.get_nowait()
+                if nxt is None:
+                    await self._write(batch)
+                    return
+                batch.append(nxt)
+            await self._write(batch)
+
+    async def drain(self):
+        if self.task is not None:
+            self.queue.put_nowait(None)
+            await self.task
+            self.task = None
+
+
+audit_writer = AsyncAuditWriter()
+metrics.AUDIT_QUEUE_DEPTH.callback = audit_writer.queue.qsize
+add_llm_observer(metrics.observe_llm_call)
+
+
+@app.before_serving
+async def startup():
+    app.db = await aiosqlite.connect(DB_PATH)
+    app.db.row_factory = aiosqlite.Row
+    app.llm_client = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS))
+    audit_writer.start(app.db)
+
+
+@app.after_serving
+async def shutdown():
+    await audit_writer.drain()
+    await app.llm_client.aclose()
+    await app.db.close()
+
+
+def require_api_key(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        api_key = request.headers.get('X-API-Key')
+        if not api_key:
+            return jsonify({"error": "Unauthorized. Valid API key required."}), 401
+        with metrics.stage('auth'):
+            async with app.db.execute('SELECT 1 FROM users WHERE api_key = ?', (api_key,)) as cur:
+                row = await cur.fetchone()
+        if row is None:
+            return jsonify({"error": "Unauthorized. Valid API key required."}), 401
+        return await func(*args, **kwargs)
+    return wrapper
+
+
+def rate_limiter(endpoint):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            api_key = request.headers.get('X-API-Key', 'anon')
+            now = int(time.time() // 60)  # current minute
+            key = f"{api_key}:{endpoint}:{now}"
+            count = rate_limit_cache.get(key, 0)
+            if count >= RATE_LIMIT:
+                metrics.RATE_LIMITED.inc(endpoint)
+                return jsonify({'error': 'Rate limit exceeded. Try again later.'}), 429
+            rate_limit_cache[key] = count + 1
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def log_analysis(request_data, response_data):
+    audit_writer.submit({
+        'timestamp': datetime.utcnow().isoformat(),
+        'request': serialization.dumps(request_data),
+        'response': serialization.dumps(response_data)
+    })
+
+
+async def analyze_one(data):
+    with metrics.stage('assess_risk'):
+        ai_result = await assess_risk_async(data, use_azure_openai=USE_AZURE_OPENAI, client=app.llm_client)
+    response = build_analysis_response(data, ai_result)
+    with metrics.stage('log_analysis'):
+        log_analysis(data, response)
+    return response
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+
+
+@app.teardown_request
+async def stop_request_timer(exc=None):
+    # Runs even when a handler raises, unlike after_request
+    if 'request_start' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+
+
+@app.after_request
+async def record_request_duration(response):
+    if 'request_start' in g:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - g.request_start,
+                                         endpoint, request.method, response.status_code)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    if os.environ.get('DEVSHIELD_METRICS_ENABLED', 'true').lower() != 'true':
+        return jsonify({'error': 'Metrics disabled.'}), 404
+    return metrics.render_latest(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    return jsonify({'status': 'ok', 'message': 'DevShield-AI backend running (async).'})
+
+
+@app.route('/api/analyze', methods=['POST'])
+@require_api_key
+@rate_limiter('analyze')
+async def analyze_secret():
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON.'}), 400
+    data = await request.get_json()
+    error = validate_analysis_request(data)
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(await analyze_one(data))
+
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@require_api_key
+@rate_limiter('analyze_batch')
+async def analyze_batch():
+    # Body: JSON, or MessagePack (Content-Type: application/msgpack)
+    if is_msgpack(request.mimetype):
+        if not MSGPACK_AVAILABLE:
+            return jsonify({'error': 'MessagePack is not supported by this server.'}), 415
+        try:
+            payload = unpackb(await request.get_data())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    elif request.is_json:
+        payload = await request.get_json()
+    else:
+        return jsonify({'error': 'Request must be JSON or MessagePack.'}), 400
+    items, error = parse_batch(payload)
+    if error:
+        return jsonify({'error': error}), 400
+
+    async def run(data):
+        error = validate_analysis_request(data)
+        if error:
+            return {'error': error}
+        return await analyze_one(data)
+
+    # Items are scored concurrently; LLM calls overlap instead of queueing
+    results = await asyncio.gather(*(run(data) for data in items))
+    body = {'results': list(results)}
+    if wants_msgpack(request.accept_mimetypes):
+        return app.response_class(packb(body), mimetype=MSGPACK_MIMETYPE)
+    return jsonify(body)
+
+
+@app.route('/api/dashboard/summary', methods=['GET'])
+@require_api_key
+async def dashboard_summary():
+    async with app.db.execute('SELECT response, request FROM analysis_log') as cur:
+        summary = summarize(await cur.fetchall())
+    summary = await asyncio.to_thread(summarize, log_store.archive.iter_entries(), summary)
+    return jsonify(summary)
+
+
+@app.route('/api/dashboard/events', methods=['GET'])
+@require_api_key
+async def dashboard_events():
+    events = []
+    async with app.db.execute(
+            'SELECT timestamp, request, response FROM analysis_log ORDER BY id DESC LIMIT 100') as cur:
+        rows = await cur.fetchall()
+    if len(rows) < 100:
+        # Top up from the archive when the hot table holds fewer than a page
+        archived = log_store.archive.iter_entries(newest_first=True)
+        rows += await asyncio.to_thread(lambda: list(itertools.islice(archived, 100 - len(rows))))
+    for row in rows:
+        try:
+            events.append({
+                'timestamp': row['timestamp'],
+                'request': serialization.loads(row['request']),
+                'response': serialization.loads(row['response'])
+            })
+        except Exception:
+            continue
+    return jsonify({'events': events})
+
+
+@app.errorhandler(Exception)
+async def handle_exception(e):
+    from werkzeug.exceptions import HTTPException
+    if isinstance(e, HTTPException):
+        return jsonify({'error': e.description}), e.code
+    app.logger.exception('Unhandled error')
+    return jsonify({'error': 'Internal server error.'}), 500
+
+
+if __name__ == '__main__':
+    app.run(port=8000)
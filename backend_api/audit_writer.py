@@ -0,0 +1,102 @@
+"""
+backend_api/audit_writer.py
+---------------------------
+Background writer for the analysis audit log.
+Request threads enqueue log entries; a single writer thread inserts them in
+batches so a slow database never holds up /api/analyze. `drain()` flushes the
+queue on shutdown.
+"""
+
+import atexit
+import os
+import queue
+import threading
+
+
+class AuditWriter:
+    """
+    Queue-backed batch writer.
+
+    Args:
+        write_batch (callable): Receives a list of entries and persists them.
+        max_queue (int): Queue capacity; when full, entries are written inline.
+        batch_size (int): Maximum entries per write.
+        flush_interval (float): Seconds to wait for more entries before writing a partial batch.
+    """
+
+    def __init__(self, write_batch, max_queue=10000, batch_size=100, flush_interval=0.5):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        atexit.register(self.drain)
+
+    def _ensure_started(self):
+        # Started lazily so forked workers (gunicorn --preload) each get their own thread
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._stopping.clear()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, entry):
+        """Queue one entry for writing."""
+        if self._stopping.is_set():
+            self._write([entry])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._write([entry])
+
+    def qsize(self):
+        """Number of entries waiting to be written."""
+        return self._queue.qsize()
+
+    def _write(self, batch):
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            print(f"[LOG] Failed to write {len(batch)} audit entries: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def drain(self, timeout=10.0):
+        """Stop accepting queued work and flush everything still pending."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            thread.join(timeout)
+        # Anything left (writer never started, or timed out) is written inline
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._write(pending)
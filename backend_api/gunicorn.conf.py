@@ -0,0 +1,38 @@
+"""
+backend_api/gunicorn.conf.py
+----------------------------
+Gunicorn settings for the DevShield-AI backend. Every value can be tuned
+through an environment variable so deployments don't need to edit this file.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('DEVSHIELD_BIND', '0.0.0.0:8000')
+
+# Workers/threads: gthread workers let slow requests (LLM calls, DB) overlap inside a process
+workers = int(os.environ.get('DEVSHIELD_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('DEVSHIELD_THREADS', 4))
+worker_class = os.environ.get('DEVSHIELD_WORKER_CLASS', 'gthread')
+
+# Keep-alive: clients (extensions, dashboard proxy) reuse connections between calls
+keepalive = int(os.environ.get('DEVSHIELD_KEEPALIVE', 5))
+timeout = int(os.environ.get('DEVSHIELD_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('DEVSHIELD_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers periodically to bound memory growth (rate limit cache, etc.)
+max_requests = int(os.environ.get('DEVSHIELD_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('DEVSHIELD_MAX_REQUESTS_JITTER', 1000))
+
+accesslog = os.environ.get('DEVSHIELD_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('DEVSHIELD_LOG_LEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """Flush queued audit log entries before a worker exits."""
+    try:
+        from app import audit_writer
+        audit_writer.drain()
+    except Exception as e:
+        server.log.warning(f"[LOG] Failed to drain audit writer: {e}")
@@ -27,6 +27,9 @@ CREATE TABLE IF NOT EXISTS analysis_log (
 )
 ''')
 
+# Timestamp index keeps archive compaction (DELETE ... WHERE timestamp < ?) cheap
+c.execute('CREATE INDEX IF NOT EXISTS idx_analysis_log_timestamp ON analysis_log (timestamp)')
+
 # Insert default admin user if not exists
 c.execute('''
 INSERT OR IGNORE INTO users (username, api_key, role) VALUES (?, ?, ?)''',
@@ -0,0 +1,93 @@
+"""
+backend_api/loadtest.py
+-----------------------
+Tiny closed-loop load generator for comparing serving modes.
+Spawns N client threads that hammer one endpoint with keep-alive
+connections and prints requests/sec and latency percentiles.
+
+    python loadtest.py --url http://localhost:8000/api/analyze --clients 32 --duration 20
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+SAMPLE_BODY = {
+    'pattern_type': 'API Key',
+    'variable_name': 'API_KEY',
+    'filename': 'config.py',
+    'line': 42,
+    'file_type': 'py',
+    'entropy': 4.7
+}
+
+
+def _client(url, api_key, deadline, latencies, errors, lock):
+    parsed = urlparse(url)
+    body = json.dumps(SAMPLE_BODY)
+    headers = {'Content-Type': 'application/json', 'X-API-Key': api_key, 'Connection': 'keep-alive'}
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    local_lat, local_err = [], 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('POST', parsed.path or '/', body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 400 and resp.status != 429:
+                local_err += 1
+            local_lat.append(time.perf_counter() - start)
+        except Exception:
+            local_err += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    conn.close()
+    with lock:
+        latencies.extend(local_lat)
+        errors[0] += local_err
+
+
+def run(url, api_key, clients, duration):
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=_client, args=(url, api_key, deadline, latencies, errors, lock))
+               for _ in range(clients)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        'url': url,
+        'clients': clients,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(pct(0.50), 2),
+        'p95_ms': round(pct(0.95), 2),
+        'p99_ms': round(pct(0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DevShield backend load generator")
+    parser.add_argument('--url', default='http://localhost:8000/api/analyze')
+    parser.add_argument('--api-key', default='devshield-demo-key')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.url, args.api_key, args.clients, args.duration), indent=2))
+
+
+if __name__ == '__main__':
+    main()
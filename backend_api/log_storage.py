@@ -0,0 +1,304 @@
+"""
+backend_api/log_storage.py
+--------------------------
+Storage backends for the analysis audit log.
+
+Hot tier: the `analysis_log` table (SQLite or DEVSHIELD_DB_URL), holding the
+last DEVSHIELD_LOG_HOT_DAYS days. Older rows are compacted into day-partitioned
+columnar files (Parquet when pyarrow is installed, gzip'd JSON columns
+otherwise) under DEVSHIELD_LOG_ARCHIVE_DIR. Reads go through the tiered store
+and span both tiers; date filters skip partitions outside the range.
+
+Entries are dicts: {'timestamp': iso str, 'request': json str, 'response': json str}.
+"""
+
+import glob
+import gzip
+import os
+import time
+from datetime import datetime, timedelta
+
+from serialization import dumps_bytes, loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+COLUMNS = ('timestamp', 'request', 'response')
+HOT_DAYS = int(os.environ.get('DEVSHIELD_LOG_HOT_DAYS', 30))
+ARCHIVE_DIR = os.environ.get('DEVSHIELD_LOG_ARCHIVE_DIR',
+                             os.path.join(os.path.dirname(__file__), 'log_archive'))
+ARCHIVE_FORMAT = os.environ.get('DEVSHIELD_LOG_ARCHIVE_FORMAT', 'auto')  # auto | parquet | json
+COMPACT_INTERVAL = int(os.environ.get('DEVSHIELD_LOG_COMPACT_INTERVAL', 3600))  # seconds
+COMPACT_BATCH = 50000
+LOCK_STALE_SECONDS = 600
+
+
+class SQLiteLogStore:
+    """
+    Hot tier backed by the analysis_log table. `get_db` returns a DB-API connection.
+    `dialect` is 'sqlite' or 'mssql' (SQL Server via pyodbc, which has no LIMIT clause).
+    """
+
+    def __init__(self, get_db, dialect='sqlite'):
+        if dialect not in ('sqlite', 'mssql'):
+            raise ValueError(f'unsupported SQL dialect: {dialect}')
+        self.get_db = get_db
+        self.dialect = dialect
+
+    def _limit(self):
+        """Row limit clause appended after ORDER BY, with one `?` parameter."""
+        return ' OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY' if self.dialect == 'mssql' else ' LIMIT ?'
+
+    def append_many(self, entries):
+        conn = self.get_db()
+        try:
+            conn.executemany('INSERT INTO analysis_log (timestamp, request, response) VALUES (?, ?, ?)',
+                             [(e['timestamp'], e['request'], e['response']) for e in entries])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def iter_entries(self, since=None, until=None, newest_first=False, limit=None):
+        query = 'SELECT timestamp, request, response FROM analysis_log'
+        clauses, params = [], []
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY id DESC' if newest_first else ' ORDER BY id'
+        if limit:
+            query += self._limit()
+            params.append(int(limit))
+        conn = self.get_db()
+        try:
+            for row in conn.execute(query, params):
+                yield {'timestamp': row[0], 'request': row[1], 'response': row[2]}
+        finally:
+            conn.close()
+
+    def fetch_older_than(self, cutoff, limit=COMPACT_BATCH):
+        """Return the oldest rows (id, timestamp, request, response) with timestamp < cutoff."""
+        conn = self.get_db()
+        try:
+            rows = conn.execute('SELECT id, timestamp, request, response FROM analysis_log '
+                                'WHERE timestamp < ? ORDER BY id' + self._limit(), (cutoff, limit)).fetchall()
+        finally:
+            conn.close()
+        return [(r[0], r[1], r[2], r[3]) for r in rows]
+
+    def delete_ids_upto(self, cutoff, max_id):
+        conn = self.get_db()
+        try:
+            conn.execute('DELETE FROM analysis_log WHERE timestamp < ? AND id <= ?', (cutoff, max_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class ColumnarArchive:
+    """
+    Cold tier: <root>/date=YYYY-MM-DD/part-<first_id>-<last_id>.<ext>.
+    Part names are derived from row ids, so re-running an interrupted
+    compaction overwrites the same part instead of duplicating it.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, fmt=ARCHIVE_FORMAT):
+        self.root = root
+        if fmt == 'auto':
+            fmt = 'parquet' if pq is not None else 'json'
+        if fmt == 'parquet' and pq is None:
+            raise RuntimeError('Parquet archive requires pyarrow (pip install pyarrow).')
+        self.fmt = fmt
+
+    @staticmethod
+    def _part_key(path):
+        name = os.path.basename(path).split('.')[0]  # part-<first>-<last>
+        return int(name.split('-')[1])
+
+    def write_partition(self, day, rows):
+        """Write rows [(id, timestamp, request, response), ...] of one day as a part file."""
+        part_dir = os.path.join(self.root, f'date={day}')
+        os.makedirs(part_dir, exist_ok=True)
+        ext = 'parquet' if self.fmt == 'parquet' else 'cols.json.gz'
+        path = os.path.join(part_dir, f'part-{rows[0][0]}-{rows[-1][0]}.{ext}')
+        columns = {name: [r[i + 1] for r in rows] for i, name in enumerate(COLUMNS)}
+        tmp = path + '.tmp'
+        if self.fmt == 'parquet':
+            pq.write_table(pa.table(columns), tmp, compression='zstd')
+        else:
+            with gzip.open(tmp, 'wb') as f:
+                f.write(dumps_bytes({'rows': len(rows), 'columns': columns}))
+        os.replace(tmp, path)
+        return path
+
+    def _read_part(self, path):
+        if path.endswith('.parquet'):
+            if pq is None:
+                raise RuntimeError(f'Cannot read {path}: pyarrow is not installed.')
+            columns = pq.read_table(path, columns=list(COLUMNS)).to_pydict()
+        else:
+            with gzip.open(path, 'rb') as f:
+                columns = loads(f.read())['columns']
+        return columns
+
+    def partitions(self, since=None, until=None):
+        """Partition days within [since, until), oldest first (partition pruning)."""
+        days = sorted(os.path.basename(p)[5:] for p in glob.glob(os.path.join(self.root, 'date=*')))
+        if since:
+            days = [d for d in days if d >= since[:10]]
+        if until:
+            days = [d for d in days if d <= until[:10]]
+        return days
+
+    def iter_entries(self, since=None, until=None, newest_first=False):
+        days = self.partitions(since, until)
+        if newest_first:
+            days.reverse()
+        for day in days:
+            parts = [p for p in glob.glob(os.path.join(self.root, f'date={day}', 'part-*'))
+                     if not p.endswith('.tmp')]
+            parts.sort(key=self._part_key, reverse=newest_first)
+            for path in parts:
+                try:
+                    columns = self._read_part(path)
+                except Exception as e:
+                    print(f"[LOG] Failed to read archive part {path}: {e}")
+                    continue
+                indexes = range(len(columns['timestamp']))
+                if newest_first:
+                    indexes = reversed(indexes)
+                for i in indexes:
+                    ts = columns['timestamp'][i]
+                    if (since and ts < since) or (until and ts >= until):
+                        continue
+                    yield {'timestamp': ts, 'request': columns['request'][i], 'response': columns['response'][i]}
+
+
+class TieredLogStore:
+    """Hot SQLite tier plus columnar archive, queried as one log."""
+
+    def __init__(self, hot, archive, hot_days=HOT_DAYS, compact_interval=COMPACT_INTERVAL):
+        self.hot = hot
+        self.archive = archive
+        self.hot_days = hot_days
+        self.compact_interval = compact_interval
+        self._last_compact = None
+
+    def append_many(self, entries):
+        self.hot.append_many(entries)
+        self.maybe_compact()
+
+    def iter_entries(self, since=None, until=None, newest_first=False, limit=None):
+        """Entries across both tiers, oldest first unless newest_first."""
+        count = 0
+        tiers = ([self.hot.iter_entries(since, until, newest_first=True), self.archive.iter_entries(since, until, True)]
+                 if newest_first else
+                 [self.archive.iter_entries(since, until), self.hot.iter_entries(since, until)])
+        for tier in tiers:
+            for entry in tier:
+                yield entry
+                count += 1
+                if limit and count >= limit:
+                    tier.close()
+                    return
+
+    def maybe_compact(self):
+        if self.hot_days <= 0:
+            return 0
+        if self._last_compact is not None and time.monotonic() - self._last_compact < self.compact_interval:
+            return 0
+        self._last_compact = time.monotonic()
+        try:
+            return self.compact()
+        except Exception as e:
+            print(f"[LOG] Compaction failed: {e}")
+            return 0
+
+    def compact(self, hot_days=None):
+        """Move rows older than hot_days into the archive. Returns rows moved."""
+        hot_days = self.hot_days if hot_days is None else hot_days
+        cutoff = (datetime.utcnow() - timedelta(days=hot_days)).isoformat()
+        os.makedirs(self.archive.root, exist_ok=True)
+        lock_path = os.path.join(self.archive.root, '.compact.lock')
+        if not _acquire_lock(lock_path):
+            return 0
+        moved = 0
+        try:
+            while True:
+                rows = self.hot.fetch_older_than(cutoff)
+                if not rows:
+                    break
+                by_day = {}
+                for row in rows:
+                    by_day.setdefault(row[1][:10], []).append(row)
+                for day, day_rows in by_day.items():
+                    self.archive.write_partition(day, day_rows)
+                self.hot.delete_ids_upto(cutoff, rows[-1][0])
+                moved += len(rows)
+        finally:
+            _release_lock(lock_path)
+        return moved
+
+
+def _acquire_lock(path):
+    """Cross-process compaction lock (one compactor across gunicorn workers)."""
+    try:
+        if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+            os.remove(path)
+    except FileNotFoundError:  # no lock, or another worker just cleared the stale one
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+    except FileExistsError:
+        return False
+
+
+def _release_lock(path):
+    """Remove the compaction lock if it is still ours (it may have been taken over as stale)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read().strip() != str(os.getpid()):
+                return
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def summarize(entries, summary=None):
+    """Aggregate entries into dashboard counts (total, by_action, by_pattern)."""
+    summary = summary or {'total_events': 0, 'by_action': {}, 'by_pattern': {}}
+    by_action = summary['by_action']
+    by_pattern = summary['by_pattern']
+    for entry in entries:
+        summary['total_events'] += 1
+        try:
+            response = loads(entry['response'])
+            request = loads(entry['request'])
+        except Exception:
+            continue
+        action = response.get('action', 'unknown')
+        pattern = request.get('pattern_type', 'unknown')
+        by_action[action] = by_action.get(action, 0) + 1
+        by_pattern[pattern] = by_pattern.get(pattern, 0) + 1
+    return summary
+
+
+if __name__ == '__main__':
+    # Manual compaction: python log_storage.py [hot_days]
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+    from app import get_db, log_dialect
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else HOT_DAYS
+    store = TieredLogStore(SQLiteLogStore(get_db, dialect=log_dialect), ColumnarArchive())
+    print(f"Archived {store.compact(days)} rows older than {days} days.")
@@ -0,0 +1,160 @@
+"""
+backend_api/metrics.py
+----------------------
+Minimal Prometheus-style instrumentation for the backend.
+Counters, gauges and fixed-bucket histograms kept in process memory and
+rendered in the Prometheus text exposition format on /metrics.
+
+Recording is a dict lookup, a bisect and a few additions under a lock,
+so it is cheap enough to leave on in production. Metrics are per process:
+under gunicorn each worker reports its own values (scrape every worker or
+aggregate with labels).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _escape_label(value):
+    """Label value escaping from the text exposition format: backslash, double quote, newline."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{_escape_label(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for key, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {value}')
+        return lines
+
+
+class Gauge:
+    """Gauge that is either set directly or read from a callback at scrape time."""
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.callback = callback
+        self._values = {}
+        _registry.append(self)
+
+    def set(self, value, *label_values):
+        with _lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values[()] = self.callback()
+            except Exception:
+                pass
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value, *label_values):
+        idx = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        label_names = self.labels + ('le',)
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(label_names, key + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+def render_latest():
+    """All registered metrics in Prometheus text format."""
+    with _lock:
+        lines = []
+        for metric in _registry:
+            lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# --- DevShield metrics ---
+REQUEST_DURATION = Histogram('devshield_request_duration_seconds', 'HTTP request duration by endpoint.',
+                             labels=('endpoint', 'method', 'status'))
+REQUESTS_IN_FLIGHT = Gauge('devshield_requests_in_flight', 'Requests currently being handled.')
+STAGE_DURATION = Histogram('devshield_stage_duration_seconds', 'Duration of analyze pipeline stages.',
+                           labels=('stage',))
+RATE_LIMITED = Counter('devshield_rate_limit_rejections_total', 'Requests rejected by the rate limiter.',
+                       labels=('endpoint',))
+DB_CONNECTIONS = Counter('devshield_db_connections_opened_total', 'Database connections opened.')
+DB_CONNECTIONS_OPEN = Gauge('devshield_db_connections_open', 'Database connections currently open.')
+AUDIT_QUEUE_DEPTH = Gauge('devshield_audit_queue_depth', 'Audit log entries waiting to be written.')
+LLM_DURATION = Histogram('devshield_llm_request_duration_seconds', 'Azure OpenAI call latency.',
+                         buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+LLM_ERRORS = Counter('devshield_llm_errors_total', 'Failed Azure OpenAI calls.')
+
+
+def stage(name):
+    """Context manager timing one pipeline stage."""
+    return STAGE_DURATION.time(name)
+
+
+def observe_llm_call(duration, error):
+    """Observer for ai_interface LLM calls."""
+    LLM_DURATION.observe(duration)
+    if error is not None:
+        LLM_ERRORS.inc()
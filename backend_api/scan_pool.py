@@ -0,0 +1,150 @@
+"""
+backend_api/scan_pool.py
+------------------------
+Server-side content scanning for POST /api/scan.
+Runs the guard engine (modules/guard/cli_scanner.py, the same patterns,
+prefilter and entropy pass as the CLI and pre-commit hook) in a bounded pool
+of worker processes, so regex work never competes with request threads for
+the GIL and a burst of large uploads queues instead of piling up.
+
+- DEVSHIELD_SCAN_WORKERS:   worker processes (default: min(4, CPU count))
+- DEVSHIELD_SCAN_QUEUE:     files queued or running at once; beyond this /api/scan answers 503
+- DEVSHIELD_SCAN_TIMEOUT:   seconds a request waits for its results (default 30)
+- DEVSHIELD_SCAN_MAX_BYTES: request body limit in bytes (default 5 MB)
+
+Workers are started on first use (forkserver where available, else spawn;
+never fork, the server is multi-threaded by then) and compile the patterns once.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+GUARD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'modules', 'guard'))
+SCAN_WORKERS = int(os.environ.get('DEVSHIELD_SCAN_WORKERS', min(4, os.cpu_count() or 1)))
+SCAN_QUEUE = int(os.environ.get('DEVSHIELD_SCAN_QUEUE', SCAN_WORKERS * 8))
+SCAN_TIMEOUT = float(os.environ.get('DEVSHIELD_SCAN_TIMEOUT', 30))
+MAX_SCAN_BYTES = int(os.environ.get('DEVSHIELD_SCAN_MAX_BYTES', 5 * 1024 * 1024))
+BINARY_SNIFF_BYTES = 8192
+
+
+class ScanQueueFull(Exception):
+    """Raised when the pool already holds SCAN_QUEUE files."""
+
+
+def _init_worker():
+    sys.path.insert(0, GUARD_DIR)
+    import cli_scanner
+    cli_scanner.get_compiled_patterns()
+
+
+def scan_content(filename, data):
+    """
+    Worker task: scan one file's bytes. Archives (.zip, .jar, .tar.gz, ...) are
+    scanned member by member; other binary content (a NUL byte in the first
+    8 KB, as git decides) is skipped rather than decoded. The server's own fingerprint
+    store and any baseline file in its working directory are ignored: what one operator
+    acknowledged locally must not hide a secret from every API client.
+    Returns {'file', 'findings': [dict, ...]} or {'file', 'skipped': reason}.
+    """
+    import io
+    from archive_scan import is_archive, scan_archive
+    from baseline import Baseline
+    baseline = Baseline()  # empty
+    if is_archive(filename):
+        found = scan_archive(io.BytesIO(data), filename, baseline=baseline, suppress=False)
+        return {'file': filename, 'findings': [f.to_dict() for f in found]}
+    if b'\0' in data[:BINARY_SNIFF_BYTES]:
+        return {'file': filename, 'skipped': 'binary'}
+    import cli_scanner
+    lines = io.StringIO(data.decode('utf-8', errors='ignore'))
+    found = cli_scanner.scan_lines(lines, filename, baseline=baseline, suppress=False)
+    return {'file': filename, 'findings': [f.to_dict() for f in found]}
+
+
+class ScanPool:
+    """
+    Process pool with a hard bound on outstanding work.
+
+    Args:
+        workers (int): Worker processes.
+        max_pending (int): Files queued or running at once; scan() raises ScanQueueFull beyond this.
+    """
+
+    def __init__(self, workers=SCAN_WORKERS, max_pending=SCAN_QUEUE):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            # Recreated after a fork (gunicorn --preload) or if a worker died
+            if self._executor is None or self._pid != os.getpid():
+                import multiprocessing
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method),
+                                                     initializer=_init_worker)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _reset(self, executor):
+        if executor is None:
+            return
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, filename, data):
+        if not self._slots.acquire(blocking=False):
+            raise ScanQueueFull()
+        for attempt in (1, 2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(scan_content, filename, data)
+                break
+            except BrokenProcessPool:
+                self._reset(executor)
+                if attempt == 2:
+                    self._slots.release()
+                    raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def scan(self, files, timeout=SCAN_TIMEOUT):
+        """
+        Scan [(filename, bytes), ...] and return one result per file, in order.
+        Raises ScanQueueFull if the pool is saturated and TimeoutError if results
+        take longer than `timeout`; nothing from the request is left queued either way.
+        """
+        futures = []
+        try:
+            for filename, data in files:
+                futures.append(self._submit(filename, data))
+            done, pending = wait(futures, timeout=timeout)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        if pending:
+            for future in pending:
+                future.cancel()
+            raise TimeoutError(f'Scan did not finish within {timeout:g}s.')
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            self._reset(self._executor)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+pool = ScanPool()
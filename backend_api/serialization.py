@@ -0,0 +1,190 @@
+"""
+backend_api/serialization.py
+----------------------------
+One JSON/MessagePack layer for the backend: request bodies and responses
+(via the Flask/Quart JSON provider), analysis log encoding, the log archive,
+export and dashboard decoding all go through `dumps`/`loads` here.
+
+JSON backend, fastest available first (DEVSHIELD_JSON_BACKEND=auto|orjson|msgspec|json):
+- orjson  (pip install orjson)
+- msgspec (pip install msgspec)
+- json    (stdlib fallback, always available)
+
+All backends produce standard JSON that any other backend can read.
+Values they can't encode natively (Decimal, set, objects with to_dict())
+go through `_default`. NaN and Infinity encode as null with every backend.
+If the fast encoder rejects a value (e.g. an int beyond 64 bits), or the
+fast decoder rejects stdlib-only input (NaN in old log rows), the stdlib is
+used for that call.
+
+MessagePack (application/msgpack) is an optional wire format for the batch
+endpoints, via msgspec or the msgpack package. `MSGPACK_AVAILABLE` is False
+when neither is installed.
+"""
+
+import json
+import math
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+JSON_BACKEND = os.environ.get('DEVSHIELD_JSON_BACKEND', 'auto')
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+
+def _default(obj):
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _finite(obj):
+    """Copy of obj with NaN/Infinity replaced by None, as orjson and msgspec encode them."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _stdlib_dumps(obj):
+    try:
+        return json.dumps(obj, default=_default, separators=(',', ':'), allow_nan=False)
+    except ValueError as e:
+        if 'Out of range float' not in str(e):
+            raise
+    # Non-finite float somewhere (possibly inside a _default result): encode it as null, like orjson
+    return json.dumps(_finite(obj), default=lambda o: _finite(_default(o)), separators=(',', ':'),
+                      allow_nan=False)
+
+
+def _load_backend(name):
+    """Returns (name, encode -> bytes, decode, decode errors)."""
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+            options = orjson.OPT_NON_STR_KEYS
+            return ('orjson', lambda obj: orjson.dumps(obj, default=_default, option=options),
+                    orjson.loads, (orjson.JSONDecodeError,))
+        except ImportError:
+            if name == 'orjson':
+                raise
+    if name in ('auto', 'msgspec'):
+        try:
+            import msgspec
+            encoder = msgspec.json.Encoder(enc_hook=_default)
+            return 'msgspec', encoder.encode, msgspec.json.decode, (msgspec.DecodeError,)
+        except ImportError:
+            if name == 'msgspec':
+                raise
+    return 'json', lambda obj: _stdlib_dumps(obj).encode('utf-8'), json.loads, (ValueError,)
+
+
+BACKEND, _encode, _decode, _DECODE_ERRORS = _load_backend(JSON_BACKEND)
+
+
+def dumps_bytes(obj):
+    """Compact JSON as UTF-8 bytes."""
+    try:
+        return _encode(obj)
+    except TypeError:
+        if BACKEND == 'json':
+            raise
+        return _stdlib_dumps(obj).encode('utf-8')
+
+
+def dumps(obj):
+    """Compact JSON as str (e.g. for the analysis_log request/response columns)."""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from str or bytes. Raises ValueError on invalid input."""
+    try:
+        return _decode(data)
+    except _DECODE_ERRORS:
+        if BACKEND == 'json':
+            raise
+        return json.loads(data)
+
+
+# --- MessagePack (optional) ---
+
+def _load_msgpack():
+    try:
+        import msgspec
+        encoder = msgspec.msgpack.Encoder(enc_hook=_default)
+        return encoder.encode, msgspec.msgpack.decode, (msgspec.DecodeError,)
+    except ImportError:
+        pass
+    try:
+        import msgpack
+        return (lambda obj: msgpack.packb(obj, default=_default, use_bin_type=True),
+                lambda data: msgpack.unpackb(data, raw=False),
+                (ValueError, msgpack.UnpackException))
+    except ImportError:
+        return None, None, ()
+
+
+_packb, _unpackb, _UNPACK_ERRORS = _load_msgpack()
+MSGPACK_AVAILABLE = _packb is not None
+
+
+def is_msgpack(mimetype):
+    return mimetype in MSGPACK_MIMETYPES
+
+
+def wants_msgpack(accept_mimetypes):
+    """True if the client's Accept header prefers MessagePack over JSON (and it is available)."""
+    return MSGPACK_AVAILABLE and accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+def packb(obj):
+    if not MSGPACK_AVAILABLE:
+        raise RuntimeError('MessagePack support requires msgspec or msgpack (pip install msgpack).')
+    return _packb(obj)
+
+
+def unpackb(data):
+    """Decode a MessagePack body. Raises ValueError on invalid input."""
+    if not MSGPACK_AVAILABLE:
+        raise RuntimeError('MessagePack support requires msgspec or msgpack (pip install msgpack).')
+    try:
+        return _unpackb(data)
+    except _UNPACK_ERRORS as e:
+        raise ValueError(f'Invalid MessagePack body: {e}') from e
+
+
+# --- Flask / Quart JSON provider ---
+
+class _FastJSONMixin:
+    """Routes the provider's dumps/loads through this module; pretty-printing stays on the stdlib."""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent') is not None or set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+
+def install_json_provider(app):
+    """Use the fast serializer for jsonify() and request.get_json() on a Flask or Quart app."""
+    base = type(app.json)
+    provider_class = type(f'Fast{base.__name__}', (_FastJSONMixin, base), {})
+    app.json = provider_class(app)
+    return app.json
@@ -0,0 +1,16 @@
+"""
+backend_api/wsgi.py
+-------------------
+Production WSGI entry point for the DevShield-AI backend.
+
+    gunicorn -c backend_api/gunicorn.conf.py backend_api.wsgi:app
+    waitress-serve --port=8000 --threads=8 backend_api.wsgi:app
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app import configure_app
+
+app = configure_app()
@@ -0,0 +1,153 @@
+"""
+benchmarks/corpus.py
+--------------------
+Deterministic synthetic corpus for DevShield benchmarks.
+The same seed always produces byte-identical files, so timings are
+comparable across runs and machines.
+
+Generated (under the target directory):
+- src/*.py, src/*.js, config/*.env : source files with planted secrets
+- dist/*.min.js                    : minified JS (very long single lines)
+- package-lock.json                : large lockfile with integrity hashes
+- blobs/*.bin                      : binary blobs
+"""
+
+import json
+import os
+import random
+import string
+
+ALNUM = string.ascii_letters + string.digits
+B64 = ALNUM + '+/'
+
+
+def _rand(rng, alphabet, n):
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+def planted_secret(rng, kind):
+    """Return one source line containing a fake secret of the given kind."""
+    if kind == 'api_key':
+        return f'API_KEY = "{_rand(rng, ALNUM, 32)}"'
+    if kind == 'password':
+        return f'db_password = "{_rand(rng, ALNUM, 14)}"'
+    if kind == 'aws':
+        # Prefix assembled at runtime so this file does not trip the scanner itself
+        return f'aws_id = "{"AK" + "IA"}{_rand(rng, string.ascii_uppercase + string.digits, 16)}"'
+    if kind == 'google':
+        return f'maps_key = "{"AI" + "za"}{_rand(rng, ALNUM + "-_", 35)}"'
+    if kind == 'jwt':
+        return f'token = "{"ey" + "J"}{_rand(rng, ALNUM, 30)}.{_rand(rng, ALNUM, 60)}.{_rand(rng, ALNUM, 40)}"'
+    if kind == 'slack':
+        return f'SLACK = "{"xo" + "xb"}-{_rand(rng, ALNUM, 40)}"'
+    return f'client_secret = "{_rand(rng, ALNUM, 24)}"'
+
+
+SECRET_KINDS = ['api_key', 'password', 'aws', 'google', 'jwt', 'slack', 'client_secret']
+
+PY_LINES = [
+    'def handler(event, context):',
+    '    result = compute(event["payload"], retries=3)',
+    '    logger.info("processed %s items", len(result))',
+    '    return {"status": "ok", "count": len(result)}',
+    'class Settings(BaseModel):',
+    '    timeout: int = 30',
+    '    region: str = os.environ.get("REGION", "eu-west-1")',
+    '# TODO: move retries into configuration',
+    'import os, sys, json',
+    '',
+]
+
+JS_LINES = [
+    'const express = require("express");',
+    'app.get("/api/items", async (req, res) => {',
+    '  const items = await db.collection("items").find({}).toArray();',
+    '  res.json({ items, total: items.length });',
+    '});',
+    'export function debounce(fn, ms) { let t; return (...a) => { clearTimeout(t); t = setTimeout(() => fn(...a), ms); }; }',
+    '',
+]
+
+
+def _source_file(rng, lines_pool, n_lines, secret_rate):
+    out = []
+    for _ in range(n_lines):
+        if rng.random() < secret_rate:
+            out.append(planted_secret(rng, rng.choice(SECRET_KINDS)))
+        else:
+            out.append(rng.choice(lines_pool))
+    return '\n'.join(out) + '\n'
+
+
+def _minified_js(rng, size):
+    parts = []
+    total = 0
+    while total < size:
+        ident = _rand(rng, string.ascii_letters, rng.randint(1, 3))
+        chunk = rng.choice([
+            f'var {ident}=function(a,b){{return a+b}};',
+            f'{ident}.prototype.x=function(){{this.v=[1,2,3].map(function(e){{return e*2}})}};',
+            f'if({ident}&&{ident}.length>0){{{ident}=null}}',
+            f'"{_rand(rng, ALNUM, 24)}"',
+        ])
+        parts.append(chunk)
+        total += len(chunk)
+    if rng.random() < 0.5:
+        parts.insert(len(parts) // 2, 'var ' + planted_secret(rng, 'api_key') + ';')
+    return ''.join(parts) + '\n'
+
+
+def _lockfile(rng, n_packages):
+    packages = {}
+    for i in range(n_packages):
+        name = f'pkg-{_rand(rng, string.ascii_lowercase, 8)}-{i}'
+        packages[f'node_modules/{name}'] = {
+            'version': f'{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 50)}',
+            'resolved': f'https://registry.npmjs.org/{name}/-/{name}-1.0.0.tgz',
+            'integrity': 'sha512-' + _rand(rng, B64, 86) + '==',
+            'dev': rng.random() < 0.3,
+        }
+    return json.dumps({'name': 'bench', 'lockfileVersion': 3, 'packages': packages}, indent=2)
+
+
+def generate_corpus(root, seed=1337, scale=1.0):
+    """
+    Write the corpus into `root`. `scale` multiplies file counts and sizes.
+    Returns {'files': [paths], 'bytes': total_bytes, 'by_kind': {kind: [paths]}}.
+    """
+    rng = random.Random(seed)
+    by_kind = {'source': [], 'minified': [], 'lockfile': [], 'binary': []}
+
+    def write(rel, data, kind):
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = 'wb' if isinstance(data, bytes) else 'w'
+        with open(path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8', 'newline': '\n'})) as f:
+            f.write(data)
+        by_kind[kind].append(path)
+
+    n_src = max(1, int(40 * scale))
+    for i in range(n_src):
+        write(f'src/module_{i}.py', _source_file(rng, PY_LINES, 400, 0.01), 'source')
+        write(f'src/component_{i}.js', _source_file(rng, JS_LINES, 300, 0.01), 'source')
+    for i in range(max(1, int(5 * scale))):
+        write(f'config/service_{i}.env', _source_file(rng, ['DEBUG=false', 'PORT=8080', ''], 40, 0.2), 'source')
+    for i in range(max(1, int(4 * scale))):
+        write(f'dist/bundle_{i}.min.js', _minified_js(rng, 200_000), 'minified')
+    write('package-lock.json', _lockfile(rng, max(1, int(3000 * scale))), 'lockfile')
+    for i in range(max(1, int(4 * scale))):
+        write(f'blobs/blob_{i}.bin', rng.randbytes(256 * 1024), 'binary')
+
+    files = [p for paths in by_kind.values() for p in paths]
+    return {'files': files, 'bytes': sum(os.path.getsize(p) for p in files), 'by_kind': by_kind}
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the DevShield benchmark corpus")
+    parser.add_argument('output', help='Directory to write the corpus into')
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--scale', type=float, default=1.0)
+    args = parser.parse_args()
+    info = generate_corpus(args.output, args.seed, args.scale)
+    print(f"Wrote {len(info['files'])} files ({info['bytes']} bytes) to {args.output}")
@@ -0,0 +1,312 @@
+"""
+benchmarks/run_benchmarks.py
+----------------------------
+Benchmark suite for the guard scanner, the risk engine and the backend.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --fail-on-regression
+
+Results are JSON (one entry per benchmark with min/median/mean seconds and
+throughput). With --baseline, medians are compared and anything slower than
+--threshold (default 10%) is reported as a regression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'modules', 'guard'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_corpus
+
+
+def bench(name, fn, repeat, ops=1, unit='ops', nbytes=None):
+    """Run fn() `repeat` times; return timing stats. `ops`/`nbytes` are per run."""
+    fn()  # warm-up (imports, regex compilation, caches)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize_times(name, times, ops, unit, nbytes)
+
+
+def summarize_times(name, times, ops=1, unit='ops', nbytes=None):
+    """Timing stats for a list of per-run durations (seconds)."""
+    repeat = len(times)
+    median = statistics.median(times)
+    result = {
+        'name': name,
+        'repeat': repeat,
+        'min_s': min(times),
+        'median_s': median,
+        'mean_s': statistics.fmean(times),
+        'ops': ops,
+        'unit': unit,
+        'ops_per_s': ops / median if median else None,
+    }
+    if nbytes is not None:
+        result['bytes'] = nbytes
+        result['mb_per_s'] = nbytes / median / 1e6 if median else None
+    print(f"  {name:<24} median {median * 1000:9.2f} ms  ({result['ops_per_s']:.0f} {unit}/s)", file=sys.stderr)
+    return result
+
+
+def scanner_benchmarks(corpus, repeat):
+    from cli_scanner import scan_file_for_secrets
+    results = []
+    for kind, paths in corpus['by_kind'].items():
+        nbytes = sum(os.path.getsize(p) for p in paths)
+
+        def run(paths=paths):
+            for p in paths:
+                scan_file_for_secrets(p)
+        results.append(bench(f'scan_{kind}', run, repeat, ops=len(paths), unit='files', nbytes=nbytes))
+    return results
+
+
+def entropy_benchmark(repeat, seed):
+    from cli_scanner import calculate_shannon_entropy
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '-_='
+    words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(16, 64))) for _ in range(10000)]
+
+    def run():
+        for w in words:
+            calculate_shannon_entropy(w)
+    return [bench('entropy', run, repeat, ops=len(words), unit='strings')]
+
+
+def risk_benchmark(repeat, seed):
+    from modules.ai_engine.risk_scoring import calculate_risk_score
+    rng = random.Random(seed)
+    types = ['API Key', 'Token', 'Password', 'JWT', 'AWS Secret Access Key', 'High-entropy string', 'Other']
+    metas = [{
+        'pattern_type': rng.choice(types),
+        'variable_name': rng.choice(['API_KEY', 'db_password', 'foo', 'SECRET', 'config']),
+        'file_type': rng.choice(['py', 'env', 'json', 'js']),
+        'entropy': rng.uniform(2.0, 6.0),
+    } for _ in range(10000)]
+
+    def run():
+        for m in metas:
+            calculate_risk_score(m)
+    return [bench('risk_score', run, repeat, ops=len(metas), unit='findings')]
+
+
+def policy_benchmark(repeat, seed, rule_count=5000, findings_count=10000):
+    """Compiled policy engine: thousands of type/path/variable/risk rules, evaluated in bulk."""
+    from modules.education.policy_rules import PolicyEngine
+    rng = random.Random(seed)
+    types = [f'Type {i}' for i in range(40)] + ['API Key', 'Token', 'Password', 'Secret Key']
+    dirs = ['src', 'lib', 'tests', 'docs', 'scripts', 'config', 'vendor', 'app/api', 'app/models']
+    rules = []
+    for i in range(rule_count):
+        rule = {'id': f'r{i}', 'action': rng.choice(['allow', 'warn', 'block'])}
+        if rng.random() < 0.8:
+            rule['types'] = rng.sample(types, rng.randint(1, 3))
+        if rng.random() < 0.5:
+            rule['paths'] = [f'{rng.choice(dirs)}/m{rng.randrange(200)}/**', f'*.{rng.choice(["py", "js", "env", "yml"])}{i}']
+        if rng.random() < 0.4:
+            rule['variables'] = [f'^{rng.choice(["PROD", "TEST", "CI", "DEV"])}_{rng.randrange(300)}_']
+        if rng.random() < 0.3:
+            rule['min_risk'] = rng.randrange(0, 90)
+        rules.append(rule)
+    config = {'block_types': ['Password'], 'warn_types': ['Token'], 'severity_thresholds': {'block': 90, 'warn': 60},
+              'rules': rules}
+    files = [f'{rng.choice(dirs)}/m{rng.randrange(200)}/f{j}.py' for j in range(500)]
+    findings = [{
+        'secret_type': rng.choice(types),
+        'file': rng.choice(files),
+        'variable': f'{rng.choice(["PROD", "TEST", "CI", "DEV"])}_{rng.randrange(300)}_KEY',
+        'risk_score': rng.randrange(101),
+    } for _ in range(findings_count)]
+
+    results = [bench(f'policy_compile_{rule_count}', lambda: PolicyEngine(config), repeat, ops=rule_count, unit='rules')]
+    engine = PolicyEngine(config)
+    results.append(bench(f'policy_eval_{rule_count}', lambda: engine.evaluate_many(findings), repeat,
+                         ops=findings_count, unit='findings'))
+
+    def cold():
+        # Fresh engine per run: every distinct path and variable goes through the combined regexes once
+        PolicyEngine(config).evaluate_many(findings)
+    results.append(bench(f'policy_eval_cold_{rule_count}', cold, repeat, ops=findings_count, unit='findings'))
+    return results
+
+
+def analyze_benchmark(repeat, workdir, requests_per_run=500):
+    """End-to-end /api/analyze through the Flask test client against a throwaway DB."""
+    import contextlib
+    import runpy
+    os.environ['DEVSHIELD_DB_PATH'] = os.path.join(workdir, 'devshield.db')
+    os.environ['DEVSHIELD_LOG_ARCHIVE_DIR'] = os.path.join(workdir, 'log_archive')
+    os.environ['DEVSHIELD_RATE_LIMIT'] = str(10 ** 9)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            runpy.run_path(os.path.join(ROOT, 'backend_api', 'init_db.py'))
+    finally:
+        os.chdir(cwd)
+    sys.path.insert(0, os.path.join(ROOT, 'backend_api'))
+    import app as backend
+    client = backend.app.test_client()
+    headers = {'X-API-Key': 'devshield-demo-key'}
+    body = {'pattern_type': 'API Key', 'variable_name': 'API_KEY', 'filename': 'config.py',
+            'line': 42, 'file_type': 'py', 'entropy': 4.7}
+
+    def run():
+        for _ in range(requests_per_run):
+            resp = client.post('/api/analyze', json=body, headers=headers)
+            if resp.status_code != 200:
+                raise RuntimeError(f'/api/analyze returned {resp.status_code}: {resp.data[:200]}')
+    try:
+        return [bench('analyze_e2e', run, repeat, ops=requests_per_run, unit='requests')]
+    finally:
+        backend.audit_writer.drain()
+
+
+def parse_importtime(stderr, after='site'):
+    """
+    Parse `python -X importtime` output into {module: self_us}, keeping only modules
+    imported after `after` completes (interpreter/site start-up is not ours to optimize).
+    """
+    modules, started = {}, after is None
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        if started:
+            modules[name] = int(self_us)
+        elif name == after:
+            started = True
+    return modules
+
+
+def startup_benchmark(repeat, workdir):
+    """
+    Guard start-up cost: import time of the hook (via `python -X importtime`) and the
+    wall time of a full pre-commit hook run on a small staged change, with bare
+    interpreter start-up measured alongside for reference.
+    """
+    guard_dir = os.path.join(ROOT, 'modules', 'guard')
+    repo = os.path.join(workdir, 'startup-repo')
+    os.makedirs(repo)
+    env = dict(os.environ, DEVSHIELD_GUARD_DIR=guard_dir,
+               DEVSHIELD_DAEMON_SOCKET=os.path.join(workdir, 'no-daemon.sock'))
+    subprocess.run(['git', 'init', '-q'], cwd=repo, check=True)
+    with open(os.path.join(repo, 'settings.py'), 'w', encoding='utf-8') as f:
+        f.write('DEBUG = False\nTIMEOUT = 30\n' * 50)
+    subprocess.run(['git', 'add', 'settings.py'], cwd=repo, check=True)
+
+    results = [bench('startup_interpreter', lambda: subprocess.run([sys.executable, '-c', 'pass'], check=True),
+                     repeat, unit='runs')]
+    import_times, imports = [], {}
+    for _ in range(repeat + 1):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import pre_commit_hook, cli_scanner'],
+                              cwd=guard_dir, env=env, capture_output=True, text=True, check=True)
+        imports = parse_importtime(proc.stderr)
+        import_times.append(sum(imports.values()) / 1e6)
+    result = summarize_times('startup_imports', import_times[1:], unit='runs')
+    result['modules'] = dict(sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:15])
+    results.append(result)
+
+    hook = os.path.join(guard_dir, 'pre_commit_hook.py')
+    results.append(bench('startup_hook_e2e', lambda: subprocess.run([sys.executable, hook], cwd=repo, env=env,
+                                                                    capture_output=True, check=True),
+                         repeat, unit='runs'))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Compare medians with a baseline run; returns {name: {...}} and a regression flag."""
+    base = {r['name']: r for r in baseline.get('results', [])}
+    comparison, regressed = {}, False
+    for r in results:
+        b = base.get(r['name'])
+        if not b or not b.get('median_s'):
+            continue
+        ratio = r['median_s'] / b['median_s']
+        status = 'regression' if ratio > 1 + threshold else ('improvement' if ratio < 1 - threshold else 'same')
+        regressed = regressed or status == 'regression'
+        comparison[r['name']] = {'baseline_median_s': b['median_s'], 'median_s': r['median_s'],
+                                 'ratio': round(ratio, 3), 'status': status}
+    return comparison, regressed
+
+
+SUITES = ['scanner', 'entropy', 'risk', 'policy', 'analyze', 'startup']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DevShield benchmark suite")
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', help='Compare against a previous JSON result file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed slowdown vs baseline (0.10 = 10%%)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any benchmark regressed')
+    parser.add_argument('--only', nargs='+', choices=SUITES, help='Run only these suites')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--scale', type=float, default=1.0, help='Corpus size multiplier')
+    args = parser.parse_args()
+    suites = args.only or SUITES
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='devshield-bench-') as workdir:
+        if 'scanner' in suites:
+            corpus = generate_corpus(os.path.join(workdir, 'corpus'), args.seed, args.scale)
+            print(f"Corpus: {len(corpus['files'])} files, {corpus['bytes']} bytes", file=sys.stderr)
+            results += scanner_benchmarks(corpus, args.repeat)
+        if 'entropy' in suites:
+            results += entropy_benchmark(args.repeat, args.seed)
+        if 'risk' in suites:
+            results += risk_benchmark(args.repeat, args.seed)
+        if 'policy' in suites:
+            results += policy_benchmark(args.repeat, args.seed)
+        if 'analyze' in suites:
+            results += analyze_benchmark(args.repeat, workdir)
+        if 'startup' in suites:
+            results += startup_benchmark(args.repeat, workdir)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['comparison'], regressed = compare(results, json.load(f), args.threshold)
+        for name, c in report['comparison'].items():
+            print(f"  {name:<24} x{c['ratio']:.3f} {c['status']}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
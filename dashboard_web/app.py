@@ -1,13 +1,28 @@
 from flask import Flask, render_template, jsonify, redirect, request
+import json
 import sqlite3
+import threading
+import time
 import os
+import sys
 
 app = Flask(__name__)
-DB_PATH = os.path.join(os.path.dirname(__file__), '../backend_api/devshield.db')
+DB_PATH = os.environ.get('DEVSHIELD_DB_PATH', os.path.join(os.path.dirname(__file__), '../backend_api/devshield.db'))
+
+# The analysis log is shared with the backend: recent rows in SQLite, older ones in its columnar archive
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend_api')))
+from log_storage import ColumnarArchive, SQLiteLogStore, TieredLogStore, summarize
+log_store = TieredLogStore(SQLiteLogStore(lambda: sqlite3.connect(DB_PATH, timeout=10)), ColumnarArchive())
+
+_local = threading.local()
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """One SQLite connection per thread, reused across requests."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        _local.conn = conn
     return conn
 
 @app.route('/')
@@ -24,48 +39,111 @@ def policy_page():
 
 # Proxy API endpoints for users and policy (reuse backend API)
 import requests
-BACKEND = 'http://localhost:8000'
+from requests.adapters import HTTPAdapter
+BACKEND = os.environ.get('DEVSHIELD_BACKEND_URL', 'http://localhost:8000')
+BACKEND_HEADERS = {'X-API-Key': 'devshield-demo-key'}
+# (connect, read) seconds; a stuck backend fails the request instead of holding a worker
+BACKEND_TIMEOUT = (float(os.environ.get('DEVSHIELD_BACKEND_CONNECT_TIMEOUT', '2')),
+                   float(os.environ.get('DEVSHIELD_BACKEND_READ_TIMEOUT', '10')))
+PROXY_CACHE_TTL = float(os.environ.get('DEVSHIELD_PROXY_CACHE_TTL', '5'))
+# Hop-by-hop headers, plus the ones requests invalidates by decoding the body
+EXCLUDED_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length',
+                    'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'upgrade'}
+
+# Shared keep-alive connection pool to the backend
+backend = requests.Session()
+backend.headers.update(BACKEND_HEADERS)
+backend.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+backend.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# GET responses: path -> (expires, response tuple); dropped when a POST/DELETE changes the resource
+_proxy_cache = {}
+_proxy_cache_lock = threading.Lock()
+
+def proxy(method, path, **kwargs):
+    """Forward a request to the backend; returns a Flask response tuple (502 if unreachable)."""
+    try:
+        r = backend.request(method, f'{BACKEND}{path}', timeout=BACKEND_TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        return jsonify({'error': f'Backend unavailable: {e.__class__.__name__}'}), 502
+    headers = [(k, v) for k, v in r.headers.items() if k.lower() not in EXCLUDED_HEADERS]
+    return r.content, r.status_code, headers
+
+def cached_get(path):
+    now = time.monotonic()
+    with _proxy_cache_lock:
+        hit = _proxy_cache.get(path)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    result = proxy('GET', path)
+    if PROXY_CACHE_TTL > 0 and result[1] == 200:
+        with _proxy_cache_lock:
+            _proxy_cache[path] = (now + PROXY_CACHE_TTL, result)
+    return result
+
+def invalidate(*paths):
+    with _proxy_cache_lock:
+        for path in paths:
+            _proxy_cache.pop(path, None)
 
 @app.route('/api/users', methods=['GET'])
 def api_users():
-    r = requests.get(f'{BACKEND}/api/users', headers={'X-API-Key': 'devshield-demo-key'})
-    return r.content, r.status_code, r.headers.items()
+    return cached_get('/api/users')
 
 @app.route('/api/users/<username>', methods=['DELETE'])
 def api_remove_user(username):
-    r = requests.delete(f'{BACKEND}/api/users/{username}', headers={'X-API-Key': 'devshield-demo-key'})
-    return r.content, r.status_code, r.headers.items()
+    result = proxy('DELETE', f'/api/users/{username}')
+    invalidate('/api/users')
+    return result
 
 @app.route('/api/policy', methods=['GET', 'POST'])
 def api_policy():
     if request.method == 'GET':
-        r = requests.get(f'{BACKEND}/api/policy', headers={'X-API-Key': 'devshield-demo-key'})
-        return r.content, r.status_code, r.headers.items()
+        return cached_get('/api/policy')
     else:
-        r = requests.post(f'{BACKEND}/api/policy', headers={'X-API-Key': 'devshield-demo-key'}, json=request.get_json())
-        return r.content, r.status_code, r.headers.items()
-    
+        result = proxy('POST', '/api/policy', json=request.get_json())
+        invalidate('/api/policy')
+        return result
+
+def decode_json(value):
+    """Decode a stored JSON column (never eval); returns None if it isn't valid JSON."""
+    if not isinstance(value, (str, bytes)):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
 @app.route('/api/analytics')
 def analytics():
     conn = get_db()
-    rows = conn.execute('SELECT response FROM analysis_log').fetchall()
-    conn.close()
-    total = len(rows)
-    by_action = {}
-    for row in rows:
-        try:
-            response = eval(row['response']) if isinstance(row['response'], str) else row['response']
+    try:
+        # Count in SQLite (JSON1): no rows are shipped to Python
+        total = conn.execute('SELECT COUNT(*) FROM analysis_log').fetchone()[0]
+        rows = conn.execute("SELECT COALESCE(json_extract(response, '$.action'), 'unknown') AS action, COUNT(*) AS n "
+                            "FROM analysis_log WHERE json_valid(response) GROUP BY 1").fetchall()
+        by_action = {row['action']: row['n'] for row in rows}
+    except sqlite3.OperationalError:
+        # SQLite built without JSON1
+        rows = conn.execute('SELECT response FROM analysis_log').fetchall()
+        total = len(rows)
+        by_action = {}
+        for row in rows:
+            response = decode_json(row['response'])
+            if not isinstance(response, dict):
+                continue
             action = response.get('action', 'unknown')
             by_action[action] = by_action.get(action, 0) + 1
-        except Exception:
-            continue
+    # Rows older than DEVSHIELD_LOG_HOT_DAYS live in the archive tier
+    archived = summarize(log_store.archive.iter_entries())
+    total += archived['total_events']
+    for action, n in archived['by_action'].items():
+        by_action[action] = by_action.get(action, 0) + n
     return jsonify({'total_events': total, 'by_action': by_action})
 
 @app.route('/api/history')
 def history():
-    conn = get_db()
-    rows = conn.execute('SELECT timestamp, request, response FROM analysis_log ORDER BY id DESC LIMIT 100').fetchall()
-    conn.close()
+    rows = log_store.iter_entries(newest_first=True, limit=100)  # tops up from the archive
     events = []
     for row in rows:
         try:
@@ -78,5 +156,13 @@ def history():
             continue
     return jsonify({'events': events})
 
+def configure_app(config=None):
+    """Configure the module-level app for WSGI servers (production: debug off) and return it."""
+    app.config.update(DEBUG=False)
+    if config:
+        app.config.update(config)
+    app.debug = app.config['DEBUG']
+    return app
+
 if __name__ == '__main__':
     app.run(port=5050, debug=True)
@@ -6,65 +6,132 @@ Imports risk scoring and explanation modules for modular workflow.
 """
 
 import os
+import time
 import requests
 from .risk_scoring import calculate_risk_score
 from .explanation import generate_explanation
 
+def _build_azure_request(metadata, azure_api_key=None, azure_endpoint=None, deployment_name=None):
+    """Build (url, headers, body) for an Azure OpenAI chat completion call."""
+    # Load from environment if not provided
+    azure_api_key = azure_api_key or os.getenv('AZURE_OPENAI_API_KEY')
+    azure_endpoint = azure_endpoint or os.getenv('AZURE_OPENAI_ENDPOINT')
+    deployment_name = deployment_name or os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
+    if not (azure_api_key and azure_endpoint and deployment_name):
+        raise ValueError("Azure OpenAI API key, endpoint, and deployment name are required (either as arguments or environment variables).")
+    headers = {
+        "api-key": azure_api_key,
+        "Content-Type": "application/json"
+    }
+    prompt = (
+        f"You are a security risk engine. Given the following metadata, "
+        f"return a JSON with risk_score (0-100), action (block/warn/allow), and explanation.\n"
+        f"Metadata: {metadata}"
+    )
+    data = {
+        "messages": [
+            {"role": "system", "content": "You are a security risk engine."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 200,
+        "temperature": 0.2
+    }
+    url = f"{azure_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version=2023-03-15-preview"
+    return url, headers, data
+
+def _parse_azure_response(result):
+    """Parse the model reply (assume model returns a JSON string in 'content')."""
+    content = result['choices'][0]['message']['content']
+    import json as _json
+    parsed = _json.loads(content)
+    risk_score = int(parsed.get('risk_score', 0))
+    action = parsed.get('action', 'allow')
+    explanation = parsed.get('explanation', 'No explanation provided.')
+    return {
+        'risk_score': risk_score,
+        'action': action,
+        'explanation': explanation
+    }
+
+def _assess_local(metadata):
+    local = calculate_risk_score(metadata)
+    return {
+        'risk_score': local['risk_score'],
+        'action': _decide_action(local['risk_score']),
+        'explanation': generate_explanation(metadata, local['risk_score'])
+    }
+
+def _error_result(e):
+    return {
+        'risk_score': 0,
+        'action': 'allow',
+        'explanation': f'Error in risk assessment: {e}'
+    }
+
+# Callbacks fn(duration_seconds, error_or_None) run after every Azure OpenAI call (metrics)
+_llm_observers = []
+
+def add_llm_observer(observer):
+    """Register a callback invoked with (duration, error) after each LLM call."""
+    _llm_observers.append(observer)
+
+def _notify_llm(start, error):
+    duration = time.perf_counter() - start
+    for observer in _llm_observers:
+        try:
+            observer(duration, error)
+        except Exception:
+            pass
+
 def assess_risk(metadata, use_azure_openai=False, azure_api_key=None, azure_endpoint=None, deployment_name=None):
     try:
         if use_azure_openai:
-            # Load from environment if not provided
-            azure_api_key = azure_api_key or os.getenv('AZURE_OPENAI_API_KEY')
-            azure_endpoint = azure_endpoint or os.getenv('AZURE_OPENAI_ENDPOINT')
-            deployment_name = deployment_name or os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
-            if not (azure_api_key and azure_endpoint and deployment_name):
-                raise ValueError("Azure OpenAI API key, endpoint, and deployment name are required (either as arguments or environment variables).")
-            headers = {
-                "api-key": azure_api_key,
-                "Content-Type": "application/json"
-            }
-            prompt = (
-                f"You are a security risk engine. Given the following metadata, "
-                f"return a JSON with risk_score (0-100), action (block/warn/allow), and explanation.\n"
-                f"Metadata: {metadata}"
-            )
-            data = {
-                "messages": [
-                    {"role": "system", "content": "You are a security risk engine."},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 200,
-                "temperature": 0.2
-            }
-            url = f"{azure_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version=2023-03-15-preview"
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            # Parse the response (assume model returns a JSON string in 'content')
-            content = result['choices'][0]['message']['content']
-            import json as _json
-            parsed = _json.loads(content)
-            risk_score = int(parsed.get('risk_score', 0))
-            action = parsed.get('action', 'allow')
-            explanation = parsed.get('explanation', 'No explanation provided.')
-            return {
-                'risk_score': risk_score,
-                'action': action,
-                'explanation': explanation
-            }
+            url, headers, data = _build_azure_request(metadata, azure_api_key, azure_endpoint, deployment_name)
+            start = time.perf_counter()
+            try:
+                response = requests.post(url, headers=headers, json=data, timeout=10)
+                response.raise_for_status()
+                result = _parse_azure_response(response.json())
+            except Exception as e:
+                _notify_llm(start, e)
+                raise
+            _notify_llm(start, None)
+            return result
+        else:
+            return _assess_local(metadata)
+    except Exception as e:
+        return _error_result(e)
+
+async def assess_risk_async(metadata, use_azure_openai=False, azure_api_key=None, azure_endpoint=None,
+                            deployment_name=None, client=None):
+    """
+    Asyncio variant of assess_risk. The Azure OpenAI call goes through httpx.AsyncClient,
+    so a slow model response does not hold a worker thread.
+    Args:
+        client (httpx.AsyncClient): Optional shared client (connection pooling); one is created per call otherwise.
+    """
+    try:
+        if use_azure_openai:
+            url, headers, data = _build_azure_request(metadata, azure_api_key, azure_endpoint, deployment_name)
+            start = time.perf_counter()
+            try:
+                if client is None:
+                    import httpx
+                    async with httpx.AsyncClient(timeout=10) as own_client:
+                        response = await own_client.post(url, headers=headers, json=data)
+                else:
+                    response = await client.post(url, headers=headers, json=data, timeout=10)
+                response.raise_for_status()
+                result = _parse_azure_response(response.json())
+            except Exception as e:
+                _notify_llm(start, e)
+                raise
+            _notify_llm(start, None)
+            return result
         else:
-            local = calculate_risk_score(metadata)
-            return {
-                'risk_score': local['risk_score'],
-                'action': _decide_action(local['risk_score']),
-                'explanation': generate_explanation(metadata, local['risk_score'])
-            }
+            return _assess_local(metadata)
     except Exception as e:
-        return {
-            'risk_score': 0,
-            'action': 'allow',
-            'explanation': f'Error in risk assessment: {e}'
-        }
+        return _error_result(e)
 
 def _decide_action(risk_score):
     """
@@ -7,12 +7,16 @@ Provides API endpoints and serves the dashboard UI.
 
 from flask import Flask, render_template, jsonify, request
 from datetime import datetime
-from collections import Counter
 import random
 
+try:
+    from .event_store import EventStore
+except ImportError:
+    from event_store import EventStore
+
 app = Flask(__name__)
 
-# --- Demo/mock dataset ---
+# --- Demo/mock dataset (seeds an empty event store) ---
 # Each entry: {id, timestamp, secret_type, risk_score, action, details}
 MOCK_DATA = [
     {
@@ -81,61 +85,118 @@ MOCK_DATA = [
     },
 ]
 
+# Persistent event store (DEVSHIELD_DASHBOARD_DB); counters are maintained on every write
+store = EventStore(seed=MOCK_DATA)
+
 # --- Helper functions ---
-def get_next_id():
-    return max([d['id'] for d in MOCK_DATA], default=0) + 1
+def _int_arg(name):
+    value = request.args.get(name)
+    return int(value) if value not in (None, '') else None
+
+def _parse_cursor(value):
+    """Cursor format: '<timestamp>|<id>' (returned in the X-Next-Cursor header)."""
+    if not value:
+        return None
+    timestamp, _, event_id = value.rpartition('|')
+    return timestamp, int(event_id)
 
 # --- API Endpoints ---
 
 @app.route('/api/metrics', methods=['GET'])
 def get_metrics():
-    """Return dashboard metrics: total blocked, type breakdown, risk scores, timeline."""
-    total_blocked = sum(1 for d in MOCK_DATA if d['action'] == 'block')
-    type_breakdown = dict(Counter(d['secret_type'] for d in MOCK_DATA))
-    risk_scores = [d['risk_score'] for d in MOCK_DATA]
-    timeline = sorted(MOCK_DATA, key=lambda d: d['timestamp'], reverse=True)
+    """
+    Return dashboard metrics from the running counters: total blocked, type breakdown,
+    risk histogram, plus the newest `limit` events (default 100, 0 for none) as timeline/risk_scores.
+    Charts should use /api/rollups instead of the raw timeline.
+    """
+    counters = store.counters()
+    limit = _int_arg('limit')
+    timeline = store.page(limit=100 if limit is None else limit)[0] if limit != 0 else []
     return jsonify({
-        "total_blocked": total_blocked,
-        "type_breakdown": type_breakdown,
-        "risk_scores": risk_scores,
+        "total_events": counters['total'],
+        "total_blocked": counters['action'].get('block', 0),
+        "action_breakdown": counters['action'],
+        "type_breakdown": counters['type'],
+        "risk_histogram": counters['risk'],
+        "risk_scores": [e['risk_score'] for e in timeline],
         "timeline": timeline
     })
 
+@app.route('/api/rollups', methods=['GET'])
+def get_rollups():
+    """
+    Pre-bucketed time series for charts: counts by action and type and risk-score
+    percentiles per window. Query params: resolution (minute|hour|day), since, until,
+    points (max windows returned, default 60).
+    """
+    try:
+        rollups = store.rollups(
+            resolution=request.args.get('resolution', 'hour'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            points=_int_arg('points') or 60,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rollups)
+
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """Return all secret detection events (activity feed)."""
-    return jsonify(MOCK_DATA)
+    """
+    Return secret detection events (activity feed), newest first, one page at a time.
+    Query params: limit, cursor, since, until, type, risk_min, risk_max.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        events, next_cursor = store.page(
+            limit=_int_arg('limit') or 500,
+            cursor=_parse_cursor(request.args.get('cursor')),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            secret_type=request.args.get('type'),
+            risk_min=_int_arg('risk_min'),
+            risk_max=_int_arg('risk_max'),
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid query parameter"}), 400
+    response = jsonify(events)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = f"{next_cursor[0]}|{next_cursor[1]}"
+    return response
 
 @app.route('/api/events', methods=['POST'])
 def add_event():
     """Add a new secret detection event (integration endpoint)."""
     data = request.json
     event = {
-        "id": get_next_id(),
         "timestamp": data.get("timestamp", datetime.utcnow().isoformat()),
         "secret_type": data.get("secret_type", "Unknown"),
-        "risk_score": int(data.get("risk_score", random.randint(50, 100))),
+        "risk_score": data.get("risk_score", random.randint(50, 100)),
         "action": data.get("action", "block"),
         "details": data.get("details", "")
     }
-    MOCK_DATA.append(event)
+    try:
+        event = store.add(event)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(event), 201
 
 @app.route('/api/events/<int:event_id>', methods=['PUT'])
 def update_event(event_id):
     """Update an event (demo CRUD)."""
     data = request.json
-    for event in MOCK_DATA:
-        if event['id'] == event_id:
-            event.update(data)
-            return jsonify(event)
-    return jsonify({"error": "Event not found"}), 404
+    try:
+        event = store.update(event_id, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if event is None:
+        return jsonify({"error": "Event not found"}), 404
+    return jsonify(event)
 
 @app.route('/api/events/<int:event_id>', methods=['DELETE'])
 def delete_event(event_id):
     """Delete an event (demo CRUD)."""
-    global MOCK_DATA
-    MOCK_DATA = [e for e in MOCK_DATA if e['id'] != event_id]
+    store.delete(event_id)
     return '', 204
 
 # --- Dashboard UI ---
@@ -144,5 +205,13 @@ def dashboard():
     """Serve the dashboard UI."""
     return render_template('index.html')
 
+def configure_app(config=None):
+    """Configure the module-level app for WSGI servers (production: debug off) and return it."""
+    app.config.update(DEBUG=False)
+    if config:
+        app.config.update(config)
+    app.debug = app.config['DEBUG']
+    return app
+
 if __name__ == '__main__':
     app.run(debug=True)
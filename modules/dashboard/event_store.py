@@ -0,0 +1,344 @@
+"""
+event_store.py
+--------------
+Persistent, indexed store for dashboard detection events (SQLite).
+
+- `events` is keyed by an autoincrement id (no max() scan on insert), and an
+  index on (timestamp, id) gives time-ordered pages with keyset cursors.
+- `event_counts` holds running counters (total, per action, per secret type,
+  per 10-point risk bucket). They are updated in the same transaction as every
+  insert, update and delete, so the metrics endpoint reads a handful of rows
+  instead of the whole table, and all processes sharing the file agree.
+- `event_rollups` holds the same counters per minute, hour and day bucket, plus
+  a per-bucket histogram of exact risk scores (0-100). `rollups()` reads the
+  buckets of the requested range at the finest stored resolution that keeps
+  the read bounded, and merges them into at most `points` windows, so a chart
+  costs the same to serve and draw whatever the history size.
+
+Events are dicts: {id, timestamp, secret_type, risk_score, action, details}.
+Timestamps are stored as naive UTC ISO 8601 (offsets are converted on insert
+and update), so string order in the index is time order.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.environ.get('DEVSHIELD_DASHBOARD_DB', os.path.join(os.path.dirname(__file__), 'dashboard_events.db'))
+FIELDS = ('timestamp', 'secret_type', 'risk_score', 'action', 'details')
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+DEFAULT_POINTS = 60
+MAX_POINTS = 1000
+MAX_SCAN_BUCKETS = 5000     # stored buckets read per rollup query, at most
+PERCENTILES = (50, 90, 99)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    secret_type TEXT NOT NULL,
+    risk_score INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    details TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp, id);
+CREATE TABLE IF NOT EXISTS event_counts (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS event_rollups (
+    resolution TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (resolution, bucket, kind, key)
+) WITHOUT ROWID;
+'''
+
+
+def risk_bucket(score):
+    """10-point histogram bucket label ('0-9' ... '90-100')."""
+    low = min(int(score) // 10 * 10, 90)
+    return f"{low}-{low + 9 if low < 90 else 100}"
+
+
+def _counter_keys(event):
+    return [('total', ''), ('action', event['action']), ('type', event['secret_type']),
+            ('risk', risk_bucket(event['risk_score']))]
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_time(value):
+    """ISO 8601 timestamp -> naive UTC datetime, or None if it can't be parsed."""
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def normalize_time(value):
+    """ISO 8601 timestamp -> naive UTC ISO string. Raises ValueError if it can't be parsed."""
+    dt = parse_time(value)
+    if dt is None:
+        raise ValueError(f'timestamp must be ISO 8601, got {value!r}')
+    return dt.isoformat()
+
+
+def normalize_score(value):
+    """Risk score as an int in 0-100. Raises ValueError otherwise."""
+    try:
+        score = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'risk_score must be an integer, got {value!r}') from None
+    if not 0 <= score <= 100:
+        raise ValueError(f'risk_score must be between 0 and 100, got {score}')
+    return score
+
+
+def _normalize(event):
+    event['timestamp'] = normalize_time(event['timestamp'])
+    event['risk_score'] = normalize_score(event['risk_score'])
+    return event
+
+
+def _floor(dt, seconds):
+    return _EPOCH + timedelta(seconds=int((dt - _EPOCH).total_seconds()) // seconds * seconds)
+
+
+def _label(dt):
+    return dt.isoformat(timespec='seconds')
+
+
+def _rollup_keys(event):
+    """(resolution, bucket, kind, key) rows an event counts towards; none if its timestamp is not ISO."""
+    dt = parse_time(event['timestamp'])
+    if dt is None:
+        return []
+    keys = []
+    for resolution, seconds in RESOLUTIONS.items():
+        bucket = _label(_floor(dt, seconds))
+        keys += [(resolution, bucket, 'total', ''), (resolution, bucket, 'action', event['action']),
+                 (resolution, bucket, 'type', event['secret_type']),
+                 (resolution, bucket, 'score', str(int(event['risk_score'])))]
+    return keys
+
+
+def _percentile(scores, total, q):
+    """Nearest-rank percentile from a {score: count} histogram."""
+    rank = max(1, math.ceil(q / 100 * total))
+    seen = 0
+    for score in sorted(scores):
+        seen += scores[score]
+        if seen >= rank:
+            return score
+    return None
+
+
+class EventStore:
+    def __init__(self, path=DB_PATH, seed=None):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if conn.execute('SELECT 1 FROM events LIMIT 1').fetchone() is None:
+            for event in seed or ():
+                self.add(event)
+        elif conn.execute('SELECT 1 FROM event_rollups LIMIT 1').fetchone() is None:
+            self._backfill_rollups(conn)
+
+    def _conn(self):
+        """One connection per thread, reused across requests."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump(conn, event, delta):
+        conn.executemany(
+            'INSERT INTO event_counts (kind, key, n) VALUES (?, ?, ?) '
+            'ON CONFLICT (kind, key) DO UPDATE SET n = n + excluded.n',
+            [(kind, key, delta) for kind, key in _counter_keys(event)])
+        conn.executemany(
+            'INSERT INTO event_rollups (resolution, bucket, kind, key, n) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (resolution, bucket, kind, key) DO UPDATE SET n = n + excluded.n',
+            [keys + (delta,) for keys in _rollup_keys(event)])
+
+    def _backfill_rollups(self, conn):
+        """Build rollups for events stored before the rollup table existed."""
+        with conn:
+            for row in conn.execute('SELECT * FROM events').fetchall():
+                conn.executemany(
+                    'INSERT INTO event_rollups (resolution, bucket, kind, key, n) VALUES (?, ?, ?, ?, 1) '
+                    'ON CONFLICT (resolution, bucket, kind, key) DO UPDATE SET n = n + 1',
+                    _rollup_keys(dict(row)))
+
+    def add(self, event):
+        """Insert an event (dict without id); returns it with its new id. ValueError on a bad timestamp/score."""
+        event = _normalize({k: event[k] for k in FIELDS})
+        conn = self._conn()
+        with conn:
+            cur = conn.execute('INSERT INTO events (timestamp, secret_type, risk_score, action, details) '
+                               'VALUES (?, ?, ?, ?, ?)', [event[k] for k in FIELDS])
+            self._bump(conn, event, 1)
+        return dict(event, id=cur.lastrowid)
+
+    def get(self, event_id):
+        row = self._conn().execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def update(self, event_id, changes):
+        """
+        Apply `changes` (known fields only) to an event; returns the updated event or None.
+        Raises ValueError on a bad timestamp or score.
+        """
+        conn = self._conn()
+        with conn:
+            row = conn.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+            if row is None:
+                return None
+            old = dict(row)
+            new = _normalize(dict(old, **{k: v for k, v in changes.items() if k in FIELDS}))
+            conn.execute('UPDATE events SET timestamp = ?, secret_type = ?, risk_score = ?, action = ?, details = ? '
+                         'WHERE id = ?', [new[k] for k in FIELDS] + [event_id])
+            self._bump(conn, old, -1)
+            self._bump(conn, new, 1)
+        return new
+
+    def delete(self, event_id):
+        """Delete an event; returns True if it existed."""
+        conn = self._conn()
+        with conn:
+            row = conn.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+            self._bump(conn, dict(row), -1)
+        return True
+
+    def page(self, limit=DEFAULT_PAGE_SIZE, cursor=None, since=None, until=None, secret_type=None,
+             risk_min=None, risk_max=None):
+        """
+        Newest-first page of events. `cursor` is the (timestamp, id) of the last event of the
+        previous page. Returns (events, next_cursor or None).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        since = normalize_time(since) if since else since
+        until = normalize_time(until) if until else until
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append('(timestamp < ? OR (timestamp = ? AND id < ?))')
+            params += [cursor[0], cursor[0], cursor[1]]
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        if secret_type:
+            clauses.append('secret_type = ?')
+            params.append(secret_type)
+        if risk_min is not None:
+            clauses.append('risk_score >= ?')
+            params.append(risk_min)
+        if risk_max is not None:
+            clauses.append('risk_score <= ?')
+            params.append(risk_max)
+        query = 'SELECT * FROM events'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+        rows = self._conn().execute(query, params + [limit + 1]).fetchall()
+        events = [dict(r) for r in rows[:limit]]
+        next_cursor = (events[-1]['timestamp'], events[-1]['id']) if len(rows) > limit else None
+        return events, next_cursor
+
+    def counters(self):
+        """Running counters: {'total': n, 'action': {...}, 'type': {...}, 'risk': {bucket: n}}."""
+        result = {'total': 0, 'action': {}, 'type': {}, 'risk': {}}
+        for row in self._conn().execute('SELECT kind, key, n FROM event_counts WHERE n != 0'):
+            if row['kind'] == 'total':
+                result['total'] = row['n']
+            else:
+                result[row['kind']][row['key']] = row['n']
+        result['risk'] = dict(sorted(result['risk'].items(), key=lambda kv: int(kv[0].split('-')[0])))
+        return result
+
+    def rollups(self, resolution='hour', since=None, until=None, points=DEFAULT_POINTS):
+        """
+        Time series over [since, until] in at most `points` windows of `resolution` or coarser.
+        `until` defaults to the latest bucket, `since` to `points` buckets before it.
+        Each window: {bucket, total, action: {...}, type: {...}, risk: {p50, p90, p99, max} or None}.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+        step = RESOLUTIONS[resolution]
+        points = max(1, min(int(points), MAX_POINTS))
+        bounds = [parse_time(v) if v else None for v in (since, until)]
+        if (since and bounds[0] is None) or (until and bounds[1] is None):
+            raise ValueError('since/until must be ISO 8601 timestamps')
+        since_dt, until_dt = bounds
+        conn = self._conn()
+        if until_dt is None:
+            row = conn.execute('SELECT bucket FROM event_rollups WHERE resolution = ? ORDER BY bucket DESC LIMIT 1',
+                               (resolution,)).fetchone()
+            until_dt = parse_time(row['bucket']) if row is not None else datetime.utcnow()
+            if since_dt is not None:
+                until_dt = max(until_dt, since_dt)
+        until_dt = _floor(until_dt, step)
+        since_dt = _floor(since_dt, step) if since_dt is not None else until_dt - timedelta(seconds=step * (points - 1))
+        if since_dt > until_dt:
+            raise ValueError('since must not be after until')
+
+        # Finest stored level (at or above the requested one) that keeps the read bounded
+        span = (until_dt - since_dt).total_seconds()
+        levels = sorted((s, name) for name, s in RESOLUTIONS.items() if s >= step)
+        seconds, level = next(((s, n) for s, n in levels if span // s + 1 <= MAX_SCAN_BUCKETS), levels[-1])
+        start = _floor(since_dt, seconds)
+        raw = int((until_dt - start).total_seconds()) // seconds + 1
+        window = math.ceil(raw / points) * seconds
+        count = math.ceil(raw * seconds / window)
+
+        windows = [{'total': 0, 'action': {}, 'type': {}, 'score': {}} for _ in range(count)]
+        rows = conn.execute('SELECT bucket, kind, key, n FROM event_rollups '
+                            'WHERE resolution = ? AND bucket >= ? AND bucket <= ? AND n > 0',
+                            (level, _label(start), _label(_floor(until_dt, seconds))))
+        for bucket, kind, key, n in rows:
+            w = windows[int((parse_time(bucket) - start).total_seconds()) // window]
+            if kind == 'total':
+                w['total'] += n
+            else:
+                key = int(key) if kind == 'score' else key
+                w[kind][key] = w[kind].get(key, 0) + n
+
+        series, totals = [], {'total': 0, 'action': {}, 'type': {}}
+        for i, w in enumerate(windows):
+            scores = w.pop('score')
+            risk = None
+            if scores:
+                n = sum(scores.values())
+                risk = {f'p{q}': _percentile(scores, n, q) for q in PERCENTILES}
+                risk['max'] = max(scores)
+            series.append(dict(w, bucket=_label(start + timedelta(seconds=i * window)), risk=risk))
+            totals['total'] += w['total']
+            for kind in ('action', 'type'):
+                for key, n in w[kind].items():
+                    totals[kind][key] = totals[kind].get(key, 0) + n
+        return {'resolution': level, 'bucket_seconds': window, 'since': _label(start),
+                'until': _label(until_dt), 'series': series, 'totals': totals}
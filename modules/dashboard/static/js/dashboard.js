@@ -1,13 +1,12 @@
 // static/js/dashboard.js
 // Handles dashboard interactivity: fetches metrics, renders charts and activity feed.
 
-// Fetch all events and update dashboard with filters
-let allEvents = [];
+// Summary cards and the risk chart come from pre-bucketed rollups (/api/rollups);
+// the activity feed is one filtered page of /api/events. Neither grows with history size.
+const FEED_PAGE_SIZE = 50;
+
 async function loadMetrics() {
-  // Fetch all events for filtering
-  const eventsRes = await fetch('/api/events');
-  allEvents = await eventsRes.json();
-  applyFilters();
+  await applyFilters();
   // Update header date
   const dateSpan = document.getElementById('header-date');
   if (dateSpan) {
@@ -16,44 +15,60 @@ async function loadMetrics() {
   }
 }
 
-function applyFilters() {
+// Number of bars that fit the risk chart canvas
+function chartPoints() {
+  const canvas = document.getElementById('riskChart');
+  return Math.max(1, Math.floor((canvas.width - 25) / (CHART_BAR_WIDTH + CHART_GAP)));
+}
+
+async function applyFilters() {
   // Get filter values
   const dateStart = document.getElementById('filter-date-start').value;
   const dateEnd = document.getElementById('filter-date-end').value;
   const type = document.getElementById('filter-type').value;
-  const riskMin = parseInt(document.getElementById('filter-risk-min').value) || 0;
-  const riskMax = parseInt(document.getElementById('filter-risk-max').value) || 100;
-
-  let filtered = allEvents.filter(ev => {
-    let ok = true;
-    if (dateStart) ok = ok && ev.timestamp >= dateStart;
-    if (dateEnd) ok = ok && ev.timestamp <= dateEnd + 'T23:59:59';
-    if (type) ok = ok && ev.secret_type === type;
-    if (ev.risk_score !== undefined) ok = ok && ev.risk_score >= riskMin && ev.risk_score <= riskMax;
-    return ok;
-  });
+  const riskMin = document.getElementById('filter-risk-min').value;
+  const riskMax = document.getElementById('filter-risk-max').value;
+
+  // Rollups: daily buckets over the selected dates, or the latest days if none selected
+  const rollupParams = new URLSearchParams({ resolution: 'day', points: chartPoints() });
+  if (dateStart) rollupParams.set('since', dateStart);
+  if (dateEnd) rollupParams.set('until', dateEnd + 'T23:59:59');
+  const rollupsRes = await fetch('/api/rollups?' + rollupParams);
+  const rollups = await rollupsRes.json();
+
+  // All-time counters when no date range is selected
+  let totals = rollups.totals;
+  if (!dateStart && !dateEnd) {
+    const metricsRes = await fetch('/api/metrics?limit=0');
+    const metrics = await metricsRes.json();
+    totals = { action: metrics.action_breakdown, type: metrics.type_breakdown };
+  }
 
   // Update metrics
-  const totalBlocked = filtered.filter(ev => ev.action === 'block').length;
-  document.getElementById('total-blocked').textContent = totalBlocked;
+  document.getElementById('total-blocked').textContent = totals.action.block || 0;
 
   // Type breakdown
   const typeList = document.getElementById('type-breakdown');
   typeList.innerHTML = '';
-  const typeCounts = {};
-  filtered.forEach(ev => { typeCounts[ev.secret_type] = (typeCounts[ev.secret_type] || 0) + 1; });
-  for (const [type, count] of Object.entries(typeCounts)) {
+  for (const [secretType, count] of Object.entries(totals.type)) {
+    if (type && secretType !== type) continue;
     const li = document.createElement('li');
-    li.textContent = `${type}: ${count}`;
+    li.textContent = `${secretType}: ${count}`;
     typeList.appendChild(li);
   }
 
-  // Risk scores
-  const riskScores = filtered.map(ev => ev.risk_score).filter(x => typeof x === 'number');
-  renderRiskChart(riskScores);
+  // Risk scores per bucket
+  renderRiskChart(rollups.series);
 
-  // Activity feed
-  renderActivityFeed(filtered.sort((a, b) => b.timestamp.localeCompare(a.timestamp)));
+  // Activity feed: newest matching events, filtered server-side
+  const eventParams = new URLSearchParams({ limit: FEED_PAGE_SIZE });
+  if (dateStart) eventParams.set('since', dateStart);
+  if (dateEnd) eventParams.set('until', dateEnd + 'T23:59:59');
+  if (type) eventParams.set('type', type);
+  if (riskMin) eventParams.set('risk_min', riskMin);
+  if (riskMax) eventParams.set('risk_max', riskMax);
+  const eventsRes = await fetch('/api/events?' + eventParams);
+  renderActivityFeed(await eventsRes.json());
 }
 
 // Filter button listeners
@@ -69,57 +84,6 @@ window.addEventListener('DOMContentLoaded', () => {
   };
 });
 
-// Render risk score chart using Chart.js
-let riskChartInstance = null;
-function renderRiskChart(scores) {
-  const ctx = document.getElementById('riskChart').getContext('2d');
-  if (riskChartInstance) {
-    riskChartInstance.destroy();
-  }
-  const isDark = document.body.classList.contains('dark-mode');
-  riskChartInstance = new Chart(ctx, {
-    type: 'bar',
-    data: {
-      labels: scores.map((_, i) => `#${i + 1}`),
-      datasets: [{
-        label: 'Risk Score',
-        data: scores,
-        backgroundColor: isDark ? '#00b894' : '#2980b9',
-        borderRadius: 8,
-        maxBarThickness: 32,
-      }]
-    },
-    options: {
-      responsive: true,
-      plugins: {
-        legend: { display: false },
-        tooltip: { enabled: true }
-      },
-      layout: {
-        padding: { top: 40, bottom: 16, left: 8, right: 8 }
-      },
-      scales: {
-        x: {
-          ticks: { color: isDark ? '#e0e6ef' : '#2c3e50', padding: 4 },
-          grid: { display: false }
-        },
-        y: {
-          beginAtZero: true,
-          max: 100,
-          grace: '10%',
-          title: { display: true, text: 'Risk Score', color: isDark ? '#e0e6ef' : '#2c3e50' },
-          ticks: {
-            color: isDark ? '#e0e6ef' : '#2c3e50',
-            padding: 12,
-            callback: function(value) { return value; }
-          },
-          grid: { color: isDark ? '#444a5a' : '#e0e6ef' }
-        }
-      }
-    }
-  });
-}
-
 // Render activity feed with subtle animation
 function renderActivityFeed(events) {
   const feed = document.getElementById('activity-feed');
@@ -148,21 +112,28 @@ function getBarColor() {
   return document.body.classList.contains('dark-mode') ? '#00b894' : '#2980b9';
 }
 
-function renderRiskChart(scores) {
+// Risk chart: one bar per rollup bucket at its p90 risk score, with a p50 tick and the event count
+const CHART_BAR_WIDTH = 20;
+const CHART_GAP = 10;
+
+function renderRiskChart(series) {
   const canvas = document.getElementById('riskChart');
   const ctx = canvas.getContext('2d');
   ctx.clearRect(0, 0, canvas.width, canvas.height);
   ctx.font = '13px Arial';
   ctx.textAlign = 'center';
-  const barWidth = 20;
-  const gap = 10;
-  scores.forEach((score, i) => {
-    const x = i * (barWidth + gap) + 25;
-    const y = canvas.height - (score * canvas.height / 100);
+  const top = 18;
+  const height = canvas.height - top;
+  series.forEach((bucket, i) => {
+    if (!bucket.risk) return;
+    const x = i * (CHART_BAR_WIDTH + CHART_GAP) + 25;
+    const y = canvas.height - (bucket.risk.p90 * height / 100);
     ctx.fillStyle = getBarColor();
-    ctx.fillRect(x, y, barWidth, canvas.height - y);
+    ctx.fillRect(x, y, CHART_BAR_WIDTH, canvas.height - y);
+    const median = canvas.height - (bucket.risk.p50 * height / 100);
     ctx.fillStyle = document.body.classList.contains('dark-mode') ? '#fff' : '#555';
-    ctx.fillText(score, x + barWidth / 2, y - 6);
+    ctx.fillRect(x, median, CHART_BAR_WIDTH, 2);
+    ctx.fillText(bucket.total, x + CHART_BAR_WIDTH / 2, y - 6);
   });
 }
 
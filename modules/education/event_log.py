@@ -0,0 +1,183 @@
+"""
+event_log.py
+------------
+Buffered, rotating JSONL sink for education/alert events.
+Keeps the log file open, batches writes, rotates by size or date and
+streams events back across rotated segments for the dashboard.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+
+class EventLogSink:
+    """
+    Append-only JSONL writer with buffered flushes and log rotation.
+
+    Args:
+        path (str): Path of the active log file.
+        max_bytes (int): Rotate once the active file reaches this size (0 disables).
+        rotate_daily (bool): Rotate when the calendar day changes.
+        compress (bool): Gzip rotated segments.
+        buffer_size (int): Flush after this many buffered events.
+        flush_interval (float): Flush buffered events at most this many seconds after they are written,
+            from a background timer if no further write comes (0 disables the timer).
+        backup_count (int): Keep at most this many rotated segments (0 keeps all).
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_daily=False, compress=False,
+                 buffer_size=64, flush_interval=1.0, backup_count=0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.backup_count = backup_count
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._handle = None
+        self._opened_day = None
+        self._timer = None
+        atexit.register(self.close)
+
+    def _open(self):
+        if self._handle is None:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                self._opened_day = datetime.fromtimestamp(os.path.getmtime(self.path)).date()
+            else:
+                self._opened_day = datetime.now().date()
+            self._handle = open(self.path, 'a', encoding='utf-8')
+        return self._handle
+
+    def write(self, entry):
+        """Buffer one event; flushes when the buffer is full or stale."""
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.buffer_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+            elif self._timer is None and self.flush_interval > 0:
+                # The tail of a burst must reach disk even if no later write comes
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    def flush(self):
+        """Write buffered events to disk and rotate if needed."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        handle = self._open()
+        handle.write(''.join(self._buffer))
+        handle.flush()
+        self._buffer = []
+        if self._should_rotate():
+            self._rotate_locked()
+
+    def _should_rotate(self):
+        if self.max_bytes and self._handle.tell() >= self.max_bytes:
+            return True
+        if self.rotate_daily and datetime.now().date() != self._opened_day:
+            return True
+        return False
+
+    def rotate(self):
+        """Force rotation of the active file."""
+        with self._lock:
+            self._flush_locked()
+            if self._handle is not None or os.path.exists(self.path):
+                self._rotate_locked()
+
+    def _rotate_locked(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        target = f"{self.path}.{stamp}"
+        seq = 0
+        while os.path.exists(target) or os.path.exists(target + '.gz'):
+            seq += 1
+            target = f"{self.path}.{stamp}-{seq}"
+        os.replace(self.path, target)
+        if self.compress:
+            with open(target, 'rb') as src, gzip.open(target + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(target)
+        if self.backup_count:
+            for old in list_segments(self.path)[:-self.backup_count]:
+                try:
+                    os.remove(old)
+                except OSError as e:
+                    print(f"[EducationLog] Failed to remove old segment {old}: {e}")
+
+    def close(self):
+        """Flush pending events and close the file handle."""
+        with self._lock:
+            try:
+                self._flush_locked()
+            finally:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+
+
+def _segment_key(segment_path, base_path):
+    suffix = segment_path[len(base_path) + 1:]
+    if suffix.endswith('.gz'):
+        suffix = suffix[:-3]
+    stamp, _, seq = suffix.partition('-')
+    return (stamp, int(seq) if seq.isdigit() else 0)
+
+
+def list_segments(path):
+    """Return rotated segments of `path`, oldest first (excludes the active file)."""
+    candidates = [p for p in glob.glob(glob.escape(path) + '.*')
+                  if p[len(path) + 1:].split('-')[0].split('.')[0].isdigit()]
+    return sorted(candidates, key=lambda p: _segment_key(p, path))
+
+
+def iter_events(path):
+    """
+    Stream events oldest-first across rotated (optionally gzipped) segments
+    and the active file. Malformed lines are skipped.
+    """
+    for segment in list_segments(path) + [path]:
+        if not os.path.exists(segment):
+            continue
+        opener = gzip.open if segment.endswith('.gz') else open
+        try:
+            with opener(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except OSError as e:
+            print(f"[EducationLog] Failed to read {segment}: {e}")
@@ -1,56 +1,470 @@
 """
 policy_rules.py
 --------------
-Simple policy enforcement engine for DevShield AI.
+Policy enforcement engine for DevShield AI.
 Defines and checks security policies for detected secrets.
+
+Config (JSON); every key is optional:
+
+    {
+      "block_types": ["Password", "Secret Key"],
+      "warn_types": ["API Key", "Token"],
+      "enforce_env": true,
+      "severity_thresholds": {"block": 90, "warn": 60},
+      "rules": [
+        {"id": "fixtures", "action": "allow", "paths": ["tests/**", "*.example"]},
+        {"id": "prod-creds", "action": "block", "types": ["Token"], "variables": ["^PROD_"], "min_risk": 50}
+      ],
+      "overrides": {
+        "repos": {"payments-api": {"severity_thresholds": {"block": 70}}},
+        "teams": {"data": {"rules": [...]}}
+      }
+    }
+
+Decision order: the first matching rule (in list order), then block/warn
+types, then severity thresholds on the finding's risk score (the stricter
+of the two wins), then enforce_env. Rule conditions (types, paths,
+variables, min_risk/max_risk) must all hold; a missing condition matches
+anything. Path globs follow .gitignore style: `*` stays within a
+directory, `**` spans directories, and a glob without `/` matches the
+file name at any depth. Anchored globs (with a `/`) are relative to the
+repository root; since the root of an absolute path (as editors send) is
+unknown, they are tried against each of its trailing `/`-segments. Risk
+scores may arrive as numbers or numeric strings. Repo and team overrides replace keys of the base
+config, and their rules are checked before the base rules (repo before team).
+
+Rules are compiled once per config into bitmasks (bit i = rule i): a type
+hash map, combined regexes for the path globs (bucketed by the directory,
+file name or extension literal they require) and for the variable regexes
+(bucketed by a required literal), and a mask per risk score. A finding's decision is the lowest set
+bit of the AND of its masks, so the cost per finding barely depends on the
+number of rules.
 """
 
 import json
 import os
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+ACTIONS = ('allow', 'warn', 'block')
+_STRICTNESS = {action: i for i, action in enumerate(ACTIONS)}
+MATCH_CACHE_SIZE = 65536
+
+DEFAULT_CONFIG = {
+    "block_types": ["Password", "Secret Key"],
+    "warn_types": ["API Key", "Token"],
+    "enforce_env": True
+}
 
 def load_policy_config(config_path=None):
     """
     Loads policy config from a JSON file. If not found, uses default rules.
     """
-    default_config = {
-        "block_types": ["Password", "Secret Key"],
-        "warn_types": ["API Key", "Token"],
-        "enforce_env": True
-    }
     if config_path and os.path.exists(config_path):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"[PolicyConfig] Failed to load config: {e}. Using default policy.")
-    return default_config
+    return dict(DEFAULT_CONFIG)
+
+def glob_to_regex(glob):
+    """Translate a path glob (`*`, `**`, `?`, `[...]`) to a regex source matching the whole path."""
+    glob = glob.replace('\\', '/')
+    anchored = '/' in glob.rstrip('/')
+    glob = glob.lstrip('/')
+    if glob.endswith('/'):
+        glob += '**'
+    out, i = [], 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[' and ']' in glob[i + 2:]:
+            end = glob.index(']', i + 2)
+            body = glob[i + 1:end]
+            out.append('[' + ('^' + body[1:] if body[0] == '!' else body).replace('\\', '\\\\') + ']')
+            i = end + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ('' if anchored else '(?:.*/)?') + ''.join(out)
+
+_WILDCARDS = frozenset('*?[')
+
+def _glob_bucket(glob):
+    """
+    Literal a path must contain for `glob` to match: its first directory (anchored globs),
+    its file name or extension (file-name globs). None if there is no such literal.
+    """
+    glob = glob.replace('\\', '/')
+    if '/' in glob.rstrip('/'):
+        first = glob.lstrip('/').split('/', 1)[0]
+        return ('dir', first) if first and not _WILDCARDS.intersection(first) else None
+    if glob.endswith('/'):
+        return None
+    if not _WILDCARDS.intersection(glob):
+        return ('name', glob)
+    ext = glob.rpartition('.')[2] if '.' in glob else ''
+    return ('ext', ext) if ext and not _WILDCARDS.intersection(ext) else None
+
+def _path_buckets(path):
+    name = path.rpartition('/')[2]
+    keys = [('dir', path.partition('/')[0]), ('name', name)]
+    if '.' in name:
+        keys.append(('ext', name.rpartition('.')[2]))
+    return keys
+
+def _regex_literal(pattern):
+    """Longest literal run (3+ chars) every match of a case-sensitive regex contains, or None."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    best = run = ''
+    for op, av in list(parsed) + [(None, None)]:
+        if op == sre_constants.LITERAL:
+            run += chr(av)
+            continue
+        best, run = max(best, run, key=len), ''
+    return best if len(best) >= 3 else None
+
+def normalize_path(path):
+    path = path.replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+_ABSOLUTE_PATH = re.compile(r'/|[A-Za-z]:/')
+
+def _coerce_score(risk_score):
+    """Risk score as an int, or None if missing or not a number."""
+    if risk_score is None:
+        return None
+    try:
+        return int(float(risk_score))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+
+def _scope_flags(source):
+    """'(?i)abc' -> '(?i:abc)': leading global flags are not allowed inside a combined pattern."""
+    m = _GLOBAL_FLAGS.match(source)
+    return f'(?{m.group(1)}:{source[m.end():]})' if m else source
+
+def _subpatterns(av):
+    if isinstance(av, sre_parse.SubPattern):
+        yield av
+    elif isinstance(av, (tuple, list)):
+        for item in av:
+            yield from _subpatterns(item)
+
+def _has_group_refs(source):
+    """True if the regex refers to its own groups by number (\\1, (?(1)...)), which combining would renumber."""
+    try:
+        stack = [sre_parse.parse(source)]
+    except re.error:
+        return False
+    while stack:
+        for op, av in stack.pop():
+            if op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+                return True
+            stack.extend(_subpatterns(av))
+    return False
+
+class _MultiMatcher:
+    """
+    Finds which of many regexes match a string in one pass. All patterns are folded
+    into one regex of optional lookaheads, each followed by an empty group that
+    participates only if its pattern matched. Patterns with backreferences, and all
+    of them if the combined regex does not compile, are tried one by one instead.
+    """
+
+    def __init__(self, sources, fullmatch, trusted=False):
+        self.sources = sources
+        # User-supplied patterns are compiled on their own first, so a malformed one is
+        # reported instead of silently merging with its neighbours
+        compiled = None if trusted else [re.compile(s) for s in sources]
+        wrap = (lambda s: f'(?:{s})\\Z') if fullmatch else (lambda s: f'.*?(?:{s})')
+        merged = [i for i, s in enumerate(sources) if not _has_group_refs(s)]
+        try:
+            combined = re.compile(''.join(f'(?:(?={wrap(_scope_flags(sources[i]))})(?P<_dsm{i}>))?'
+                                          for i in merged), re.DOTALL) if merged else None
+        except re.error:  # e.g. duplicate group names across patterns
+            combined, merged = None, []
+        test = 'fullmatch' if fullmatch else 'search'
+        merged_set = set(merged)
+        separate = [(i, getattr(compiled[i] if compiled else re.compile(s), test))
+                    for i, s in enumerate(sources) if i not in merged_set]
+        if combined is not None:
+            markers = [(i, combined.groupindex[f'_dsm{i}'] - 1) for i in merged]
+            def matching(text):
+                groups = combined.match(text).groups()
+                found = [i for i, g in markers if groups[g] is not None]
+                if separate:
+                    found.extend(i for i, t in separate if t(text))
+                    found.sort()
+                return found
+            self.matching = matching
+        else:
+            self.matching = lambda text: [i for i, t in separate if t(text)]
+
+class _Condition:
+    """
+    Rule mask for one string-valued condition (paths or variables). Patterns can be
+    split into buckets by a hashable key (`bucket_of(pattern)`); a string is then only
+    run against the combined regex of the buckets named by `keys_of(text)`, plus the
+    unkeyed (None) bucket. Without `keys_of`, keys are literals and a bucket is
+    tried when its literal occurs in the string.
+    """
+
+    def __init__(self, rules, field, to_regex, fullmatch, bucket_of=None, keys_of=None, trusted=False):
+        self.unconditioned = 0
+        grouped = {}   # bucket key -> {regex source: rule mask}
+        for bit, rule in enumerate(rules):
+            patterns = rule.get(field) or []
+            if not patterns:
+                self.unconditioned |= 1 << bit
+            for pattern in patterns:
+                bucket = grouped.setdefault(bucket_of(pattern) if bucket_of else None, {})
+                source = to_regex(pattern)
+                bucket[source] = bucket.get(source, 0) | 1 << bit
+        self.buckets = {key: (_MultiMatcher(list(b), fullmatch, trusted), list(b.values())) for key, b in grouped.items()}
+        self.literals = [key for key in self.buckets if key is not None]
+        self.keys_of = keys_of or self._contained_literals
+        self.cache = {}
+
+    def _contained_literals(self, text):
+        return [key for key in self.literals if key in text]
+
+    def mask(self, text):
+        """Rules whose condition holds for `text` (cached). Empty text only satisfies unconditioned rules."""
+        if not self.buckets or not text:
+            return self.unconditioned
+        mask = self.cache.get(text)
+        if mask is None:
+            mask = self.unconditioned
+            for key in (None, *self.keys_of(text)):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    matcher, rule_masks = bucket
+                    for i in matcher.matching(text):
+                        mask |= rule_masks[i]
+            if len(self.cache) >= MATCH_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[text] = mask
+        return mask
+
+class CompiledPolicy:
+    """A policy config compiled for fast evaluation. Build with CompiledPolicy(config)."""
+
+    def __init__(self, config):
+        self.config = config
+        rules = [dict(r) for r in config.get('rules') or []]
+        for i, rule in enumerate(rules):
+            if rule.get('action') not in ACTIONS:
+                raise ValueError(f"Policy rule {rule.get('id', i)}: action must be one of {', '.join(ACTIONS)}")
+            rule.setdefault('id', f'rule-{i}')
+        self.rules = rules
+        everything = (1 << len(rules)) - 1
+
+        # Type hash map: type -> rules that apply to it (including type-less rules)
+        self.any_type = 0
+        self.by_type = {}
+        for bit, rule in enumerate(rules):
+            if not rule.get('types'):
+                self.any_type |= 1 << bit
+            for t in rule.get('types') or []:
+                self.by_type[t] = self.by_type.get(t, 0) | 1 << bit
+        for t in self.by_type:
+            self.by_type[t] |= self.any_type
+
+        self.paths = _Condition(rules, 'paths', glob_to_regex, fullmatch=True,
+                                bucket_of=_glob_bucket, keys_of=_path_buckets, trusted=True)
+        self.variables = _Condition(rules, 'variables', lambda s: s, fullmatch=False, bucket_of=_regex_literal)
+
+        # Risk score (0-100) -> rules whose [min_risk, max_risk] contains it
+        ranged = 0
+        self.by_risk = [0] * 101
+        for bit, rule in enumerate(rules):
+            low, high = rule.get('min_risk'), rule.get('max_risk')
+            if low is None and high is None:
+                continue
+            ranged |= 1 << bit
+            for score in range(max(0, int(low or 0)), min(100, int(high if high is not None else 100)) + 1):
+                self.by_risk[score] |= 1 << bit
+        self.unranged = everything & ~ranged
+        self.by_risk = [m | self.unranged for m in self.by_risk]
+
+        self.type_actions = {}
+        for t in config.get('warn_types', []):
+            self.type_actions[t] = ('warn', f"{t} detected. Strongly recommend using environment variables.")
+        for t in config.get('block_types', []):
+            self.type_actions[t] = ('block', f"{t} must never be committed to code.")
+        thresholds = config.get('severity_thresholds') or {}
+        self.thresholds = sorted(((thresholds[a], a) for a in ('block', 'warn') if thresholds.get(a) is not None),
+                                 reverse=True)
+        self.enforce_env = config.get('enforce_env', True)
+
+    def _path_mask(self, path):
+        if not path:
+            return self.paths.mask(path)
+        path = normalize_path(path)
+        if not _ABSOLUTE_PATH.match(path):
+            return self.paths.mask(path)
+        # Repository root unknown: an anchored glob may start at any segment
+        parts = path.split('/')
+        mask = 0
+        for i in range(1, len(parts)):
+            mask |= self.paths.mask('/'.join(parts[i:]))
+        return mask
+
+    def evaluate(self, secret_type, path=None, variable=None, risk_score=None):
+        """Returns {'action': 'block'|'warn'|'allow', 'reason': str} (plus 'rule' when a rule decided)."""
+        risk_score = _coerce_score(risk_score)
+        if self.rules:
+            mask = self.by_type.get(secret_type, self.any_type)
+            if mask:
+                mask &= self._path_mask(path)
+            if mask:
+                mask &= self.variables.mask(variable)
+            if mask:
+                if risk_score is None:
+                    mask &= self.unranged
+                else:
+                    mask &= self.by_risk[min(100, max(0, risk_score))]
+            if mask:
+                rule = self.rules[(mask & -mask).bit_length() - 1]
+                return {'action': rule['action'],
+                        'reason': rule.get('reason') or f"Matched policy rule '{rule['id']}'.",
+                        'rule': rule['id']}
+
+        decision = self.type_actions.get(secret_type)
+        if risk_score is not None:
+            for threshold, action in self.thresholds:
+                if risk_score >= threshold:
+                    if decision is None or _STRICTNESS[action] > _STRICTNESS[decision[0]]:
+                        decision = (action, f"Risk score {risk_score} is at or above the {action} threshold ({threshold}).")
+                    break
+        if decision is not None:
+            return {'action': decision[0], 'reason': decision[1]}
+        # Enforce: all secrets should use env vars
+        if self.enforce_env:
+            return {'action': 'warn', 'reason': "All secrets should be stored in environment variables."}
+        return {'action': 'allow', 'reason': "No policy violation."}
+
+class PolicyEngine:
+    """Base policy plus lazily compiled per-repository / per-team override policies."""
+
+    def __init__(self, config):
+        self.config = config
+        self.overrides = config.get('overrides') or {}
+        self._compiled = {}
+        self.base = self.for_scope()
+        # Compile each override once up front so a bad rule fails at load time
+        for repo in self.overrides.get('repos') or {}:
+            self.for_scope(repo=repo)
+        for team in self.overrides.get('teams') or {}:
+            self.for_scope(team=team)
+
+    def for_scope(self, repo=None, team=None):
+        repo_cfg = (self.overrides.get('repos') or {}).get(repo) if repo else None
+        team_cfg = (self.overrides.get('teams') or {}).get(team) if team else None
+        key = (repo if repo_cfg is not None else None, team if team_cfg is not None else None)
+        policy = self._compiled.get(key)
+        if policy is None:
+            config = {k: v for k, v in self.config.items() if k != 'overrides'}
+            rules = list(config.get('rules') or [])
+            for scope in (team_cfg, repo_cfg):
+                if scope:
+                    config.update({k: v for k, v in scope.items() if k != 'rules'})
+                    rules = list(scope.get('rules') or []) + rules
+            config['rules'] = rules
+            policy = self._compiled[key] = CompiledPolicy(config)
+        return policy
+
+    def evaluate(self, secret_type, context=None):
+        context = context or {}
+        policy = self.base if not self.overrides else self.for_scope(context.get('repo'), context.get('team'))
+        return policy.evaluate(secret_type,
+                               context.get('filename') or context.get('file'),
+                               context.get('variable') or context.get('variable_name'),
+                               context.get('risk_score'))
+
+    def evaluate_many(self, findings, context=None):
+        """
+        Decisions for many findings (scanner findings or analyze payloads) in order.
+        Fields read: secret_type/pattern_type, file/filename, variable/variable_name,
+        risk_score, repo, team. `context` supplies defaults (e.g. repo/team for a whole scan).
+        """
+        context = context or {}
+        decisions = []
+        policies = {}
+        for finding in findings:
+            repo = finding.get('repo') or context.get('repo')
+            team = finding.get('team') or context.get('team')
+            policy = policies.get((repo, team))
+            if policy is None:
+                policy = policies[(repo, team)] = self.base if not self.overrides else self.for_scope(repo, team)
+            risk_score = finding.get('risk_score')
+            decisions.append(policy.evaluate(
+                finding.get('secret_type') or finding.get('pattern_type'),
+                finding.get('file') or finding.get('filename') or context.get('filename'),
+                finding.get('variable') or finding.get('variable_name'),
+                risk_score if risk_score is not None else context.get('risk_score')))
+        return decisions
+
+_engines = {}
+
+def get_policy_engine(config_path=None):
+    """Compiled engine for a config file, recompiled when the file changes."""
+    try:
+        stamp = os.stat(config_path).st_mtime_ns if config_path else None
+    except OSError:
+        stamp = None
+    cached = _engines.get(config_path)
+    if cached is None or cached[0] != stamp:
+        try:
+            engine = PolicyEngine(load_policy_config(config_path))
+        except (ValueError, re.error) as e:
+            print(f"[PolicyConfig] Invalid policy rules: {e}. Using default policy.")
+            engine = PolicyEngine(dict(DEFAULT_CONFIG))
+        cached = _engines[config_path] = (stamp, engine)
+    return cached[1]
 
 def check_policy(secret_type, context=None, config_path=None):
     """
     Checks policy for a detected secret type, using optional config file.
     Args:
         secret_type (str): e.g. 'API Key', 'Password', etc.
-        context (dict): Optional, extra info (e.g. filename, variable name)
+        context (dict): Optional, extra info: variable, filename, risk_score, repo, team
         config_path (str): Optional path to policy config JSON
     Returns:
-        dict: { 'action': 'block'|'warn'|'allow', 'reason': str }
-    """
-    config = load_policy_config(config_path)
-    block_types = config.get('block_types', [])
-    warn_types = config.get('warn_types', [])
-    enforce_env = config.get('enforce_env', True)
-
-    # Block: must not be committed
-    if secret_type in block_types:
-        return {'action': 'block', 'reason': f"{secret_type} must never be committed to code."}
-    # Warn: allow override, but recommend env vars
-    elif secret_type in warn_types:
-        return {'action': 'warn', 'reason': f"{secret_type} detected. Strongly recommend using environment variables."}
-    # Enforce: all secrets should use env vars
-    elif enforce_env:
-        return {'action': 'warn', 'reason': "All secrets should be stored in environment variables."}
-    else:
-        return {'action': 'allow', 'reason': "No policy violation."}
+        dict: { 'action': 'block'|'warn'|'allow', 'reason': str } (+ 'rule' id if a rule matched)
+    """
+    return get_policy_engine(config_path).evaluate(secret_type, context)
+
+def evaluate_many(findings, context=None, config_path=None):
+    """Bulk check_policy: one decision dict per finding, in order (see PolicyEngine.evaluate_many)."""
+    return get_policy_engine(config_path).evaluate_many(findings, context)
 
 # Example usage
 if __name__ == "__main__":
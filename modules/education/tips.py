@@ -1,10 +1,23 @@
 import json
 import os
 
+try:
+    from .event_log import EventLogSink, iter_events
+except ImportError:
+    from event_log import EventLogSink, iter_events
+
 # Path for notification history and log files (for dashboard integration)
 NOTIFICATION_HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'notification_history.json')
 LOG_PATH = os.path.join(os.path.dirname(__file__), 'education_log.jsonl')
 
+# Event log sink: file stays open, writes are buffered and the log rotates by size/date
+LOG_MAX_BYTES = int(os.environ.get('DEVSHIELD_EDU_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_ROTATE_DAILY = os.environ.get('DEVSHIELD_EDU_LOG_ROTATE_DAILY', '').lower() == 'true'
+LOG_COMPRESS = os.environ.get('DEVSHIELD_EDU_LOG_COMPRESS', '').lower() == 'true'
+LOG_BACKUP_COUNT = int(os.environ.get('DEVSHIELD_EDU_LOG_BACKUPS', 0))
+_event_sink = EventLogSink(LOG_PATH, max_bytes=LOG_MAX_BYTES, rotate_daily=LOG_ROTATE_DAILY,
+                           compress=LOG_COMPRESS, backup_count=LOG_BACKUP_COUNT)
+
 def load_notification_history():
     """Load notification history from file."""
     if os.path.exists(NOTIFICATION_HISTORY_PATH):
@@ -60,11 +73,24 @@ def log_event(event_type, data):
         "data": data
     }
     try:
-        with open(LOG_PATH, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(entry) + '\n')
+        _event_sink.write(entry)
     except Exception as e:
         print(f"[EducationLog] Failed to log event: {e}")
 
+def flush_event_log():
+    """Flush buffered events to disk (call before reading the log in-process)."""
+    try:
+        _event_sink.flush()
+    except Exception as e:
+        print(f"[EducationLog] Failed to flush log: {e}")
+
+def read_event_log():
+    """
+    Stream logged events (oldest first) across rotated segments, for the dashboard.
+    """
+    flush_event_log()
+    return iter_events(LOG_PATH)
+
 def get_educational_message(secret_type, context=None, language='en'):
     """
     Returns an educational message for the given secret type and language.
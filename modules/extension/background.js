@@ -14,16 +14,46 @@ const DEFAULT_PATTERNS = [
   'password\\s*[:=]\\s*[\"\']?.{8,}[\"\']?'
 ];
 
+// Pattern safety: nested unbounded quantifiers like (a+)+ can backtrack catastrophically,
+// so they are skipped; long pastes are tested in overlapping windows.
+const NESTED_QUANTIFIER = /\((?:[^()\\]|\\.)*(?:[+*]|\{\d+,\})(?:[^()\\]|\\.)*\)\s*(?:[+*]|\{\d+,\})/;
+const MAX_SCAN_LENGTH = 4096;
+const WINDOW_OVERLAP = 256;
+
+function compilePatterns(patterns) {
+  const compiled = [];
+  for (const p of patterns) {
+    if (NESTED_QUANTIFIER.test(p)) {
+      console.warn('[DevShield] Skipping pattern with nested quantifiers:', p);
+      continue;
+    }
+    try {
+      compiled.push(new RegExp(p, 'i'));
+    } catch (e) {
+      console.warn('[DevShield] Skipping invalid pattern:', p, e.message);
+    }
+  }
+  return compiled;
+}
+
+function testCapped(pattern, text) {
+  if (text.length <= MAX_SCAN_LENGTH) return pattern.test(text);
+  for (let offset = 0; offset < text.length; offset += MAX_SCAN_LENGTH - WINDOW_OVERLAP) {
+    if (pattern.test(text.slice(offset, offset + MAX_SCAN_LENGTH))) return true;
+  }
+  return false;
+}
+
 function loadPatterns(callback) {
   if (extAPI && extAPI.storage && extAPI.storage.sync) {
     extAPI.storage.sync.get(['secretPatterns'], function(result) {
       let patterns = result.secretPatterns && Array.isArray(result.secretPatterns) && result.secretPatterns.length > 0
         ? result.secretPatterns : DEFAULT_PATTERNS;
-      SECRET_PATTERNS = patterns.map(p => new RegExp(p, 'i'));
+      SECRET_PATTERNS = compilePatterns(patterns);
       if (callback) callback();
     });
   } else {
-    SECRET_PATTERNS = DEFAULT_PATTERNS.map(p => new RegExp(p, 'i'));
+    SECRET_PATTERNS = compilePatterns(DEFAULT_PATTERNS);
     if (callback) callback();
   }
 }
@@ -55,7 +85,7 @@ async function checkPaste(event, pastedData) {
   let redacted = pastedData;
   let matchedType = 'Secret';
   for (const pattern of SECRET_PATTERNS) {
-    if (pattern.test(pastedData)) {
+    if (testCapped(pattern, pastedData)) {
       found = true;
       redacted = redactSecret(pastedData);
       if (pattern.source.includes('api')) matchedType = 'API Key';
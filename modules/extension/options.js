@@ -48,6 +48,16 @@ document.addEventListener('DOMContentLoaded', function () {
   form.onsubmit = function(e) {
     e.preventDefault();
     const patterns = patternsTextarea.value.split('\n').map(s => s.trim()).filter(Boolean);
+    // Reject invalid patterns and nested unbounded quantifiers like (a+)+ (catastrophic backtracking)
+    const nestedQuantifier = /\((?:[^()\\]|\\.)*(?:[+*]|\{\d+,\})(?:[^()\\]|\\.)*\)\s*(?:[+*]|\{\d+,\})/;
+    for (const p of patterns) {
+      let problem = nestedQuantifier.test(p) ? 'nested quantifier, can hang the browser' : '';
+      try { new RegExp(p, 'i'); } catch (err) { problem = err.message; }
+      if (problem) {
+        statusSpan.textContent = `Not saved: "${p}" (${problem})`;
+        return;
+      }
+    }
     const logToDashboard = document.getElementById('logToDashboard').checked;
     extAPI.storage.sync.set({ secretPatterns: patterns, logToDashboard: logToDashboard }, function() {
       statusSpan.textContent = 'Saved!';
@@ -0,0 +1,173 @@
+"""
+archive_scan.py
+---------------
+Scan committed archives and compressed files (.zip, .jar, .war, .whl,
+.tar, .tar.gz/.tgz, .tar.bz2, .tar.xz, .gz) without extracting them.
+
+Members are read as streams (zipfile/tarfile/gzip), nothing is written to
+disk, and each member gets the same treatment as a file: binary sniffing
+(NUL in the first 8 KB) and a size limit. Text members are fed line by line
+to scan_lines. Findings are reported at `archive!member`, so the console and
+reports show `archive!member:line`; nested archives read
+`outer.zip!lib/inner.jar!config.properties:3`.
+
+Memory stays bounded:
+- tar and gzip streams are read sequentially, never seeked or buffered whole
+- a nested zip (which needs seeking) is held in memory only up to MAX_MEMBER_BYTES
+- nesting stops at MAX_DEPTH
+- at most MAX_ARCHIVE_BYTES are decompressed per top-level archive (zip bombs)
+"""
+
+import io
+import os
+
+ARCHIVE_SUFFIXES = ('.zip', '.jar', '.war', '.ear', '.whl', '.egg', '.nupkg', '.apk',
+                    '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.gz')
+ZIP_SUFFIXES = ('.zip', '.jar', '.war', '.ear', '.whl', '.egg', '.nupkg', '.apk')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+MAX_MEMBER_BYTES = 5 * 1024 * 1024     # per member, as for files and git blobs
+MAX_ARCHIVE_BYTES = 100 * 1024 * 1024  # decompressed bytes per top-level archive
+MAX_DEPTH = 3
+BINARY_SNIFF_BYTES = 8192
+
+
+def is_archive(name):
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class _Budget:
+    """Decompressed bytes left for one top-level archive."""
+
+    def __init__(self, limit):
+        self.remaining = limit
+        self.exhausted = False
+
+    def take(self, want):
+        allowed = min(want, self.remaining)
+        if allowed < want:
+            self.exhausted = True
+        return allowed
+
+
+class _LimitedStream(io.RawIOBase):
+    """Already-read `head` bytes followed by the rest of `stream`, cut off at `limit` or the budget."""
+
+    def __init__(self, head, stream, limit, budget):
+        self._head = head
+        self._stream = stream
+        self._left = limit - len(head)
+        self._budget = budget
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            n = min(len(buffer), len(self._head))
+            buffer[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        want = self._budget.take(min(len(buffer), self._left))
+        if want <= 0:
+            return 0
+        data = self._stream.read(want)
+        n = len(data)
+        buffer[:n] = data
+        self._left -= n
+        self._budget.remaining -= n
+        return n
+
+
+def _read(stream, size, budget):
+    data = stream.read(budget.take(size))
+    budget.remaining -= len(data)
+    return data
+
+
+def _scan_member(stream, location, size, depth, budget, findings, timestamp, baseline, suppress):
+    from cli_scanner import scan_lines
+    if is_archive(location) and depth < MAX_DEPTH:
+        if location.lower().endswith(ZIP_SUFFIXES):
+            # zipfile needs to seek, so a nested zip is buffered, and only when it is small
+            if size is not None and size > MAX_MEMBER_BYTES:
+                return
+            data = _read(stream, MAX_MEMBER_BYTES + 1, budget)
+            if len(data) > MAX_MEMBER_BYTES:
+                return
+            stream = io.BytesIO(data)
+        _scan_stream(stream, location, depth + 1, budget, findings, timestamp, baseline, suppress)
+        return
+    if size is not None and size > MAX_MEMBER_BYTES:
+        return
+    head = _read(stream, BINARY_SNIFF_BYTES, budget)
+    if b'\0' in head:
+        return  # binary member
+    text = io.TextIOWrapper(io.BufferedReader(_LimitedStream(head, stream, MAX_MEMBER_BYTES, budget)),
+                            encoding='utf-8', errors='ignore')
+    findings.extend(scan_lines(text, location, timestamp=timestamp, baseline=baseline, suppress=suppress))
+
+
+def _scan_stream(fileobj, location, depth, budget, findings, timestamp, baseline, suppress):
+    import gzip
+    import tarfile
+    import zipfile
+    import zlib
+    from utils import print_warning
+    name = location.lower()
+    try:
+        if name.endswith(ZIP_SUFFIXES):
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or budget.exhausted:
+                        continue
+                    member = f"{location}!{info.filename}"
+                    if info.file_size > MAX_MEMBER_BYTES and not is_archive(member):
+                        continue
+                    try:
+                        with archive.open(info) as stream:
+                            _scan_member(stream, member, info.file_size, depth, budget, findings, timestamp, baseline,
+                                         suppress)
+                    except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError) as e:
+                        print_warning(f"Could not read {member}: {e}")  # encrypted or unsupported member
+        elif name.endswith(TAR_SUFFIXES):
+            # 'r|*': sequential stream mode, any compression, no seeking
+            with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+                for info in archive:
+                    if not info.isfile() or budget.exhausted:
+                        continue
+                    stream = archive.extractfile(info)
+                    _scan_member(stream, f"{location}!{info.name}", info.size, depth, budget, findings,
+                                 timestamp, baseline, suppress)
+        else:
+            inner = os.path.basename(location.split('!')[-1])[:-len('.gz')] or 'data'
+            with gzip.GzipFile(fileobj=fileobj) as stream:
+                _scan_member(stream, f"{location}!{inner}", None, depth, budget, findings, timestamp, baseline,
+                             suppress)
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError) as e:
+        print_warning(f"Could not read archive {location}: {e}")
+
+
+def scan_archive(source, location=None, timestamp=None, baseline=None, suppress=True):
+    """
+    Scan an archive given as a path or a readable binary file object; returns a list of Finding.
+    `location` names it in findings (default: the path). `timestamp`, `baseline` and `suppress`
+    as for scan_lines.
+    """
+    from utils import print_warning
+    if timestamp is None:
+        from datetime import datetime
+        timestamp = datetime.utcnow().isoformat()
+    findings = []
+    budget = _Budget(MAX_ARCHIVE_BYTES)
+    if isinstance(source, (str, os.PathLike)):
+        location = location or os.fspath(source)
+        try:
+            with open(source, 'rb') as f:
+                _scan_stream(f, location, 0, budget, findings, timestamp, baseline, suppress)
+        except OSError as e:
+            print_warning(f"Could not scan {location}: {e}")
+    else:
+        _scan_stream(source, location, 0, budget, findings, timestamp, baseline, suppress)
+    if budget.exhausted:
+        print_warning(f"{location}: stopped after {MAX_ARCHIVE_BYTES // (1024 * 1024)} MB of decompressed data")
+    return findings
@@ -0,0 +1,195 @@
+"""
+baseline.py
+-----------
+Baseline of accepted findings (test fixtures, sample keys, secrets already
+rotated) that is committed with the repository, so they are not re-flagged,
+re-scored and re-reported on every run.
+
+    python modules/guard/baseline.py update [PATH ...]   # regenerate from tracked files (or PATHs)
+    python modules/guard/baseline.py status
+
+The file is `.devshield-baseline.json` in the repository root (or DEVSHIELD_BASELINE):
+
+    {"version": 1, "salt": "<hex>", "entries": ["<hash>", ...]}
+
+Each entry is HMAC-SHA256(salt, file NUL secret type NUL secret), truncated to
+128 bits. A baselined secret that moves to another file, or is detected by a
+different pattern, is reported again. The salt is random per baseline and
+stored with it, so the team and CI share the file without sharing the per-user
+fingerprint key (fingerprints.py). The file only identifies secrets that
+already sit in the committed tree.
+
+Entries are kept in a set of digests: a check is one HMAC and a set lookup,
+done in scan_lines before a candidate is fingerprinted or scored.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sys
+
+BASELINE_FILE = '.devshield-baseline.json'
+BASELINE_ENV = 'DEVSHIELD_BASELINE'
+DIGEST_BYTES = 16
+
+
+def _normalize(path):
+    path = path.replace('\\', '/')
+    return path[2:] if path.startswith('./') else path
+
+
+class Baseline:
+    """Salted hashes of accepted (file, secret type, secret) triples."""
+
+    def __init__(self, salt=None, entries=(), root=None):
+        self.salt = salt or os.urandom(16)
+        self.entries = set(entries)
+        self.root = root    # absolute paths are matched relative to this directory
+        self.stamp = None   # mtime of the file it was loaded from (see for_directory)
+
+    @classmethod
+    def load(cls, path):
+        """Baseline from `path`, or None if there is no file. Raises ValueError if it is malformed."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        try:
+            return cls(bytes.fromhex(data['salt']), (bytes.fromhex(e) for e in data.get('entries', ())))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f'invalid baseline file {path}: {e}') from e
+
+    def key(self, path, secret_type, secret):
+        if self.root and os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        message = f'{_normalize(path)}\0{secret_type}\0{secret}'.encode('utf-8', 'surrogatepass')
+        return hmac.new(self.salt, message, hashlib.sha256).digest()[:DIGEST_BYTES]
+
+    def contains(self, path, secret_type, secret):
+        return bool(self.entries) and self.key(path, secret_type, secret) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self, path):
+        data = {'version': 1, 'salt': self.salt.hex(), 'entries': sorted(e.hex() for e in self.entries)}
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+            f.write('\n')
+        os.replace(tmp, path)
+
+
+class BaselineRecorder(Baseline):
+    """Passed to scan_lines by `update`: records every candidate instead of suppressing it."""
+
+    def contains(self, path, secret_type, secret):
+        self.entries.add(self.key(path, secret_type, secret))
+        return False
+
+
+def default_path():
+    return os.environ.get(BASELINE_ENV, BASELINE_FILE)
+
+
+def load_default():
+    """The baseline for scans started in this directory, or None (also if it is unreadable)."""
+    from utils import print_warning
+    try:
+        return Baseline.load(default_path())
+    except ValueError as e:
+        print_warning(f"{e}; ignoring it")
+        return None
+
+
+_by_root = {}
+
+
+def for_directory(root):
+    """
+    Baseline of the repository at `root` (an empty one if it has none), cached
+    and reloaded when the file changes. Used by the daemon and fleet scans,
+    which serve many repositories from one process.
+    """
+    path = os.path.join(root, BASELINE_FILE)
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        stamp = None
+    cached = _by_root.get(root)
+    if cached is None or cached.stamp != stamp:
+        baseline = None
+        if stamp is not None:
+            try:
+                baseline = Baseline.load(path)
+            except ValueError as e:
+                from utils import print_warning
+                print_warning(f"{e}; ignoring it")
+        cached = baseline or Baseline()
+        cached.root, cached.stamp = root, stamp
+        _by_root[root] = cached
+    return cached
+
+
+def update(paths=None, baseline_path=None):
+    """
+    Regenerate the baseline from every current finding in `paths` (default: the
+    files tracked by git). The existing salt is kept so unchanged entries stay
+    byte-identical in diffs. Returns the number of entries.
+    """
+    import subprocess
+    from archive_scan import is_archive, scan_archive
+    from cli_scanner import scan_lines
+    baseline_path = baseline_path or default_path()
+    if not paths:
+        result = subprocess.run(['git', 'ls-files', '-z'], capture_output=True, text=True)
+        paths = [p for p in result.stdout.split('\0') if p and os.path.isfile(p)]
+    try:
+        existing = Baseline.load(baseline_path)
+    except ValueError:
+        existing = None
+    recorder = BaselineRecorder(existing.salt if existing else None)
+    for path in paths:
+        if _normalize(path) == _normalize(baseline_path):
+            continue
+        if is_archive(path):
+            scan_archive(path, baseline=recorder)
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        if b'\0' in data[:8192]:
+            continue  # binary
+        scan_lines(data.decode('utf-8', errors='ignore').splitlines(), path, baseline=recorder)
+    Baseline(recorder.salt, recorder.entries).save(baseline_path)
+    return len(recorder)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    from utils import print_success, print_warning
+    command = argv[0] if argv else 'status'
+    if command == 'update':
+        count = update(argv[1:])
+        print_success(f"Baseline {default_path()} written with {count} accepted finding(s).")
+    elif command == 'status':
+        try:
+            baseline = Baseline.load(default_path())
+        except ValueError as e:
+            print_warning(str(e))
+            sys.exit(1)
+        if baseline is None:
+            print(f"No baseline at {default_path()}.")
+        else:
+            print(f"Baseline {default_path()}: {len(baseline)} accepted finding(s).")
+    else:
+        print("usage: baseline.py update [PATH ...] | status")
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
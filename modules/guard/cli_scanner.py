@@ -2,15 +2,16 @@
 cli_scanner.py
 --------------
 CLI tool to scan staged files for secrets using regex and entropy-based detection.
+
+Startup matters here (this runs on every commit): heavier modules (json,
+subprocess, datetime, argparse, the regex engine) are imported where they
+are used, and patterns compile on first use.
 """
 
 
-import re
 import sys
-import subprocess
 import os
-import json
-from datetime import datetime
+import time
 from utils import redact_secret, print_warning, print_success
 
 # Enhanced regex patterns for secrets (API keys, DB, JWT, cloud, etc.)
@@ -43,9 +44,50 @@ SECRET_PATTERNS = [
 # Entropy threshold for random string detection
 ENTROPY_THRESHOLD = 4.0
 
+# Optional user-supplied patterns: JSON list of {"pattern": ..., "label": ...}
+PATTERNS_FILE_ENV = 'DEVSHIELD_PATTERNS_FILE'
+_compiled_patterns = None
+_prefilter = None           # KeywordPrefilter over _compiled_patterns
+_entropy_candidates = None  # compiled findall for entropy-pass candidate words
+_suppressed = None          # fingerprints marked allowed/acknowledged (see fingerprints.py)
+_baseline = False           # repository baseline of accepted findings (see baseline.py); False until loaded
+
+
+def load_custom_patterns(path):
+    """Load user-supplied (pattern, label) pairs from a JSON file."""
+    import json
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return [(e['pattern'], e.get('label', 'Custom Pattern')) for e in entries]
+    except Exception as e:
+        print_warning(f"Could not load custom patterns from {path}: {e}")
+        return []
+
+
+def get_compiled_patterns(patterns_file=None):
+    """
+    Compile SECRET_PATTERNS (plus user patterns) once, with static safety analysis.
+    User-supplied patterns with nested quantifiers are rejected.
+    """
+    global _compiled_patterns, _prefilter, _entropy_candidates
+    if _compiled_patterns is None:
+        import re
+        from pattern_safety import compile_patterns
+        from keyword_prefilter import KeywordPrefilter
+        _entropy_candidates = re.compile(r'[A-Za-z0-9\-_=]{16,}').findall
+        compiled = compile_patterns(SECRET_PATTERNS)
+        patterns_file = patterns_file or os.environ.get(PATTERNS_FILE_ENV)
+        if patterns_file:
+            compiled += compile_patterns(load_custom_patterns(patterns_file), reject_dangerous=True, source='custom')
+        _compiled_patterns = compiled
+        _prefilter = KeywordPrefilter(compiled)
+    return _compiled_patterns
+
 
 def get_staged_files():
     """Get a list of staged files for commit."""
+    import subprocess
     result = subprocess.run(['git', 'diff', '--cached', '--name-only'], capture_output=True, text=True)
     files = result.stdout.strip().split('\n')
     return [f for f in files if f and os.path.isfile(f)]
@@ -64,95 +106,365 @@ def calculate_shannon_entropy(data):
 
 
 
-def scan_file_for_secrets(filepath):
-    """Scan a file for secrets using regex and entropy-based detection."""
+def scan_lines(lines, filepath, stats=None, timestamp=None, baseline=None, suppress=True):
+    """
+    Run regex and entropy detection over an iterable of lines; returns a list of Finding.
+    `timestamp` (ISO string) is shared by every finding; pass one per scan, defaults to now.
+    When `stats` (ScanStats) is given, time spent per pattern and in the entropy pass is recorded.
+    Each finding carries the keyed fingerprint of its secret. A token already reported on the same
+    line by a pattern is not reported again by the entropy pass, and allowed/acknowledged
+    fingerprints are dropped before scoring. So are secrets accepted in `baseline` (default: the
+    baseline file in the current directory, see baseline.py), before they are even fingerprinted.
+    With `suppress=False` the local fingerprint store is not consulted (server-side scans).
+    """
+    global _suppressed, _baseline
+    from fingerprints import fingerprint, get_store
+    from findings import Finding
+    if not suppress:
+        suppressed = ()
+    else:
+        if _suppressed is None:
+            _suppressed = get_store().suppressed()
+        suppressed = _suppressed
+    if baseline is None:
+        if _baseline is False:
+            from baseline import load_default
+            _baseline = load_default()
+        baseline = _baseline
+    if timestamp is None:
+        from datetime import datetime
+        timestamp = datetime.utcnow().isoformat()
+    filepath = sys.intern(filepath)
+    findings = []
+    timer = time.perf_counter
+    patterns = get_compiled_patterns()
+    candidates = _prefilter.candidates
+    for i, line in enumerate(lines, 1):
+        line_fingerprints = set()
+        # Keyword prefilter: only patterns whose keyword occurs on this line run, from just before it
+        if stats is not None:
+            start = timer()
+        hits = candidates(line)
+        if stats is not None:
+            stats.add_pattern('(keyword prefilter)', timer() - start, 0)
+        # Regex-based detection (safety layer caps long lines and enforces a time budget)
+        for idx, pattern in enumerate(patterns):
+            pos = hits.get(idx)
+            if pos is None:
+                continue
+            label = pattern.label
+            if stats is not None:
+                start = timer()
+                found = len(findings)
+            for secret, _, _ in pattern.finditer(line, f"{filepath}:{i}", pos):
+                if baseline is not None and baseline.contains(filepath, label, secret):
+                    continue
+                fp = fingerprint(secret)
+                if fp in suppressed or fp in line_fingerprints:
+                    continue
+                line_fingerprints.add(fp)
+                entropy = calculate_shannon_entropy(secret)
+                findings.append(Finding(timestamp, filepath, i, label, redact_secret(secret),
+                                        entropy, int(min(entropy * 20, 100)), fp))
+            if stats is not None:
+                stats.add_pattern(label, timer() - start, len(findings) - found)
+        # Entropy-based detection (for long strings)
+        if stats is not None:
+            start = timer()
+            found = len(findings)
+        words = _entropy_candidates(line)
+        for word in words:
+            entropy = calculate_shannon_entropy(word)
+            if entropy > ENTROPY_THRESHOLD:
+                if baseline is not None and baseline.contains(filepath, 'High-entropy string', word):
+                    continue
+                fp = fingerprint(word)
+                if fp in suppressed or fp in line_fingerprints:
+                    continue
+                line_fingerprints.add(fp)
+                findings.append(Finding(timestamp, filepath, i, 'High-entropy string', redact_secret(word),
+                                        entropy, int(min(entropy * 20, 100)), fp))
+        if stats is not None:
+            stats.add_entropy(timer() - start, len(words), len(findings) - found)
+    return findings
+
+
+def scan_file_for_secrets(filepath, stats=None, timestamp=None, baseline=None):
+    """
+    Scan a file for secrets using regex and entropy-based detection (see scan_lines for `baseline`).
+    Archives (.zip, .jar, .whl, .tar.gz, .gz, ...) are scanned member by member, see archive_scan.py.
+    """
     findings = []
+    start = time.perf_counter()
+    lines = []
+    from archive_scan import is_archive
+    if is_archive(filepath):
+        from archive_scan import scan_archive
+        findings = scan_archive(filepath, timestamp=timestamp, baseline=baseline)
+        if stats is not None:
+            stats.add_file(filepath, time.perf_counter() - start, os.path.getsize(filepath), 0, len(findings))
+        return findings
     try:
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             lines = f.readlines()
-        for i, line in enumerate(lines, 1):
-            # Regex-based detection
-            for pattern, label in SECRET_PATTERNS:
-                for match in re.finditer(pattern, line):
-                    secret = match.group(1) if match.groups() else match.group(0)
-                    entropy = calculate_shannon_entropy(secret)
-                    findings.append({
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'file': filepath,
-                        'line': i,
-                        'secret_type': label,
-                        'redacted': redact_secret(secret),
-                        'entropy': entropy,
-                        'risk_score': int(min(entropy * 20, 100))
-                    })
-            # Entropy-based detection (for long strings)
-            for word in re.findall(r'[A-Za-z0-9\-_=]{16,}', line):
-                entropy = calculate_shannon_entropy(word)
-                if entropy > ENTROPY_THRESHOLD:
-                    findings.append({
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'file': filepath,
-                        'line': i,
-                        'secret_type': 'High-entropy string',
-                        'redacted': redact_secret(word),
-                        'entropy': entropy,
-                        'risk_score': int(min(entropy * 20, 100))
-                    })
+        findings = scan_lines(lines, filepath, stats, timestamp, baseline)
     except Exception as e:
         print_warning(f"Could not scan {filepath}: {e}")
+    if stats is not None:
+        stats.add_file(filepath, time.perf_counter() - start, sum(len(l) for l in lines), len(lines), len(findings))
     return findings
 
 
 
+def report_findings(findings, clean_message="No secrets detected in staged files. Safe to commit."):
+    """
+    Print findings, append them to devshield_scan.log and return True if any were found.
+    `findings` is an iterable of findings or a FindingSummary that was filled while scanning.
+    `clean_message` is printed when there are none.
+    Occurrences of the same secret (same fingerprint) are reported once with their locations;
+    allowed/acknowledged fingerprints are skipped. Occurrences are merged into the fingerprint store.
+    """
+    from fingerprints import FindingSummary, get_store
+    store = get_store()
+    summary = findings if isinstance(findings, FindingSummary) else FindingSummary(store).add(findings)
+    if summary.groups:
+        summary.record(store)
+        store.save()
+        print_warning("\nPotential secrets detected:")
+        # Log findings to file
+        with open('devshield_scan.log', 'a', encoding='utf-8') as logf:
+            for fp, group in summary.groups.items():
+                finding = group['first']
+                log_line = (
+                    f"[{finding['timestamp']}] {finding['file']}:{finding['line']} "
+                    f"[{finding['secret_type']}] {finding['redacted']} "
+                    f"(Entropy: {finding['entropy']:.2f}, Risk: {finding['risk_score']}) "
+                    f"[fp:{fp[:12]}]"
+                )
+                if group['others']:
+                    more = group['total'] - 1 - len(group['others'])
+                    log_line += f" also at {', '.join(group['others'])}" + (f", +{more} more" if more else '')
+                logf.write(log_line + '\n')
+                print_warning(log_line)
+        print_warning("\nPlease remove secrets before committing. "
+                      "To accept a known secret: cli_scanner.py --acknowledge <fp>")
+        return True
+    print_success(clean_message)
+    return False
+
+
+def set_fingerprint_status(prefixes, status):
+    """Resolve fingerprint prefixes against the store and set their status. Returns False on an unknown/ambiguous prefix."""
+    from fingerprints import get_store
+    store = get_store()
+    resolved = []
+    for prefix in prefixes:
+        matches = [fp for fp in store.records if fp.startswith(prefix)]
+        if len(matches) != 1:
+            print_warning(f"Fingerprint '{prefix}' is {'ambiguous' if matches else 'unknown'}.")
+            return False
+        resolved.append(matches[0])
+    store.set_status(resolved, status)
+    store.save()
+    for fp in resolved:
+        print_success(f"{fp}: {status}")
+    return True
+
+
 def main():
     """Main entry point for CLI scanner."""
     import argparse
     parser = argparse.ArgumentParser(description="DevShield CLI Scanner")
-    parser.add_argument('--report', type=str, help='Output scan report to file (JSON or HTML)')
-    parser.add_argument('--format', type=str, choices=['json', 'html'], default='json', help='Report format (json/html)')
+    parser.add_argument('--report', type=str,
+                        help='Stream a scan report to this file ("-" for stdout; messages then go to stderr)')
+    parser.add_argument('--format', type=str, choices=['json', 'jsonl', 'html', 'sarif'],
+                        help='Report format (default: from the --report extension, else json)')
+    parser.add_argument('--patterns-file', type=str, help='JSON file with extra patterns [{"pattern": ..., "label": ...}]')
+    parser.add_argument('--stats', action='store_true', help='Print per-pattern/per-file timing statistics')
+    parser.add_argument('--stats-json', type=str, help='Write timing statistics as JSON to this file')
+    parser.add_argument('--profile', type=str, help='Write a cProfile/pstats dump of the scan to this file')
+    parser.add_argument('--acknowledge', nargs='+', metavar='FP',
+                        help='Mark fingerprints (or unique prefixes) as acknowledged; they are no longer reported')
+    parser.add_argument('--allow-fingerprint', nargs='+', metavar='FP',
+                        help='Mark fingerprints (or unique prefixes) as allowed (e.g. test fixtures)')
+    parser.add_argument('--watch', nargs='?', const='.', metavar='DIR',
+                        help='Watch DIR (default: current directory) and stream finding changes as JSON Lines')
+    parser.add_argument('--watch-output', type=str, help='Append the watch stream to this file instead of stdout')
+    parser.add_argument('--debounce', type=float, default=0.3, help='Seconds of quiet before re-scanning (watch mode)')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Polling interval when watchdog is not installed (watch mode)')
+    parser.add_argument('--fleet', type=str, metavar='REPOS_FILE',
+                        help='Scan the git history of every repository listed in REPOS_FILE (one path per line)')
+    parser.add_argument('--since', type=str, metavar='SHA',
+                        help='Scan only blobs added in SHA..HEAD instead of staged files (CI mode)')
+    parser.add_argument('--state-file', type=str,
+                        help='CI mode: read the last scanned commit from this file and record HEAD after each scan. '
+                             'Fleet mode: checkpoint file (default: .devshield-fleet.json)')
+    parser.add_argument('--workers', type=int, help='Repositories scanned in parallel (fleet mode)')
+    parser.add_argument('--repo-budget', type=float, default=900.0,
+                        help='Seconds per repository per run before it is checkpointed and resumed later (fleet mode)')
     args = parser.parse_args()
 
+    if args.acknowledge or args.allow_fingerprint:
+        sys.exit(0 if set_fingerprint_status(args.acknowledge or [], 'acknowledged') and
+                 set_fingerprint_status(args.allow_fingerprint or [], 'allowed') else 1)
+
+    if args.watch:
+        get_compiled_patterns(args.patterns_file)
+        from watch_mode import watch
+        watch(args.watch, args.watch_output, args.debounce, args.poll_interval)
+        sys.exit(0)
+
+    scan = scan_staged
+    if args.fleet:
+        if args.stats or args.stats_json or args.profile:
+            parser.error('--stats, --stats-json and --profile are not supported with --fleet '
+                         '(repositories are scanned in worker processes)')
+        from fleet_scan import main as scan
+    elif args.since or args.state_file:
+        scan = scan_range
+    if args.report == '-':
+        # The report owns stdout; human-readable output moves to stderr
+        import contextlib
+        report_stream = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            scan(args, report_stream)
+    else:
+        scan(args)
+
+
+def _start_instrumentation(args):
+    """ScanStats and a running cProfile.Profile for --stats/--stats-json/--profile (None when not asked for)."""
+    stats = profiler = None
+    if args.stats or args.stats_json:
+        from scan_stats import ScanStats
+        stats = ScanStats()
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return stats, profiler
+
+
+def _finish_instrumentation(args, stats, profiler):
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print_success(f"Profile written to {args.profile} (view with: python -m pstats {args.profile})")
+    if stats is not None:
+        if args.stats:
+            print(stats.format_text())
+        if args.stats_json:
+            stats.write_json(args.stats_json)
+            print_success(f"Scan stats written to {args.stats_json} (JSON)")
+
+
+def _open_report(args, report_stream=None):
+    """Streaming report writer for --report/--format, or None."""
+    patterns = get_compiled_patterns(args.patterns_file)
+    if not args.report:
+        return None
+    from report_writers import open_writer, infer_format
+    return open_writer(args.report, args.format or infer_format(args.report),
+                       rules=[p.label for p in patterns] + ['High-entropy string'], stream=report_stream)
+
+
+def _close_report(args, writer):
+    if writer is not None:
+        writer.close()
+        if args.report != '-':
+            from report_writers import infer_format
+            fmt = args.format or infer_format(args.report)
+            print_success(f"Scan report written to {args.report} ({fmt.upper()}, {writer.count} findings)")
+
+
+def scan_range(args, report_stream=None):
+    """
+    CI mode: scan only the blobs added since a commit, then exit.
+    The start is --since, else the high-water mark in --state-file (whole history if neither).
+    Every commit in since..HEAD is covered and each unique blob is scanned once, so the work
+    follows the size of the change. HEAD is recorded in --state-file after every completed scan
+    (`last_commit`), so the next run only covers newer commits; findings fail the run that
+    introduces them. `last_clean` additionally records HEAD after a scan with no findings.
+    """
+    import json
+    from datetime import datetime
+    from fingerprints import FindingSummary, get_store
+    from git_blobs import BlobReader, GitError, git, list_new_blobs, resolve_commit, scan_blobs
+    state = {}
+    if args.state_file and os.path.exists(args.state_file):
+        with open(args.state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    head = resolve_commit('.', 'HEAD')
+    if head is None:
+        print_warning("Not a git repository or no commits yet; nothing to scan.")
+        sys.exit(0)
+    since = args.since or state.get('last_commit')
+    if since:
+        resolved = resolve_commit('.', since)
+        if resolved is None:
+            print_warning(f"Commit {since} not found (rewritten history or shallow clone?); "
+                          f"scanning everything reachable from HEAD.")
+        since = resolved
+    writer = _open_report(args, report_stream)
+    stats, profiler = _start_instrumentation(args)
+    timestamp = datetime.utcnow().isoformat()
+    summary = FindingSummary(get_store())  # only what the final report needs, not every finding
+    try:
+        blobs = [] if since == head else list_new_blobs('.', head, since)
+        commits = git('.', 'rev-list', '--count', head, *([f'^{since}'] if since else []))
+        scanned = skipped = 0
+        with BlobReader('.') as reader:
+            for blob in blobs:
+                findings, counts = scan_blobs(reader, [blob], timestamp, stats=stats)
+                scanned += counts['scanned']
+                skipped += counts['skipped']
+                if writer is not None:
+                    writer.write_many(findings)
+                summary.add(findings)
+    except GitError as e:
+        print_warning(f"Could not scan commit range: {e}")
+        sys.exit(2)
+    finally:
+        _close_report(args, writer)
+    _finish_instrumentation(args, stats, profiler)
+    print_success(f"Scanned {scanned} new blob(s) ({skipped} binary/oversized skipped) from {commits} commit(s) "
+                  f"since {since[:12] if since else 'the first commit'}.")
+    commit_range = f"{since[:12]}..{head[:12]}" if since else f"the history of {head[:12]}"
+    found = report_findings(summary, f"No secrets detected in {commit_range}.")
+    if args.state_file:
+        state.update(last_commit=head, updated=timestamp)
+        if not found:
+            state['last_clean'] = head
+        tmp = f'{args.state_file}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, args.state_file)
+        print_success(f"Recorded {head[:12]} in {args.state_file}.")
+    sys.exit(1 if found else 0)
+
+
+def scan_staged(args, report_stream=None):
+    """Scan staged files, streaming findings to the report writer as each file completes, then exit."""
     staged_files = get_staged_files()
     if not staged_files:
         print_success("No staged files to scan.")
         sys.exit(0)
-    all_findings = []
+    writer = _open_report(args, report_stream)
+    stats, profiler = _start_instrumentation(args)
+    from datetime import datetime
+    from fingerprints import FindingSummary, get_store
+    timestamp = datetime.utcnow().isoformat()  # one per scan, shared by all findings
+    summary = FindingSummary(get_store())  # only what the final report needs, not every finding
     for file in staged_files:
-        findings = scan_file_for_secrets(file)
-        all_findings.extend(findings)
-
-    # Output report if requested
-    if args.report:
-        if args.format == 'json':
-            with open(args.report, 'w', encoding='utf-8') as f:
-                json.dump(all_findings, f, indent=2)
-            print_success(f"Scan report written to {args.report} (JSON)")
-        elif args.format == 'html':
-            with open(args.report, 'w', encoding='utf-8') as f:
-                f.write('<html><head><title>DevShield Scan Report</title></head><body>')
-                f.write('<h2>DevShield Scan Report</h2><table border="1"><tr><th>Timestamp</th><th>File</th><th>Line</th><th>Type</th><th>Redacted</th><th>Entropy</th><th>Risk Score</th></tr>')
-                for finding in all_findings:
-                    f.write(f"<tr><td>{finding['timestamp']}</td><td>{finding['file']}</td><td>{finding['line']}</td><td>{finding['secret_type']}</td><td>{finding['redacted']}</td><td>{finding['entropy']:.2f}</td><td>{finding['risk_score']}</td></tr>")
-                f.write('</table></body></html>')
-            print_success(f"Scan report written to {args.report} (HTML)")
-
-    if all_findings:
-        print_warning("\nPotential secrets detected:")
-        # Log findings to file
-        with open('devshield_scan.log', 'a', encoding='utf-8') as logf:
-            for finding in all_findings:
-                log_line = (
-                    f"[{finding['timestamp']}] {finding['file']}:{finding['line']} "
-                    f"[{finding['secret_type']}] {finding['redacted']} "
-                    f"(Entropy: {finding['entropy']:.2f}, Risk: {finding['risk_score']})\n"
-                )
-                logf.write(log_line)
-                print_warning(log_line.strip())
-        print_warning("\nPlease remove secrets before committing.")
-        sys.exit(1)
-    else:
-        print_success("No secrets detected in staged files. Safe to commit.")
-        sys.exit(0)
+        findings = scan_file_for_secrets(file, stats, timestamp)
+        if writer is not None:
+            writer.write_many(findings)
+        summary.add(findings)
+    _close_report(args, writer)
+    _finish_instrumentation(args, stats, profiler)
+
+    sys.exit(1 if report_findings(summary) else 0)
 
 
 if __name__ == "__main__":
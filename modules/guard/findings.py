@@ -0,0 +1,62 @@
+"""
+findings.py
+-----------
+Compact finding types for the scanner.
+
+`Finding` stores its fields in `__slots__` (no per-instance dict) and is a
+read-only Mapping, so existing code that does `finding['file']`, `dict(finding)`
+or `{**finding}` keeps working. `to_dict()` returns the report shape used by
+the JSON/HTML reports and the log:
+
+    {timestamp, file, line, secret_type, redacted, entropy, risk_score, fingerprint}
+
+File names and secret types are interned. The timestamp string is created
+once per scan and shared by every finding of that scan.
+"""
+
+from collections.abc import Mapping
+
+FIELDS = ('timestamp', 'file', 'line', 'secret_type', 'redacted', 'entropy', 'risk_score', 'fingerprint')
+
+
+class Finding(Mapping):
+    __slots__ = FIELDS
+
+    def __init__(self, timestamp, file, line, secret_type, redacted, entropy, risk_score, fingerprint=None):
+        self.timestamp = timestamp
+        self.file = file
+        self.line = line
+        self.secret_type = secret_type
+        self.redacted = redacted
+        self.entropy = entropy
+        self.risk_score = risk_score
+        self.fingerprint = fingerprint
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def replace(self, **changes):
+        """Copy with some fields changed (e.g. file or timestamp)."""
+        values = {k: getattr(self, k) for k in FIELDS}
+        values.update(changes)
+        return Finding(**values)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in FIELDS}
+
+    def __repr__(self):
+        return f"Finding({self.file}:{self.line} {self.secret_type} {self.redacted})"
+
+
+def to_dicts(findings):
+    """Report/JSON shape for a list of Finding objects or plain dicts."""
+    return [f.to_dict() if isinstance(f, Finding) else dict(f) for f in findings]
+
@@ -0,0 +1,189 @@
+"""
+fingerprints.py
+---------------
+Secret fingerprints: a keyed hash (HMAC-SHA256) of the raw secret, used to
+collapse repeated occurrences of the same credential within a scan and across
+scans. The raw secret is never stored; without the key, a fingerprint cannot
+be checked against guessed values.
+
+- Key: DEVSHIELD_FINGERPRINT_KEY, or a random key created on first use in
+  ~/.devshield/fingerprint.key (owner-only).
+- Store: ~/.devshield/fingerprints.json (DEVSHIELD_FINGERPRINT_STORE). It records
+  per fingerprint the secret type, first/last seen, a count of distinct
+  "file:line" locations (re-scanning the same code does not raise it), the
+  set of locations counted so far as short hashes ("seen"), a short list of
+  recent "file:line" locations and a status: "new", "allowed"
+  or "acknowledged". Allowed and acknowledged fingerprints are dropped before
+  scoring and logging.
+"""
+
+import hashlib
+import hmac
+import os
+
+DEVSHIELD_DIR = os.path.join(os.path.expanduser('~'), '.devshield')
+KEY_PATH = os.path.join(DEVSHIELD_DIR, 'fingerprint.key')
+STORE_PATH = os.environ.get('DEVSHIELD_FINGERPRINT_STORE', os.path.join(DEVSHIELD_DIR, 'fingerprints.json'))
+FINGERPRINT_LENGTH = 32     # hex chars (128 bits)
+MAX_OCCURRENCES = 20        # locations listed per fingerprint; "seen" and the count cover all of them
+LOCATION_KEY_BYTES = 6      # hashed "file:line" entries in "seen"
+SUPPRESSED_STATUSES = ('allowed', 'acknowledged')
+
+_key = None
+
+
+def _load_key():
+    env_key = os.environ.get('DEVSHIELD_FINGERPRINT_KEY')
+    if env_key:
+        return env_key.encode('utf-8')
+    try:
+        with open(KEY_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(DEVSHIELD_DIR, mode=0o700, exist_ok=True)
+    key = os.urandom(32)
+    try:
+        fd = os.open(KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:  # another process created it first
+        with open(KEY_PATH, 'rb') as f:
+            return f.read()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def location_key(location):
+    """Short hash of a "file:line" location, as kept in a record's "seen" set."""
+    return hashlib.blake2b(location.encode('utf-8', 'surrogatepass'), digest_size=LOCATION_KEY_BYTES).hexdigest()
+
+
+def seen_keys(rec):
+    """Location keys already counted for a record (records written before "seen" existed use their list)."""
+    if rec is None:
+        return set()
+    seen = rec.get('seen')
+    return set(seen) if seen is not None else {location_key(loc) for loc in rec.get('occurrences', ())}
+
+
+def fingerprint(secret):
+    """Keyed fingerprint of a raw secret (hex string)."""
+    global _key
+    if _key is None:
+        _key = _load_key()
+    return hmac.new(_key, secret.encode('utf-8', 'surrogatepass'), hashlib.sha256).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class FingerprintStore:
+    """Persistent fingerprint records (JSON). Loaded lazily, written atomically."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._records = None
+
+    @property
+    def records(self):
+        if self._records is None:
+            import json
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._records = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._records = {}
+        return self._records
+
+    def suppressed(self):
+        """Fingerprints whose findings should be dropped (allowed or acknowledged)."""
+        return {fp for fp, rec in self.records.items() if rec.get('status') in SUPPRESSED_STATUSES}
+
+    def set_status(self, fingerprints, status):
+        """Mark fingerprints allowed/acknowledged/new. Unknown fingerprints are added."""
+        for fp in fingerprints:
+            self.records.setdefault(fp, {'count': 0, 'occurrences': []})['status'] = status
+
+    def merge(self, fp, secret_type, locations, keys, timestamp):
+        """
+        Merge one fingerprint's result from a scan: `locations` are its most recent distinct
+        "file:line" locations, `keys` the location_key of every location it was found at
+        (or at least of those not yet seen). Only keys missing from "seen" raise the count.
+        """
+        rec = self.records.setdefault(fp, {'count': 0, 'occurrences': []})
+        rec.setdefault('status', 'new')
+        rec['secret_type'] = secret_type
+        rec.setdefault('first_seen', timestamp)
+        rec['last_seen'] = timestamp
+        seen = seen_keys(rec)
+        added = keys - seen
+        rec['count'] += len(added)
+        rec['seen'] = sorted(seen | added)
+        current = set(locations)
+        merged = [loc for loc in rec['occurrences'] if loc not in current] + list(locations)
+        rec['occurrences'] = merged[-MAX_OCCURRENCES:]
+
+    def save(self):
+        if self._records is None:
+            return
+        import json
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._records, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = FingerprintStore()
+    return _store
+
+
+class FindingSummary:
+    """
+    Per-fingerprint summary of a scan, built as findings stream in so the findings
+    themselves need not be kept: the first finding, the occurrence total, the next
+    few locations (for the report), the most recent MAX_OCCURRENCES distinct
+    locations and the keys (location_key) of locations `store` has not counted yet.
+    Suppressed fingerprints are dropped. Groups are in first-seen order.
+    """
+
+    def __init__(self, store, shown=5):
+        self.suppressed = store.suppressed()
+        self.records = store.records
+        self.shown = shown
+        self.groups = {}
+        self.timestamp = None
+
+    def add(self, findings):
+        for finding in findings:
+            fp = finding.get('fingerprint')
+            if fp is None or fp in self.suppressed:
+                continue
+            location = f"{finding['file']}:{finding['line']}"
+            group = self.groups.get(fp)
+            if group is None:
+                rec = self.records.get(fp)
+                group = self.groups[fp] = {'first': finding, 'total': 0, 'others': [], 'recent': {}, 'new': set(),
+                                           'known': seen_keys(rec)}
+                self.timestamp = self.timestamp or finding['timestamp']
+            elif len(group['others']) < self.shown:
+                group['others'].append(location)
+            group['total'] += 1
+            recent = group['recent']
+            recent.pop(location, None)
+            recent[location] = None
+            if len(recent) > MAX_OCCURRENCES:
+                del recent[next(iter(recent))]
+            key = location_key(location)
+            if key not in group['known']:
+                group['new'].add(key)
+        return self
+
+    def record(self, store):
+        """Merge the summary into `store` (the one it was created from)."""
+        for fp, group in self.groups.items():
+            store.merge(fp, group['first']['secret_type'], list(group['recent']), group['new'], self.timestamp)
@@ -0,0 +1,233 @@
+"""
+fleet_scan.py
+-------------
+`cli_scanner.py --fleet REPOS_FILE`: scan the git history of many local
+repositories in one run.
+
+- Repositories are scheduled over a bounded pool of worker processes
+  (`--workers`). Each repository is scanned in chunks of blobs, one chunk in
+  flight at a time, so results arrive in order.
+- Each repository gets a time budget (`--repo-budget` seconds). Workers stop
+  at the next blob once it runs out; the repository is checkpointed as
+  `partial` after the last blob finished and the pool moves on.
+- Progress is checkpointed to a JSON state file (`--state-file`) after every
+  chunk: the last commit fully scanned, the commit being scanned towards and
+  the last blob finished. An interrupted or over-budget run picks up where it
+  stopped, and the next night's run only scans blobs added since `last_commit`.
+- Findings from all repositories are streamed into one report (`--report`,
+  any report_writers format) as chunks complete. Each finding's file is
+  `<repo name>/<path>`, and `repo` holds the repository path. The name is the
+  directory name, prefixed with its parent directory when several
+  repositories in the list share it.
+
+State file layout:
+
+    {"version": 1, "repos": {"/srv/git/api": {"last_commit": "...", "target": null, "cursor": null,
+                                              "status": "done", "blobs_scanned": 1234, "findings": 2, ...}}}
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from git_blobs import MAX_BLOB_BYTES, BlobReader, GitError, list_new_blobs, resolve_commit, scan_blobs
+from utils import print_success, print_warning
+
+STATE_FILE = '.devshield-fleet.json'
+REPO_BUDGET = 900.0  # seconds per repository per run
+CHUNK_BLOBS = 500    # blobs per worker task (and per checkpoint)
+
+
+def read_repo_list(path):
+    """Repository paths, one per line; blank lines and # comments are ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class FleetState:
+    """Per-repository checkpoints, rewritten atomically after every change."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {'version': 1, 'repos': {}}
+
+    def get(self, repo):
+        return self.data['repos'].setdefault(repo, {})
+
+    def update(self, repo, **fields):
+        from datetime import datetime
+        self.get(repo).update(fields, updated=datetime.utcnow().isoformat())
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+# --- worker tasks ---
+
+def _init_worker(patterns_file):
+    from cli_scanner import get_compiled_patterns
+    get_compiled_patterns(patterns_file)
+
+
+def _plan(repo, last_commit, target, cursor):
+    """Resolve the commit range for `repo` and list the blobs still to scan."""
+    if target is None or resolve_commit(repo, target) is None:
+        target, cursor = resolve_commit(repo, 'HEAD'), None
+        if target is None:
+            raise GitError(f'{repo} is not a git repository or has no commits')
+    if last_commit and resolve_commit(repo, last_commit) is None:
+        last_commit, cursor = None, None  # history was rewritten: scan it all again
+    blobs = [] if last_commit == target else list_new_blobs(repo, target, last_commit)
+    if cursor:
+        blobs = [b for b in blobs if b[0] > cursor]
+    return last_commit, target, blobs
+
+
+def _scan_chunk(repo, name, blobs, timestamp, max_bytes, deadline):
+    from baseline import for_directory
+    with BlobReader(repo) as reader:
+        # Each repository's own baseline applies to its blobs
+        findings, stats = scan_blobs(reader, blobs, timestamp, f'{name}/', max_bytes, for_directory(repo), deadline)
+    return [dict(f.to_dict(), repo=repo) for f in findings], stats
+
+
+def _repo_names(repos):
+    """
+    Report name per repository path: its directory name, or parent/name when that
+    is shared, plus a short hash of the path if even that collides.
+    """
+    def parts(repo):
+        head, name = os.path.split(repo.rstrip('/\\'))
+        return name or repo, os.path.basename(head)
+    short = {}
+    for repo in repos:
+        short.setdefault(parts(repo)[0], []).append(repo)
+    names = {}
+    for name, group in short.items():
+        for repo in group:
+            names[repo] = name if len(group) == 1 else f'{parts(repo)[1]}/{name}'
+    counts = {}
+    for name in names.values():
+        counts[name] = counts.get(name, 0) + 1
+    for repo, name in names.items():
+        if counts[name] > 1:
+            names[repo] = f"{name}-{hashlib.sha1(repo.encode('utf-8')).hexdigest()[:8]}"
+    return names
+
+
+class _RepoJob:
+    __slots__ = ('repo', 'name', 'started', 'blobs', 'pos', 'target', 'findings')
+
+    def __init__(self, repo, name):
+        self.repo = repo
+        self.name = name
+        self.started = time.monotonic()
+        self.blobs = None
+        self.pos = 0
+        self.target = None
+        self.findings = 0
+
+
+def run_fleet(repos, state_path=STATE_FILE, writer=None, workers=None, budget=REPO_BUDGET,
+              chunk_size=CHUNK_BLOBS, max_bytes=MAX_BLOB_BYTES, patterns_file=None):
+    """
+    Scan `repos`, resuming from the checkpoints in `state_path`, streaming findings to `writer`.
+    Returns {'findings': n, 'done': n, 'partial': n, 'error': n, 'interrupted': bool}.
+    """
+    from datetime import datetime
+    state = FleetState(state_path)
+    timestamp = datetime.utcnow().isoformat()
+    workers = workers or min(4, os.cpu_count() or 1)
+    queue = list(dict.fromkeys(os.path.abspath(r) for r in repos))
+    names = _repo_names(queue)
+    queue.reverse()  # pop() from the end keeps the list order
+    summary = {'findings': 0, 'done': 0, 'partial': 0, 'error': 0, 'interrupted': False}
+    running = {}
+
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(patterns_file,))
+
+    def next_chunk(job):
+        if job.pos >= len(job.blobs):
+            state.update(job.repo, last_commit=job.target, target=None, cursor=None, status='done')
+            summary['done'] += 1
+            print_success(f"[Fleet] {job.name}: done, {job.findings} finding(s)")
+        elif job.pos and time.monotonic() - job.started > budget:  # always make some progress
+            state.update(job.repo, status='partial')
+            summary['partial'] += 1
+            print_warning(f"[Fleet] {job.name}: time budget ({budget:g}s) used up with "
+                          f"{len(job.blobs) - job.pos} blob(s) left; the next run resumes here")
+        else:
+            chunk = job.blobs[job.pos:job.pos + chunk_size]
+            deadline = time.time() + budget - (time.monotonic() - job.started)  # wall clock, read in the worker
+            running[executor.submit(_scan_chunk, job.repo, job.name, chunk, timestamp, max_bytes, deadline)] = job
+
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                repo = queue.pop()
+                job = _RepoJob(repo, names[repo])
+                saved = state.get(job.repo)
+                running[executor.submit(_plan, job.repo, saved.get('last_commit'), saved.get('target'),
+                                        saved.get('cursor'))] = job
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    state.update(job.repo, status='error', error=str(e))
+                    summary['error'] += 1
+                    print_warning(f"[Fleet] {job.name}: {e}")
+                    continue
+                if job.blobs is None:
+                    last_commit, job.target, job.blobs = result
+                    state.update(job.repo, last_commit=last_commit, target=job.target, status='running', error=None)
+                else:
+                    findings, stats = result
+                    job.pos += stats['scanned'] + stats['skipped']  # fewer than the chunk if the deadline passed
+                    job.findings += len(findings)
+                    summary['findings'] += len(findings)
+                    if writer is not None:
+                        writer.write_many(findings)
+                    saved = state.get(job.repo)
+                    state.update(job.repo, cursor=stats['last'],
+                                 blobs_scanned=saved.get('blobs_scanned', 0) + stats['scanned'],
+                                 findings=saved.get('findings', 0) + len(findings))
+                next_chunk(job)
+    except KeyboardInterrupt:
+        summary['interrupted'] = True
+        print_warning(f"[Fleet] Interrupted; progress is saved in {state_path}, run again to resume")
+    finally:
+        executor.shutdown(wait=not summary['interrupted'], cancel_futures=True)
+    return summary
+
+
+def main(args, report_stream=None):
+    """Entry point for `cli_scanner.py --fleet`; exits 1 if anything was found, 2 if a repository failed."""
+    from cli_scanner import get_compiled_patterns
+    repos = read_repo_list(args.fleet)
+    writer = None
+    if args.report:
+        from report_writers import open_writer, infer_format
+        patterns = get_compiled_patterns(args.patterns_file)
+        writer = open_writer(args.report, args.format or infer_format(args.report),
+                             rules=[p.label for p in patterns] + ['High-entropy string'], stream=report_stream)
+    try:
+        summary = run_fleet(repos, args.state_file or STATE_FILE, writer, args.workers,
+                            args.repo_budget, patterns_file=args.patterns_file)
+    finally:
+        if writer is not None:
+            writer.close()
+    print_success(f"[Fleet] {len(repos)} repositories: {summary['done']} done, {summary['partial']} partial, "
+                  f"{summary['error']} failed, {summary['findings']} finding(s)")
+    if summary['error'] or summary['interrupted']:
+        sys.exit(2)
+    sys.exit(1 if summary['findings'] else 0)
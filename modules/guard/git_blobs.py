@@ -0,0 +1,222 @@
+"""
+git_blobs.py
+------------
+Scan git objects instead of the working tree, for history, fleet and CI
+range scans. Content is read straight from the object database with one
+long-running `git cat-file --batch` per scan, so nothing is checked out and
+each unique blob (same content under many paths or commits) is scanned once.
+
+    blobs = list_new_blobs(repo, 'HEAD', since='a1b2c3d')  # blobs added since a1b2c3d
+    with BlobReader(repo) as reader:
+        findings, stats = scan_blobs(reader, blobs)
+"""
+
+import io
+import subprocess
+import time
+
+MAX_BLOB_BYTES = 5 * 1024 * 1024  # larger blobs (data dumps, vendored bundles) are skipped, archives aside
+BINARY_SNIFF_BYTES = 8192
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class GitError(Exception):
+    """A git command failed (not a repository, unknown revision, ...)."""
+
+
+def git(repo, *args):
+    """Run a git command in `repo` and return its stripped stdout."""
+    try:
+        result = subprocess.run(['git', '-C', repo, *args], capture_output=True, text=True)
+    except OSError as e:
+        raise GitError(f'git is not available: {e}') from e
+    if result.returncode != 0:
+        raise GitError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout.strip()
+
+
+def resolve_commit(repo, rev):
+    """Full SHA of `rev`, or None if it does not name a commit in `repo` (e.g. rewritten history)."""
+    try:
+        return git(repo, 'rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}')
+    except GitError:
+        return None
+
+
+def list_new_blobs(repo, target, since=None):
+    """
+    Blobs reachable from `target` but not from `since` (the whole history if
+    since is None): [(sha, size, path), ...], sorted by SHA so the order is the
+    same on every run (a resumed scan continues after the last SHA it finished).
+    A blob stored under several paths is listed once, under the first path git reports.
+    """
+    revs = [target] + ([f'^{since}'] if since else [])
+    try:
+        rev_list = subprocess.Popen(['git', '-C', repo, 'rev-list', '--objects', *revs],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f'git is not available: {e}') from e
+    check = subprocess.Popen(['git', '-C', repo, 'cat-file',
+                              '--batch-check=%(objecttype) %(objectname) %(objectsize) %(rest)'],
+                             stdin=rev_list.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    rev_list.stdout.close()  # cat-file owns the pipe now
+    blobs = []
+    for raw in check.stdout:
+        kind, sha, size, path = raw.decode('utf-8', errors='replace').rstrip('\n').split(' ', 3)
+        if kind == 'blob':
+            blobs.append((sha, int(size), path))
+    check.wait()
+    if rev_list.wait() != 0:
+        raise GitError(rev_list.stderr.read().decode('utf-8', errors='replace').strip() or 'git rev-list failed')
+    rev_list.stderr.close()
+    blobs.sort()
+    return blobs
+
+
+class _BlobStream(io.RawIOBase):
+    """The body of one cat-file reply; close() skips whatever was not read, so the next request lines up."""
+
+    def __init__(self, stdout, size):
+        self._stdout = stdout
+        self._left = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._left <= 0:
+            return 0
+        data = self._stdout.read(min(len(buffer), self._left))
+        if not data:
+            raise GitError('git cat-file exited in the middle of a blob')
+        n = len(data)
+        buffer[:n] = data
+        self._left -= n
+        return n
+
+    def close(self):
+        if not self.closed:
+            while self._left > 0:
+                data = self._stdout.read(min(STREAM_CHUNK_BYTES, self._left))
+                if not data:
+                    break
+                self._left -= len(data)
+            self._stdout.read(1)  # trailing newline
+        super().close()
+
+
+class BlobReader:
+    """
+    One `git cat-file --batch` process; read(sha) returns the blob's bytes,
+    stream(sha) a file object over them (close it before the next request).
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._proc = None
+
+    def __enter__(self):
+        try:
+            self._proc = subprocess.Popen(['git', '-C', self.repo, 'cat-file', '--batch'],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            raise GitError(f'git is not available: {e}') from e
+        return self
+
+    def stream(self, sha):
+        proc = self._proc
+        proc.stdin.write(sha.encode('ascii') + b'\n')
+        proc.stdin.flush()
+        header = proc.stdout.readline().split()
+        if len(header) != 3:
+            raise GitError(f'blob {sha} not found in {self.repo}')
+        return io.BufferedReader(_BlobStream(proc.stdout, int(header[2])), STREAM_CHUNK_BYTES)
+
+    def read(self, sha):
+        with self.stream(sha) as stream:
+            return stream.read()
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.stdin.close()
+            self._proc.wait()
+            self._proc.stdout.close()
+            self._proc = None
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _scan_archive_blob(reader, sha, size, path, timestamp, baseline):
+    """
+    Stream an archive blob through scan_archive, whatever its size (the member
+    and decompression limits of archive_scan.py apply instead). tar and gzip are
+    read sequentially; a zip needs to seek, so it is spooled, in memory up to
+    MAX_BLOB_BYTES and to a temporary file beyond, and skipped past MAX_ARCHIVE_BYTES.
+    """
+    import shutil
+    import tempfile
+    from archive_scan import MAX_ARCHIVE_BYTES, ZIP_SUFFIXES, scan_archive
+    if not path.lower().endswith(ZIP_SUFFIXES):
+        with reader.stream(sha) as stream:
+            return scan_archive(stream, path, timestamp, baseline)
+    if size > MAX_ARCHIVE_BYTES:
+        return None
+    with reader.stream(sha) as stream, tempfile.SpooledTemporaryFile(MAX_BLOB_BYTES) as spool:
+        shutil.copyfileobj(stream, spool, STREAM_CHUNK_BYTES)
+        spool.seek(0)
+        return scan_archive(spool, path, timestamp, baseline)
+
+
+def scan_blobs(reader, blobs, timestamp=None, prefix='', max_bytes=MAX_BLOB_BYTES, baseline=None, deadline=None,
+               stats=None):
+    """
+    Scan [(sha, size, path), ...] read through `reader` (a BlobReader).
+    Findings are reported at `prefix + file` (`file` is the path, or
+    `path!member` inside archives). Archives are streamed member by member
+    (archive_scan.py) at any size; other oversized blobs are skipped without
+    being read (size is known from the listing), and binary blobs after a sniff.
+    `baseline` (see baseline.py) is checked against the path without the prefix.
+    Once `deadline` (a time.time() value) has passed, the scan stops before the
+    next blob; at least one blob is always scanned. `last` is the SHA of the last
+    blob finished, so the caller can resume after it. `stats` (ScanStats) records
+    per-pattern and per-blob timing, as for files.
+    Returns (findings, {'scanned', 'skipped', 'bytes', 'last'}).
+    """
+    from archive_scan import is_archive
+    from cli_scanner import scan_lines
+    if timestamp is None:
+        from datetime import datetime
+        timestamp = datetime.utcnow().isoformat()
+    findings = []
+    counts = {'scanned': 0, 'skipped': 0, 'bytes': 0, 'last': None}
+    for sha, size, path in blobs:
+        if deadline is not None and counts['last'] is not None and time.time() > deadline:
+            break
+        counts['last'] = sha
+        start = time.perf_counter()
+        nlines = 0
+        if is_archive(path):
+            found = _scan_archive_blob(reader, sha, size, path, timestamp, baseline)
+            if found is None:
+                counts['skipped'] += 1
+                continue
+        elif size > max_bytes:
+            counts['skipped'] += 1
+            continue
+        else:
+            data = reader.read(sha)
+            if b'\0' in data[:BINARY_SNIFF_BYTES]:
+                counts['skipped'] += 1
+                continue
+            found = scan_lines(io.StringIO(data.decode('utf-8', errors='ignore')), path, stats, timestamp,
+                               baseline)
+            nlines = data.count(b'\n')
+        if stats is not None:
+            stats.add_file(prefix + path, time.perf_counter() - start, size, nlines, len(found))
+        if prefix:
+            found = [f.replace(file=prefix + f.file) for f in found]
+        findings.extend(found)
+        counts['scanned'] += 1
+        counts['bytes'] += size
+    return findings, counts
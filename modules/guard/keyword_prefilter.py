@@ -0,0 +1,116 @@
+"""
+keyword_prefilter.py
+--------------------
+Keyword prefilter for the regex pass.
+
+Nearly every detection pattern contains a required literal (`token`,
+`password`, `AKIA`, `eyJ`, `xox` ...). Those literals are derived from the
+parsed regex and loaded into one multi-keyword matcher, which finds every
+keyword occurrence in a line in a single linear pass. A pattern is then run
+only on lines containing its keyword, starting just before the first
+occurrence. Patterns without a usable literal (some custom ones) always run.
+
+The matcher is a pyahocorasick automaton when that package is installed,
+otherwise a single compiled alternation regex (the same one pass, in C).
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+try:
+    import ahocorasick as _ahocorasick
+except ImportError:
+    _ahocorasick = None
+
+MIN_KEYWORD_LENGTH = 3
+_UNBOUNDED = sre_constants.MAXREPEAT - 1
+
+
+def required_keyword(pattern):
+    """
+    Longest literal run that every match of `pattern` must contain, lowercased, plus the
+    maximum number of characters a match can span before it (None if unbounded).
+    Returns (None, None) when there is no usable keyword.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return None, None
+    items = list(parsed)
+    best, best_start = '', 0
+    run, run_start = '', 0
+    for idx, (op, av) in enumerate(items + [(None, None)]):
+        if op == sre_constants.LITERAL and av < 128:
+            if not run:
+                run_start = idx
+            run += chr(av)
+            continue
+        if len(run) > len(best):
+            best, best_start = run, run_start
+        run = ''
+    if len(best) < MIN_KEYWORD_LENGTH:
+        return None, None
+    prefix = sre_parse.SubPattern(parsed.state, items[:best_start]) if best_start else None
+    max_prefix = prefix.getwidth()[1] if prefix is not None else 0
+    return best.lower(), (None if max_prefix >= _UNBOUNDED else max_prefix)
+
+
+class KeywordPrefilter:
+    """
+    Maps each line to the patterns worth running on it and where to start.
+    `candidates(line)` returns {pattern index: start offset}.
+    """
+
+    def __init__(self, patterns):
+        self.always = {}                 # pattern index -> 0, for patterns without a keyword
+        self.by_keyword = {}             # keyword -> [(pattern index, max prefix or None)]
+        for idx, p in enumerate(patterns):
+            keyword, max_prefix = required_keyword(p.pattern)
+            if keyword is None:
+                self.always[idx] = 0
+            else:
+                self.by_keyword.setdefault(keyword, []).append((idx, max_prefix))
+        # A hit on "client_secret" is also a hit on "secret": expand each keyword's
+        # targets to those of the keywords it contains, with their offset inside it.
+        self.targets = {}
+        for keyword in self.by_keyword:
+            targets = []
+            for other, entries in self.by_keyword.items():
+                inner = keyword.find(other)
+                if inner >= 0:
+                    targets += [(idx, inner, max_prefix) for idx, max_prefix in entries]
+            self.targets[keyword] = targets
+        self.keywords = sorted(self.by_keyword, key=len, reverse=True)
+        self._find = self._build_matcher()
+
+    def _build_matcher(self):
+        if not self.keywords:
+            return lambda text: ()
+        if _ahocorasick is not None:
+            automaton = _ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            return lambda text: ((end - len(kw) + 1, kw) for end, kw in automaton.iter(text))
+        # Zero-width lookahead so overlapping keywords are all reported.
+        finder = re.compile('(?=(' + '|'.join(re.escape(k) for k in self.keywords) + '))').finditer
+        return lambda text: ((m.start(), m.group(1)) for m in finder(text))
+
+    def candidates(self, line):
+        hits = dict(self.always)
+        lowered = line.lower()
+        exact = len(lowered) == len(line)  # lower() can change length for some non-ASCII text
+        for offset, keyword in self._find(lowered):
+            for idx, inner, max_prefix in self.targets[keyword]:
+                if not exact or max_prefix is None:
+                    start = 0
+                else:
+                    start = max(0, offset + inner - max_prefix)
+                if start < hits.get(idx, start + 1):
+                    hits[idx] = start
+        return hits
@@ -0,0 +1,294 @@
+"""
+pattern_safety.py
+-----------------
+Safety layer for secret-detection regexes.
+
+- Static analysis when patterns are loaded: nested unbounded quantifiers
+  (`(a+)+`) and unbounded repeats of alternatives that can match the same
+  text (`(a|aa)+`) are "dangerous" (exponential backtracking); unbounded repeats over
+  broad classes (`.{8,}`, `[^x]*`), lazy repeats and adjacent overlapping
+  repeats (`\\s*\\s*`) are "expensive" (polynomial backtracking on long lines).
+- Expensive patterns only ever see lines in bounded, overlapping windows.
+- Every pattern has a per-call time budget. With the third-party `regex`
+  module the match is aborted on timeout and the input skipped; otherwise
+  overruns are measured and logged. Either way a pattern that keeps
+  overrunning is disabled for the rest of the run. Since a plain `re` match
+  cannot be interrupted, user-supplied patterns with an unbounded quantifier
+  are refused unless `regex` is installed.
+"""
+
+import re
+import sys
+import time
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+try:
+    import regex as _regex
+except ImportError:
+    _regex = None
+
+from utils import print_warning
+
+MAXREPEAT = sre_constants.MAXREPEAT
+MAX_LINE_LENGTH = 4096      # window size for expensive patterns
+WINDOW_OVERLAP = 256        # secrets straddling a window edge are still seen
+PATTERN_TIME_BUDGET = 0.05  # seconds per pattern per line
+MAX_OVERRUNS = 5            # disable a pattern for the run after this many overruns
+
+_ASCII = [chr(c) for c in range(128)]
+_CATEGORY_TESTS = {
+    sre_constants.CATEGORY_DIGIT: str.isdigit,
+    sre_constants.CATEGORY_NOT_DIGIT: lambda ch: not ch.isdigit(),
+    sre_constants.CATEGORY_SPACE: str.isspace,
+    sre_constants.CATEGORY_NOT_SPACE: lambda ch: not ch.isspace(),
+    sre_constants.CATEGORY_WORD: lambda ch: ch.isalnum() or ch == '_',
+    sre_constants.CATEGORY_NOT_WORD: lambda ch: not (ch.isalnum() or ch == '_'),
+}
+
+
+def _charset(op, av):
+    """ASCII characters matched by a single-character node, or None if not single-char."""
+    if op == sre_constants.LITERAL:
+        return {chr(av)} if av < 128 else set()
+    if op == sre_constants.NOT_LITERAL:
+        return set(_ASCII) - {chr(av)}
+    if op == sre_constants.ANY:
+        return set(_ASCII) - {'\n'}
+    if op == sre_constants.IN:
+        matched, negate = set(), False
+        for sub_op, sub_av in av:
+            if sub_op == sre_constants.NEGATE:
+                negate = True
+            elif sub_op == sre_constants.LITERAL and sub_av < 128:
+                matched.add(chr(sub_av))
+            elif sub_op == sre_constants.RANGE:
+                matched.update(chr(c) for c in range(sub_av[0], min(sub_av[1], 127) + 1))
+            elif sub_op == sre_constants.CATEGORY and sub_av in _CATEGORY_TESTS:
+                matched.update(ch for ch in _ASCII if _CATEGORY_TESTS[sub_av](ch))
+        return set(_ASCII) - matched if negate else matched
+    return None
+
+
+def _is_broad(op, av):
+    return op in (sre_constants.ANY, sre_constants.NOT_LITERAL) or (
+        op == sre_constants.IN and any(sub_op == sre_constants.NEGATE for sub_op, _ in av))
+
+
+def _contains_unbounded_repeat(items):
+    for op, av in items:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            if av[1] == MAXREPEAT or _contains_unbounded_repeat(av[2]):
+                return True
+        elif op == sre_constants.SUBPATTERN:
+            if _contains_unbounded_repeat(av[-1]):
+                return True
+        elif op == sre_constants.BRANCH:
+            if any(_contains_unbounded_repeat(b) for b in av[1]):
+                return True
+    return False
+
+
+def _first_chars(items):
+    """(ASCII characters a match of `items` can start with, whether it can be empty); over-approximated."""
+    chars = set()
+    for op, av in items:
+        single = _charset(op, av)
+        if single is not None:
+            return chars | single, False
+        if op == sre_constants.AT:
+            continue
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            body, empty = _first_chars(av[2])
+            chars |= body
+            if av[0] > 0 and not empty:
+                return chars, False
+        elif op == sre_constants.SUBPATTERN:
+            chars |= _first_chars(av[-1])[0]
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                chars |= _first_chars(branch)[0]
+        else:
+            return set(_ASCII), False
+    return chars, True
+
+
+def _may_overlap(a, b):
+    """Whether two alternatives can match the same text, or one a prefix of the other's (heuristic)."""
+    for (op_a, av_a), (op_b, av_b) in zip(a, b):
+        chars_a, chars_b = _charset(op_a, av_a), _charset(op_b, av_b)
+        if chars_a is None or chars_b is None:
+            (first_a, empty_a), (first_b, empty_b) = _first_chars(a), _first_chars(b)
+            return empty_a or empty_b or bool(first_a & first_b)
+        if not chars_a & chars_b:
+            return False
+        a, b = a[1:], b[1:]
+    return True  # one alternative is exhausted: it matches a prefix of the other
+
+
+def _has_overlapping_branch(items):
+    for op, av in items:
+        if op == sre_constants.BRANCH:
+            branches = av[1]
+            if any(_may_overlap(x, y) for i, x in enumerate(branches) for y in branches[i + 1:]):
+                return True
+            if any(_has_overlapping_branch(b) for b in branches):
+                return True
+        elif op == sre_constants.SUBPATTERN:
+            if _has_overlapping_branch(av[-1]):
+                return True
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            if _has_overlapping_branch(av[2]):
+                return True
+    return False
+
+
+def _walk(items, issues):
+    prev_repeat = None  # charset of the previous unbounded single-char repeat
+    for op, av in items:
+        current = None
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            lo, hi, body = av
+            if hi > 1 and _contains_unbounded_repeat(body):
+                if hi == MAXREPEAT:
+                    issues.append(('dangerous', 'nested quantifier (exponential backtracking)'))
+                else:
+                    issues.append(('expensive', 'bounded repeat of an unbounded quantifier'))
+            if hi == MAXREPEAT:
+                if _has_overlapping_branch(body):
+                    issues.append(('dangerous', 'overlapping alternatives in an unbounded repeat (exponential backtracking)'))
+                if op == sre_constants.MIN_REPEAT:
+                    issues.append(('expensive', 'unbounded lazy quantifier'))
+                if len(body) == 1:
+                    sub_op, sub_av = body[0]
+                    if _is_broad(sub_op, sub_av):
+                        issues.append(('expensive', 'unbounded quantifier over a broad class'))
+                    current = _charset(sub_op, sub_av)
+                    if current and prev_repeat and current & prev_repeat:
+                        issues.append(('expensive', 'adjacent overlapping quantifiers'))
+            _walk(body, issues)
+        elif op == sre_constants.SUBPATTERN:
+            _walk(av[-1], issues)
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                _walk(branch, issues)
+        prev_repeat = current
+
+
+def analyze_pattern(pattern):
+    """
+    Statically analyze a regex.
+    Returns:
+        dict: { 'level': 'safe'|'expensive'|'dangerous'|'invalid', 'issues': [str], 'unbounded': bool }
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError) as e:
+        return {'level': 'invalid', 'issues': [f'does not compile: {e}'], 'unbounded': False}
+    issues = []
+    _walk(list(parsed), issues)
+    levels = [lvl for lvl, _ in issues]
+    level = 'dangerous' if 'dangerous' in levels else ('expensive' if levels else 'safe')
+    return {'level': level, 'issues': sorted({msg for _, msg in issues}),
+            'unbounded': _contains_unbounded_repeat(list(parsed))}
+
+
+class SafePattern:
+    """A compiled detection pattern with line-length capping and a time budget."""
+
+    def __init__(self, pattern, label, budget=PATTERN_TIME_BUDGET, max_line=MAX_LINE_LENGTH):
+        self.pattern = pattern
+        self.label = sys.intern(label)  # shared by every finding of this type
+        self.budget = budget
+        self.max_line = max_line
+        report = analyze_pattern(pattern)
+        self.level = report['level']
+        self.issues = report['issues']
+        self.unbounded = report['unbounded']
+        if self.level == 'invalid':
+            raise ValueError(f"Invalid pattern for {label}: {self.issues[0]}")
+        # One engine per pattern: `regex` when installed (its finditer takes a timeout), else `re`
+        self.can_timeout = _regex is not None
+        self.regex = (_regex if self.can_timeout else re).compile(pattern)
+        self.overruns = 0
+        self.disabled = False
+
+    def _windows(self, line, pos=0):
+        if self.level == 'safe' or len(line) <= self.max_line:
+            yield 0, line
+            return
+        step = self.max_line - WINDOW_OVERLAP
+        for offset in range(pos - pos % step, len(line), step):
+            yield offset, line[offset:offset + self.max_line]
+            if offset + self.max_line >= len(line):
+                break
+
+    def _overrun(self, where, elapsed):
+        self.overruns += 1
+        print_warning(f"Pattern '{self.label}' exceeded its {self.budget * 1000:.0f} ms budget "
+                      f"({elapsed * 1000:.0f} ms) at {where}; input skipped.")
+        if self.overruns >= MAX_OVERRUNS:
+            self.disabled = True
+            print_warning(f"Pattern '{self.label}' disabled for this run after {self.overruns} overruns.")
+
+    def finditer(self, line, where='', pos=0):
+        """
+        Yield (secret, start, end) for each match starting at or after `pos`.
+        Offsets are relative to `line`. Matches repeated in overlapping windows are reported once.
+        """
+        if self.disabled:
+            return
+        seen = set()
+        for offset, chunk in self._windows(line, pos):
+            local_pos = max(0, pos - offset)
+            start_time = time.perf_counter()
+            try:
+                if self.can_timeout:
+                    matches = list(self.regex.finditer(chunk, local_pos, timeout=self.budget))
+                else:
+                    matches = list(self.regex.finditer(chunk, local_pos))
+            except TimeoutError:
+                self._overrun(where, time.perf_counter() - start_time)
+                continue
+            elapsed = time.perf_counter() - start_time
+            if not self.can_timeout and elapsed > self.budget:
+                # Without `regex` the match cannot be interrupted; keep its results but count the overrun
+                self._overrun(where, elapsed)
+            for match in matches:
+                group = 1 if match.groups() else 0
+                start, end = offset + match.start(group), offset + match.end(group)
+                if (start, end) in seen:
+                    continue
+                seen.add((start, end))
+                yield match.group(group), start, end
+
+
+def compile_patterns(patterns, reject_dangerous=False, source='built-in'):
+    """
+    Compile (pattern, label) pairs into SafePatterns, logging analysis results.
+    When reject_dangerous is set (user-supplied patterns), dangerous patterns are
+    dropped, and so are patterns with an unbounded quantifier if `regex` is not
+    installed to enforce the time budget.
+    """
+    compiled = []
+    for pattern, label in patterns:
+        try:
+            safe = SafePattern(pattern, label)
+        except ValueError as e:
+            print_warning(f"Skipping {source} pattern: {e}")
+            continue
+        if safe.level == 'dangerous':
+            if reject_dangerous:
+                print_warning(f"Rejected {source} pattern '{label}': {', '.join(safe.issues)}")
+                continue
+            print_warning(f"{source.capitalize()} pattern '{label}' is risky: {', '.join(safe.issues)}")
+        elif reject_dangerous and safe.unbounded and _regex is None:
+            print_warning(f"Rejected {source} pattern '{label}': unbounded quantifiers need the `regex` module "
+                          f"(pip install regex) to enforce the time budget; use a bounded repeat like {{8,64}}")
+            continue
+        compiled.append(safe)
+    return compiled
@@ -3,15 +3,60 @@ pre_commit_hook.py
 ------------------
 Git pre-commit hook template for DevShield AI Developer Guard.
 Scans staged files for secrets before allowing a commit.
+
+Staged files are sent to the scanner daemon (scan_daemon.py) when one is
+running; otherwise they are scanned in-process. Either way no extra Python
+interpreter is started.
 """
 
 import os
 import sys
-import subprocess
 
-# Path to the CLI scanner (relative to the .git/hooks directory)
-CLI_SCANNER_PATH = os.path.join(os.path.dirname(__file__), 'cli_scanner.py')
+# Guard module directory. When this file is copied into .git/hooks, set
+# DEVSHIELD_GUARD_DIR to the modules/guard checkout.
+GUARD_DIR = os.environ.get('DEVSHIELD_GUARD_DIR', os.path.dirname(os.path.realpath(__file__)))
+CLI_SCANNER_PATH = os.path.join(GUARD_DIR, 'cli_scanner.py')
+sys.path.insert(0, GUARD_DIR)
+
+
+def scan_staged_files():
+    """Scan staged files via the daemon if available, else in-process. Returns True if secrets were found."""
+    from cli_scanner import get_staged_files, scan_file_for_secrets, report_findings
+    from utils import print_success
+    staged_files = get_staged_files()
+    if not staged_files:
+        print_success("No staged files to scan.")
+        return False
+    from scan_daemon import scan_via_daemon
+    all_findings = scan_via_daemon(staged_files)
+    if all_findings is None:
+        all_findings = []
+        for file in staged_files:
+            all_findings.extend(scan_file_for_secrets(file))
+    return report_findings(all_findings)
+
 
+def parse_override_args(argv):
+    """
+    Parse --allow-secret / --justification (unknown arguments are ignored).
+    Hand-rolled rather than argparse so the hook does not pay for importing it on every commit.
+    """
+    allow_secret, justification = False, ''
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--allow-secret':
+            allow_secret = True
+        elif arg == '--justification' and i + 1 < len(argv):
+            justification = argv[i + 1]
+            i += 1
+        elif arg.startswith('--justification='):
+            justification = arg.split('=', 1)[1]
+        elif arg in ('-h', '--help'):
+            print("usage: pre_commit_hook.py [--allow-secret] [--justification TEXT]")
+            sys.exit(0)
+        i += 1
+    return allow_secret, justification
 
 
 def main():
@@ -19,20 +64,13 @@ def main():
     Main function to run the CLI scanner on staged files before commit.
     If secrets are found, the commit is blocked unless override is used.
     """
-    import argparse
-    parser = argparse.ArgumentParser(description="DevShield Guard Pre-commit Hook")
-    parser.add_argument('--allow-secret', action='store_true', help='Override and allow commit with secrets (requires justification)')
-    parser.add_argument('--justification', type=str, default='', help='Justification for allowing secret commit')
-    args, unknown = parser.parse_known_args()
-
-    # Run the CLI scanner
-    result = subprocess.run([sys.executable, CLI_SCANNER_PATH], capture_output=True, text=True)
-    print(result.stdout)
-    if result.returncode != 0:
+    allow_secret, justification = parse_override_args(sys.argv[1:])
+
+    if scan_staged_files():
         # Check for override flag or environment variable
         allow_env = os.environ.get('DEVSHIELD_ALLOW_SECRET', '').lower() == 'true'
-        if args.allow_secret or allow_env:
-            justification = args.justification or os.environ.get('DEVSHIELD_JUSTIFICATION', '')
+        if allow_secret or allow_env:
+            justification = justification or os.environ.get('DEVSHIELD_JUSTIFICATION', '')
             print("\n[DevShield Guard] WARNING: Commit override used. Secret(s) detected but commit allowed.")
             if justification:
                 print(f"Justification: {justification}")
@@ -44,7 +82,8 @@ def main():
                 print("No justification provided.")
             sys.exit(0)
         else:
-            print("\n[DevShield Guard] Commit aborted due to detected secrets. Use --allow-secret with --justification to override.")
+            print("\n[DevShield Guard] Commit aborted due to detected secrets. Use --allow-secret with --justification to override, "
+                  "or accept known test fixtures with: python modules/guard/baseline.py update <paths>")
             sys.exit(1)
     sys.exit(0)
 
@@ -0,0 +1,181 @@
+"""
+report_writers.py
+-----------------
+Streaming scan report writers. Findings are written (and flushed) as they
+are produced, so memory stays flat however large the scan is and a CI log or
+`tail -f` shows results while the scan is still running.
+
+Formats:
+- json:  a JSON array, byte-for-byte the same layout as `json.dump(findings, f, indent=2)`
+- jsonl: one finding object per line
+- html:  the DevShield HTML table, written in chunks
+- sarif: SARIF 2.1.0 for code-scanning tools (GitHub code scanning, Azure DevOps, ...)
+
+    with open_writer('report.sarif', 'sarif', rules=labels) as writer:
+        for path in files:
+            writer.write_many(scan_file_for_secrets(path))
+"""
+
+import html
+import json
+
+FORMATS = ('json', 'jsonl', 'html', 'sarif')
+_EXTENSIONS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.html': 'html', '.htm': 'html', '.sarif': 'sarif'}
+
+
+def _as_dict(finding):
+    return finding.to_dict() if hasattr(finding, 'to_dict') else dict(finding)
+
+
+class ReportWriter:
+    """Base class: begin() on open, write() per finding, end() on close."""
+
+    def __init__(self, stream, owns_stream=True):
+        self.stream = stream
+        self.owns_stream = owns_stream
+        self.count = 0
+        self.begin()
+
+    def begin(self):
+        pass
+
+    def write(self, finding):
+        raise NotImplementedError
+
+    def write_many(self, findings):
+        """Write a batch (typically one file's findings) and flush it."""
+        for finding in findings:
+            self.write(finding)
+        self.stream.flush()
+
+    def end(self):
+        pass
+
+    def close(self):
+        self.end()
+        self.stream.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonLinesWriter(ReportWriter):
+    def write(self, finding):
+        self.stream.write(json.dumps(_as_dict(finding)) + '\n')
+        self.count += 1
+
+
+class JsonArrayWriter(ReportWriter):
+    """Streams a JSON array laid out exactly like json.dump(list, indent=2)."""
+
+    def write(self, finding):
+        item = json.dumps(_as_dict(finding), indent=2).replace('\n', '\n  ')
+        self.stream.write(('[\n  ' if self.count == 0 else ',\n  ') + item)
+        self.count += 1
+
+    def end(self):
+        self.stream.write('\n]' if self.count else '[]')
+
+
+class HtmlWriter(ReportWriter):
+    COLUMNS = ('timestamp', 'file', 'line', 'secret_type', 'redacted', 'entropy', 'risk_score')
+
+    def begin(self):
+        self.stream.write('<html><head><title>DevShield Scan Report</title></head><body>')
+        self.stream.write('<h2>DevShield Scan Report</h2><table border="1"><tr><th>Timestamp</th><th>File</th>'
+                          '<th>Line</th><th>Type</th><th>Redacted</th><th>Entropy</th><th>Risk Score</th></tr>')
+
+    def write(self, finding):
+        cells = [html.escape(str(finding[c])) if c != 'entropy' else f"{finding[c]:.2f}" for c in self.COLUMNS]
+        self.stream.write('<tr>' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>')
+        self.count += 1
+
+    def end(self):
+        self.stream.write('</table></body></html>')
+
+
+def _rule_id(label):
+    return 'devshield/' + '-'.join(label.lower().replace('/', ' ').split())
+
+
+class SarifWriter(ReportWriter):
+    """
+    SARIF 2.1.0 log with one run. Rules (one per detection type) are declared
+    up front so results can be streamed; unknown types are still valid
+    results, just without a ruleIndex.
+    """
+
+    SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+    def __init__(self, stream, owns_stream=True, rules=()):
+        self.rules = list(dict.fromkeys(rules))
+        self.rule_index = {label: i for i, label in enumerate(self.rules)}
+        super().__init__(stream, owns_stream)
+
+    def begin(self):
+        driver = {
+            'name': 'DevShield Guard',
+            'rules': [{
+                'id': _rule_id(label),
+                'name': label,
+                'shortDescription': {'text': f'Potential {label} committed to source'},
+                'defaultConfiguration': {'level': 'error'},
+            } for label in self.rules],
+        }
+        head = json.dumps({'$schema': self.SCHEMA, 'version': '2.1.0',
+                           'runs': [{'tool': {'driver': driver}, 'results': []}]})
+        # Everything up to the (empty) results array; results are streamed into it
+        self._tail = ']}]}'
+        self.stream.write(head[:-len(self._tail)])
+
+    def write(self, finding):
+        finding = _as_dict(finding)
+        label = finding['secret_type']
+        result = {
+            'ruleId': _rule_id(label),
+            'level': 'error' if finding['risk_score'] >= 80 else 'warning',
+            'message': {'text': f"Potential {label} detected: {finding['redacted']} "
+                                f"(entropy {finding['entropy']:.2f}, risk {finding['risk_score']})"},
+            'locations': [{'physicalLocation': {
+                'artifactLocation': {'uri': finding['file'].replace('\\', '/')},
+                'region': {'startLine': finding['line']},
+            }}],
+            'properties': {'entropy': finding['entropy'], 'riskScore': finding['risk_score']},
+        }
+        if label in self.rule_index:
+            result['ruleIndex'] = self.rule_index[label]
+        if finding.get('fingerprint'):
+            result['partialFingerprints'] = {'devshieldSecret/v1': finding['fingerprint']}
+        self.stream.write((',' if self.count else '') + json.dumps(result))
+        self.count += 1
+
+    def end(self):
+        self.stream.write(self._tail + '\n')
+
+
+def infer_format(path, default='json'):
+    import os
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def open_writer(path, fmt=None, rules=(), stream=None):
+    """
+    Open a streaming writer for `path` in `fmt` (inferred from the extension if None).
+    If `stream` is given the report goes there instead (and is not closed), e.g. stdout.
+    """
+    fmt = fmt or infer_format(path)
+    owns_stream = stream is None
+    if owns_stream:
+        stream = open(path, 'w', encoding='utf-8')
+    if fmt == 'jsonl':
+        return JsonLinesWriter(stream, owns_stream)
+    if fmt == 'html':
+        return HtmlWriter(stream, owns_stream)
+    if fmt == 'sarif':
+        return SarifWriter(stream, owns_stream, rules)
+    return JsonArrayWriter(stream, owns_stream)
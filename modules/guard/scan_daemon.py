@@ -0,0 +1,199 @@
+"""
+scan_daemon.py
+--------------
+Optional long-running scanner daemon for near-instant pre-commit hooks.
+Keeps the patterns compiled and a per-file result cache warm, and serves
+scan requests over a Unix domain socket (newline-delimited JSON).
+
+    python modules/guard/scan_daemon.py start    # run in the foreground (use & / nohup / a service)
+    python modules/guard/scan_daemon.py status
+    python modules/guard/scan_daemon.py stop
+
+The pre-commit hook uses `scan_via_daemon()` and falls back to scanning
+in-process when no daemon is listening.
+"""
+
+import os
+import sys
+
+SOCKET_PATH = os.environ.get('DEVSHIELD_DAEMON_SOCKET',
+                             os.path.join(os.path.expanduser('~'), '.devshield', 'scanner.sock'))
+CONNECT_TIMEOUT = 0.05  # seconds; a missing/stuck daemon must not slow the hook down
+SCAN_TIMEOUT = 60.0
+CACHE_MAX_ENTRIES = 20000
+
+
+def _request(message, timeout=SCAN_TIMEOUT, socket_path=SOCKET_PATH):
+    """Send one JSON request and return the decoded reply, or None if the daemon is unavailable."""
+    if not os.path.exists(socket_path):
+        return None  # checked before importing anything: the common no-daemon case stays cheap
+    import json
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if chunk.endswith(b'\n'):
+                    break
+        return json.loads(b''.join(chunks).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def scan_via_daemon(files, socket_path=SOCKET_PATH):
+    """
+    Ask a running daemon to scan `files` (paths relative to the current directory).
+    Returns the findings list, or None if no daemon answered.
+    """
+    reply = _request({'cmd': 'scan', 'cwd': os.getcwd(), 'files': files}, socket_path=socket_path)
+    if not reply or 'findings' not in reply:
+        return None
+    return reply['findings']
+
+
+class ScanCache:
+    """LRU cache of findings keyed by absolute path, validated by (mtime_ns, size, baseline mtime)."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, signature):
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, path, signature, findings):
+        self._entries[path] = (signature, findings)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def serve(socket_path=SOCKET_PATH):
+    """Run the daemon in the foreground until a 'shutdown' request or SIGINT/SIGTERM."""
+    import json
+    import signal
+    import socketserver
+    import threading
+    from datetime import datetime
+    import cli_scanner
+    from baseline import for_directory
+
+    cli_scanner.get_compiled_patterns()  # compile once, up front
+    cache = ScanCache()
+    lock = threading.Lock()
+
+    def scan_one(cwd, rel_path, timestamp):
+        path = os.path.join(cwd, rel_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return []
+        baseline = for_directory(cwd)  # the client's repository baseline, not the daemon's
+        signature = (st.st_mtime_ns, st.st_size, baseline.stamp)
+        with lock:
+            cached = cache.get(path, signature)
+        if cached is None:
+            cached = cli_scanner.scan_file_for_secrets(path, baseline=baseline)
+            with lock:
+                cache.put(path, signature, cached)
+        # Report the path the client asked for (relative, like the CLI does) and the time of this scan;
+        # only the path prefix is rewritten, so archive findings keep their `!member` suffix
+        return [dict(f, file=rel_path + f['file'][len(path):], timestamp=timestamp) for f in cached]
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline().decode('utf-8'))
+            except ValueError:
+                return
+            cmd = message.get('cmd')
+            if cmd == 'scan':
+                findings = []
+                timestamp = datetime.utcnow().isoformat()
+                for rel_path in message.get('files', []):
+                    findings.extend(scan_one(message.get('cwd', '/'), rel_path, timestamp))
+                reply = {'findings': findings}
+            elif cmd == 'ping':
+                reply = {'status': 'ok', 'pid': os.getpid(), 'cache_hits': cache.hits,
+                         'cache_misses': cache.misses}
+            elif cmd == 'reload':
+                with lock:
+                    cache.clear()
+                    cli_scanner._compiled_patterns = None
+                    cli_scanner._suppressed = None  # re-read allowed/acknowledged fingerprints
+                    cli_scanner.get_compiled_patterns()
+                reply = {'status': 'reloaded'}
+            elif cmd == 'shutdown':
+                reply = {'status': 'stopping'}
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            else:
+                reply = {'error': f'unknown command: {cmd}'}
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    if os.path.exists(socket_path):
+        if _request({'cmd': 'ping'}, socket_path=socket_path):
+            print(f"[DevShield Daemon] Already running on {socket_path}")
+            return
+        os.remove(socket_path)  # stale socket from a crashed daemon
+    old_umask = os.umask(0o177)  # socket readable/writable by the owner only
+    try:
+        server = Server(socket_path, Handler)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"[DevShield Daemon] Listening on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("[DevShield Daemon] Stopped.")
+
+
+def main():
+    cmd = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if cmd == 'start':
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        serve()
+    elif cmd == 'stop':
+        reply = _request({'cmd': 'shutdown'})
+        print("[DevShield Daemon] Stop requested." if reply else "[DevShield Daemon] Not running.")
+    elif cmd == 'reload':
+        reply = _request({'cmd': 'reload'})
+        print("[DevShield Daemon] Patterns reloaded." if reply else "[DevShield Daemon] Not running.")
+    else:
+        reply = _request({'cmd': 'ping'})
+        print(f"[DevShield Daemon] Running: {reply}" if reply else "[DevShield Daemon] Not running.")
+
+
+if __name__ == '__main__':
+    main()
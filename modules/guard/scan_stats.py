@@ -0,0 +1,90 @@
+"""
+scan_stats.py
+-------------
+Per-pattern and per-file cost statistics for the CLI scanner (--stats).
+"""
+
+import json
+
+
+class ScanStats:
+    """
+    Accumulates scan timings and counts.
+    Pattern times are wall-clock seconds spent in each regex across all lines;
+    file times include reading the file and every detection pass.
+    """
+
+    def __init__(self):
+        self.pattern_time = {}
+        self.pattern_matches = {}
+        self.entropy_time = 0.0
+        self.entropy_candidates = 0
+        self.entropy_matches = 0
+        self.file_time = {}
+        self.file_bytes = {}
+        self.file_lines = {}
+        self.file_matches = {}
+
+    def add_pattern(self, label, elapsed, matches):
+        self.pattern_time[label] = self.pattern_time.get(label, 0.0) + elapsed
+        self.pattern_matches[label] = self.pattern_matches.get(label, 0) + matches
+
+    def add_entropy(self, elapsed, candidates, matches):
+        self.entropy_time += elapsed
+        self.entropy_candidates += candidates
+        self.entropy_matches += matches
+
+    def add_file(self, filepath, elapsed, nbytes, nlines, matches):
+        self.file_time[filepath] = self.file_time.get(filepath, 0.0) + elapsed
+        self.file_bytes[filepath] = nbytes
+        self.file_lines[filepath] = nlines
+        self.file_matches[filepath] = matches
+
+    def to_dict(self, top=10):
+        """JSON-serializable summary (for CI trending)."""
+        slowest = sorted(self.file_time.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            'files': len(self.file_time),
+            'bytes': sum(self.file_bytes.values()),
+            'lines': sum(self.file_lines.values()),
+            'total_time_s': round(sum(self.file_time.values()), 6),
+            'matches': sum(self.pattern_matches.values()) + self.entropy_matches,
+            'patterns': [
+                {'pattern': label, 'time_s': round(t, 6), 'matches': self.pattern_matches.get(label, 0)}
+                for label, t in sorted(self.pattern_time.items(), key=lambda kv: kv[1], reverse=True)
+            ],
+            'entropy': {
+                'time_s': round(self.entropy_time, 6),
+                'candidates': self.entropy_candidates,
+                'matches': self.entropy_matches,
+            },
+            'slowest_files': [
+                {'file': f, 'time_s': round(t, 6), 'bytes': self.file_bytes.get(f, 0),
+                 'lines': self.file_lines.get(f, 0), 'matches': self.file_matches.get(f, 0)}
+                for f, t in slowest
+            ],
+        }
+
+    def format_text(self, top=10):
+        """Human-readable report."""
+        d = self.to_dict(top)
+        total = d['total_time_s'] or 1e-9
+        out = [
+            "=== DevShield Scan Stats ===",
+            f"Files: {d['files']}  Lines: {d['lines']}  Bytes: {d['bytes']}  "
+            f"Matches: {d['matches']}  Time: {d['total_time_s'] * 1000:.1f} ms",
+            "",
+            f"{'Pattern':<28}{'Time (ms)':>12}{'Share':>8}{'Matches':>9}",
+        ]
+        for p in d['patterns']:
+            out.append(f"{p['pattern']:<28}{p['time_s'] * 1000:>12.2f}{p['time_s'] / total:>8.1%}{p['matches']:>9}")
+        e = d['entropy']
+        out.append(f"{'(entropy pass)':<28}{e['time_s'] * 1000:>12.2f}{e['time_s'] / total:>8.1%}{e['matches']:>9}")
+        out += ["", f"Slowest files (top {top}):"]
+        for f in d['slowest_files']:
+            out.append(f"  {f['time_s'] * 1000:9.2f} ms  {f['bytes']:>10} B  {f['lines']:>7} lines  {f['file']}")
+        return '\n'.join(out)
+
+    def write_json(self, path, top=10):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(top), f, indent=2)
@@ -4,8 +4,6 @@ utils.py
 Utility functions for Developer Guard.
 """
 
-import re
-
 
 def redact_secret(secret):
     """
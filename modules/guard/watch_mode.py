@@ -0,0 +1,235 @@
+"""
+watch_mode.py
+-------------
+`cli_scanner.py --watch [DIR]`: re-scan files as they are edited and stream
+finding changes as JSON Lines, e.g.
+
+    {"event": "added", "file": "app.py", "line": 3, "secret_type": "API Key", ...}
+    {"event": "removed", "file": "app.py", "line": 3, "secret_type": "API Key", ...}
+
+Uses watchdog (inotify/FSEvents/ReadDirectoryChangesW) when installed and
+falls back to polling mtimes. Bursts of events are debounced, and only lines
+whose content changed since the last scan of a file are re-scanned.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+IGNORED_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', '.mypy_cache', '.pytest_cache'}
+IGNORED_FILES = {'devshield_scan.log'}
+DEBOUNCE_SECONDS = 0.3
+POLL_INTERVAL = 1.0
+
+
+def _ignored(path, root):
+    rel = os.path.relpath(path, root)
+    parts = rel.split(os.sep)
+    return any(p in IGNORED_DIRS for p in parts[:-1]) or parts[-1] in IGNORED_FILES
+
+
+def _finding_key(finding):
+    return (finding['line'], finding['secret_type'], finding['redacted'])
+
+
+class FileState:
+    """Last scan of one file: findings plus per-line results keyed by line text."""
+
+    __slots__ = ('signature', 'line_results', 'findings')
+
+    def __init__(self, signature, line_results, findings):
+        self.signature = signature
+        self.line_results = line_results  # line text -> [finding fields without file/line/timestamp]
+        self.findings = findings
+
+
+class FindingsIndex:
+    """In-memory index of current findings per file, updated incrementally."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+
+    def rescan(self, path):
+        """
+        Re-scan `path` and return (added, removed) findings.
+        Lines seen in the previous scan of this file reuse their results; only new or edited lines are scanned.
+        """
+        from cli_scanner import scan_lines
+        rel = os.path.relpath(path, self.root)
+        previous = self.files.get(rel)
+        try:
+            st = os.stat(path)
+            signature = (st.st_mtime_ns, st.st_size)
+            if previous is not None and previous.signature == signature:
+                return [], []
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+        except OSError:
+            return self.remove(path)
+
+        cache = previous.line_results if previous is not None else {}
+        fresh = [line for line in dict.fromkeys(lines) if line not in cache]
+        line_results = {line: cache[line] for line in lines if line in cache}
+        for line in fresh:
+            line_results[line] = []
+        rel = sys.intern(rel)
+        for finding in scan_lines(fresh, rel):
+            fields = {k: v for k, v in finding.items() if k not in ('file', 'line', 'timestamp')}
+            line_results[fresh[finding['line'] - 1]].append(fields)
+
+        from datetime import datetime
+        from findings import Finding
+        timestamp = datetime.utcnow().isoformat()
+        findings = [Finding(timestamp=timestamp, file=rel, line=i, **fields)
+                    for i, line in enumerate(lines, 1) for fields in line_results[line]]
+        self.files[rel] = FileState(signature, line_results, findings)
+        return self._diff(previous.findings if previous is not None else [], findings)
+
+    def remove(self, path):
+        """Forget a deleted file; all its findings are reported as removed."""
+        previous = self.files.pop(os.path.relpath(path, self.root), None)
+        return [], (previous.findings if previous is not None else [])
+
+    def current(self):
+        return [f for state in self.files.values() for f in state.findings]
+
+    @staticmethod
+    def _diff(old, new):
+        old_keys = {_finding_key(f) for f in old}
+        new_keys = {_finding_key(f) for f in new}
+        return ([f for f in new if _finding_key(f) not in old_keys],
+                [f for f in old if _finding_key(f) not in new_keys])
+
+
+def iter_files(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for name in filenames:
+            if name not in IGNORED_FILES:
+                yield os.path.join(dirpath, name)
+
+
+class ChangeQueue:
+    """Collects changed paths; `wait_batch` returns them once no event has arrived for `debounce` seconds."""
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._paths = set()
+        self._last_event = 0.0
+        self._cond = threading.Condition()
+
+    def put(self, path):
+        with self._cond:
+            self._paths.add(path)
+            self._last_event = time.monotonic()
+            self._cond.notify()
+
+    def wait_batch(self):
+        with self._cond:
+            while True:
+                if self._paths:
+                    quiet = time.monotonic() - self._last_event
+                    if quiet >= self.debounce:
+                        batch, self._paths = self._paths, set()
+                        return batch
+                    self._cond.wait(self.debounce - quiet)
+                else:
+                    self._cond.wait()
+
+
+def _start_watchdog(root, queue):
+    """Start a watchdog observer feeding `queue`; returns it, or None if watchdog is not installed."""
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            for path in (event.src_path, getattr(event, 'dest_path', None)):
+                if path and not _ignored(path, root):
+                    queue.put(path)
+
+    observer = Observer()
+    observer.schedule(Handler(), root, recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+def _start_polling(root, queue, interval=POLL_INTERVAL):
+    """Fallback watcher: walk the tree every `interval` seconds and compare (mtime_ns, size)."""
+    def signatures():
+        sigs = {}
+        for path in iter_files(root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sigs[path] = (st.st_mtime_ns, st.st_size)
+        return sigs
+
+    def poll():
+        known = signatures()
+        while True:
+            time.sleep(interval)
+            current = signatures()
+            for path in set(known) | set(current):
+                if known.get(path) != current.get(path):
+                    queue.put(path)
+            known = current
+
+    thread = threading.Thread(target=poll, name='devshield-watch-poll', daemon=True)
+    thread.start()
+    return thread
+
+
+def _emit(out, event, findings):
+    for finding in findings:
+        out.write(json.dumps({'event': event, **finding}) + '\n')
+
+
+def watch(root='.', output=None, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+    """
+    Scan `root` once (emitting every existing finding as "added"), then keep
+    re-scanning changed files until interrupted.
+    """
+    root = os.path.abspath(root)
+    out = open(output, 'a', encoding='utf-8') if output else sys.stdout
+    index = FindingsIndex(root)
+    queue = ChangeQueue(debounce)
+    observer = _start_watchdog(root, queue)
+    if observer is None:
+        _start_polling(root, queue, poll_interval)
+    mode = 'watchdog' if observer is not None else f'polling every {poll_interval:g}s'
+    print(f"[DevShield Watch] Watching {root} ({mode}). Ctrl+C to stop.", file=sys.stderr)
+    skip = os.path.abspath(output) if output else None  # never scan our own output stream
+    try:
+        for path in iter_files(root):
+            if path != skip:
+                _emit(out, 'added', index.rescan(path)[0])
+        out.flush()
+        while True:
+            for path in sorted(queue.wait_batch()):
+                if path == skip:
+                    continue
+                if os.path.isfile(path):
+                    added, removed = index.rescan(path)
+                else:
+                    added, removed = index.remove(path)
+                _emit(out, 'removed', removed)
+                _emit(out, 'added', added)
+            out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
+        if out is not sys.stdout:
+            out.close()
@@ -1,5 +1,15 @@
 const vscode = require('vscode');
 const fetch = require('node-fetch');
+const crypto = require('crypto');
+
+// Keyed fingerprints of detected secrets (HMAC with a per-session random key), so the
+// same credential is analyzed and reported once per session without keeping it in clear.
+const FINGERPRINT_KEY = crypto.randomBytes(32);
+const analyzedFingerprints = new Map(); // fingerprint -> backend result
+
+function fingerprint(value) {
+    return crypto.createHmac('sha256', FINGERPRINT_KEY).update(value).digest('hex').slice(0, 32);
+}
 
 function getSettingsHtml(apiKey) {
     if (!apiKey) {
@@ -83,7 +93,7 @@ function activate(context) {
         const secrets = scanTextForSecrets(text);
         if (secrets.length > 0) {
             for (const secret of secrets) {
-                await analyzeWithBackend(context, secret, editor.document.fileName, 1);
+                await analyzeWithBackend(context, secret, editor.document.fileName, 1, true);
             }
         } else {
             vscode.window.showInformationMessage('DevShield: No secrets detected!');
@@ -204,14 +214,20 @@ async function getApiKey(context) {
 
 function scanTextForSecrets(text) {
     let results = [];
+    const seen = new Set();
     SECRET_PATTERNS.forEach(pattern => {
         let match;
         let regex = new RegExp(pattern, 'gi');
         while ((match = regex.exec(text)) !== null) {
+            const quoted = match[0].match(/['"]([^'"]+)['"]/);
+            const fp = fingerprint(quoted ? quoted[1] : match[0]);
+            if (seen.has(fp)) continue;
+            seen.add(fp);
             results.push({
                 match: match[0],
                 index: match.index,
-                entropy: shannonEntropy(match[0])
+                entropy: shannonEntropy(match[0]),
+                fingerprint: fp
             });
         }
     });
@@ -221,18 +237,37 @@ function scanTextForSecrets(text) {
     while ((match = highEntropyPattern.exec(text)) !== null) {
         const value = match[0].replace(/['"]/g, '');
         const entropy = shannonEntropy(value);
-        if (entropy > 3.5) {
+        const fp = fingerprint(value);
+        if (entropy > 3.5 && !seen.has(fp)) {
+            seen.add(fp);
             results.push({
                 match: match[0],
                 index: match.index,
-                entropy
+                entropy,
+                fingerprint: fp
             });
         }
     }
     return results;
 }
 
-async function analyzeWithBackend(context, secret, fileName, line) {
+function showResult(data) {
+    if (data.action === 'block') {
+        vscode.window.showErrorMessage('DevShield: BLOCKED! ' + data.explanation);
+    } else if (data.action === 'warn') {
+        vscode.window.showWarningMessage('DevShield: Warning! ' + data.explanation);
+    } else {
+        vscode.window.showInformationMessage('DevShield: ' + data.explanation);
+    }
+}
+
+async function analyzeWithBackend(context, secret, fileName, line, reshow) {
+    // Already analyzed this session: no second request; repeat the message only on manual scans
+    const cached = analyzedFingerprints.get(secret.fingerprint);
+    if (cached) {
+        if (reshow) showResult(cached);
+        return;
+    }
     const apiKey = await getApiKey(context);
     if (!apiKey) return;
     try {
@@ -250,13 +285,8 @@ async function analyzeWithBackend(context, secret, fileName, line) {
             })
         });
         const data = await res.json();
-        if (data.action === 'block') {
-            vscode.window.showErrorMessage('DevShield: BLOCKED! ' + data.explanation);
-        } else if (data.action === 'warn') {
-            vscode.window.showWarningMessage('DevShield: Warning! ' + data.explanation);
-        } else {
-            vscode.window.showInformationMessage('DevShield: ' + data.explanation);
-        }
+        if (res.ok) analyzedFingerprints.set(secret.fingerprint, data);
+        showResult(data);
     } catch (err) {
         vscode.window.showErrorMessage('DevShield: Backend error: ' + err.message);
     }
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'modules', 'guard'))
+
+from fingerprints import MAX_OCCURRENCES, FindingSummary, FingerprintStore  # noqa: E402
+
+
+def _findings(paths):
+    return [{'fingerprint': 'fp', 'file': path, 'line': 1, 'secret_type': 'API Key',
+             'timestamp': '2025-01-01T00:00:00'} for path in paths]
+
+
+def _scan(store, paths):
+    FindingSummary(store).add(_findings(paths)).record(store)
+    store.save()
+    return FingerprintStore(store.path)
+
+
+def test_rescanning_more_locations_than_listed_keeps_count(tmp_path):
+    store = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    paths = [f'src/file{i}.py' for i in range(MAX_OCCURRENCES + 10)]
+    for _ in range(3):
+        store = _scan(store, paths)
+        assert store.records['fp']['count'] == len(paths)
+    assert len(store.records['fp']['occurrences']) == MAX_OCCURRENCES
+
+
+def test_new_locations_raise_count(tmp_path):
+    store = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    store = _scan(store, ['a.py', 'b.py'])
+    store = _scan(store, ['b.py', 'c.py', 'c.py'])
+    assert store.records['fp']['count'] == 3